@@ -14,10 +14,24 @@ import pandas as pd
 import json
 import numpy as np
 from datetime import datetime
-import plotly.express as px
 import plotly.graph_objects as go
-from typing import Dict, List, Tuple
+from typing import Iterator, List, Optional, Tuple
 import time
+import io
+import os
+import tempfile
+
+from nlu import (DEFAULT_WORKSPACE, LATENCY, EventLog, FeatureCache, IntentEngine, ModelRegistry, ModelStore,
+                 NLUDataset, PredictionCache, SearchIndexStore, SimilarityIndex, batch_to_frame, evaluate)
+from nlu.ingest import (IngestReport, detect_format, iter_examples, read_texts, sniff_format,
+                        split_lines)
+from nlu.active_learning import UNCERTAINTY_METHODS, rank_uncertain, uncertainty_to_frame
+from nlu.benchmark import synthetic_examples
+from nlu.dedup import DEFAULT_THRESHOLD, deduplicate, drop_leaked, find_duplicates, find_leakage
+from nlu.jobs import FULL_BATCH, OUT_OF_CORE, TrainingJob, TrainingJobQueue
+from nlu.out_of_core import DEFAULT_BATCH_SIZE
+from nlu.quantize import base_backend, compare_models, is_quantized, quantize_engine, quantized_backend
+from nlu.tuning import leaderboard, param_grid, random_configs, run_sweep
 
 # Sample data for demonstration
 SAMPLE_TRAINING_DATA = [
@@ -30,100 +44,234 @@ SAMPLE_TRAINING_DATA = [
 
 INTENTS = ["book_flight", "cancel_booking", "weather_query", "book_table", "help_request"]
 
-def simulate_training(training_data: str, backend: str, epochs: int) -> Tuple[str, str]:
-    """Simulate model training with progress updates"""
-    
-    # Parse training data
+BACKENDS = ["huggingface", "rasa", "spacy"]
+# Prediction can also route to each backend's int8 export
+SERVING_BACKENDS = BACKENDS + [quantized_backend(backend) for backend in BACKENDS]
+TRAINING_MODES = [("Full batch (L-BFGS, corpus in memory)", FULL_BATCH),
+                  ("Out-of-core (streamed chunks, mini-batch SGD)", OUT_OF_CORE)]
+
+# Saved model artifacts, and the engines resident for each (workspace, backend, version)
+MODEL_STORE = ModelStore()
+PREDICTION_CACHE = PredictionCache()
+EVENT_LOG = EventLog()
+FEATURE_CACHE = FeatureCache()
+SEARCH_INDEXES = SearchIndexStore()
+
+def train_sample_engine(backend: str) -> IntentEngine:
+    """Fallback engine for a backend with no saved model yet"""
+    if is_quantized(backend):
+        # Nothing exported yet: quantize whatever the full-precision backend serves
+        return quantize_engine(MODEL_REGISTRY.get(base_backend(backend)))
+    return IntentEngine.train(SAMPLE_TRAINING_DATA, backend=backend)
+
+MODEL_REGISTRY = ModelRegistry(MODEL_STORE, fallback=train_sample_engine)
+
+def load_saved_engines() -> None:
+    """Memory-map the latest saved artifact of every backend"""
+    for backend in BACKENDS:
+        if MODEL_STORE.versions(backend):
+            MODEL_REGISTRY.get(backend)
+
+def get_engine(backend: str, workspace: str = DEFAULT_WORKSPACE) -> IntentEngine:
+    """Return the serving engine for ``backend`` in ``workspace``, loading it on first use
+
+    Raises ``KeyError`` for a workspace with no saved model for the backend
+    and ``ValueError`` for a malformed workspace name.
+    """
+    return MODEL_REGISTRY.get(backend, (workspace or "").strip() or DEFAULT_WORKSPACE)
+
+def install_trained_model(job: TrainingJob) -> None:
+    """Swap a finished job's artifact in as the serving model for its backend"""
+    result = job.result
+    MODEL_REGISTRY.install(result["backend"], result["version"], result["workspace"])
+    PREDICTION_CACHE.invalidate(result["backend"])
+    int8_backend = quantized_backend(result["backend"])
+    if result["quantized_version"]:
+        MODEL_REGISTRY.install(int8_backend, result["quantized_version"], result["workspace"])
+    else:
+        # An int8 fallback quantized from the previous model is stale now
+        MODEL_REGISTRY.evict(int8_backend, result["workspace"])
+    PREDICTION_CACHE.invalidate(int8_backend)
+    stats = result["training_stats"]
+    EVENT_LOG.log_training(result["backend"], stats["samples"], result["accuracy"], stats["training_time"])
+
+TRAINING_JOBS = TrainingJobQueue(MODEL_STORE.root, on_complete=install_trained_model, search_root=SEARCH_INDEXES.root)
+
+def get_search_index(backend: str, workspace: str = DEFAULT_WORKSPACE) -> Optional[SimilarityIndex]:
+    """Similar-example index of the backend's training corpus; ``None`` for an unknown workspace
+
+    Only reads: the index is built by training jobs, never by a query.
+    """
+    workspace = (workspace or "").strip() or DEFAULT_WORKSPACE
     try:
-        data = json.loads(training_data) if training_data.strip().startswith('[') else SAMPLE_TRAINING_DATA
-    except:
-        data = SAMPLE_TRAINING_DATA
-    
-    # Simulate training steps
-    progress_steps = [
-        "🔄 Initializing training environment...",
-        "📊 Preprocessing training data...",
-        "🔤 Tokenizing text samples...",
-        "🧠 Training neural network...",
-        "✅ Training completed successfully!"
-    ]
-    
-    progress_text = ""
-    for step in progress_steps:
-        progress_text += f"{step}\n"
-        time.sleep(0.5)
-    
-    # Generate simulated results
-    accuracy = np.random.uniform(0.85, 0.95)
-    precision = np.random.uniform(0.80, 0.92)
-    recall = np.random.uniform(0.82, 0.90)
-    f1_score = 2 * (precision * recall) / (precision + recall)
-    
-    results = {
-        "status": "success",
-        "backend": backend,
-        "epochs": epochs,
-        "accuracy": accuracy,
-        "precision": precision,
-        "recall": recall,
-        "f1_score": f1_score,
-        "training_time": f"{np.random.uniform(1.5, 3.5):.1f} seconds",
-        "model_size": f"{np.random.uniform(10, 25):.1f} MB",
-        "samples_processed": len(data)
-    }
+        if workspace != DEFAULT_WORKSPACE and not MODEL_STORE.versions(base_backend(backend), workspace):
+            return None
+        return SEARCH_INDEXES.get(base_backend(backend), workspace)
+    except ValueError:
+        return None
+
+def format_training_results(job: TrainingJob) -> str:
+    """Markdown summary of a training job's outcome"""
+    if job.status != "completed":
+        return ""
+    result = job.result
+    stats, macro = result["training_stats"], result["macro_avg"]
     
     results_text = f"""
 🎉 **Training Results:**
 
-**Model Performance:**
-- 🎯 Accuracy: {results['accuracy']:.2%}
-- 🔍 Precision: {results['precision']:.2%}
-- 📊 Recall: {results['recall']:.2%}
-- ⚖️ F1-Score: {results['f1_score']:.2%}
+**Model Performance (training set):**
+- 🎯 Accuracy: {result['accuracy']:.2%}
+- 📏 Macro Precision: {macro['precision']:.2%}
+- 🔁 Macro Recall: {macro['recall']:.2%}
+- ⚖️ Macro F1-Score: {macro['f1-score']:.2%}
+- 🏷️ Intents: {stats['intents']}
 
 **Training Details:**
-- 🔧 Backend: {results['backend']}
-- 🔄 Epochs: {results['epochs']}
-- ⏱️ Training Time: {results['training_time']}
-- 💾 Model Size: {results['model_size']}
-- 📈 Samples Processed: {results['samples_processed']}
+- 🔧 Backend: {result['backend']}
+- ⏱️ Training Time: {stats['training_time']:.2f} seconds
+- 💾 Model Size: {result['model_size_bytes'] / 1e6:.1f} MB
+- 📈 Samples Processed: {stats['samples']}
+- 🏷️ Model Version: {result['version']}
 """
-    
-    return progress_text, results_text
+    if "epochs" in stats:
+        results_text += (f"- 🔄 Epochs: {stats['epochs']} (mini-batch SGD, batch size {stats['batch_size']}, "
+                         f"{stats['chunks']} chunk(s) streamed from disk)\n")
+    else:
+        results_text += f"- 🧮 Optimizer Iterations: {stats['iterations']}\n"
+    if "feature_cache_hit" in stats:
+        results_text += (f"- ♻️ Feature Cache: {'hit' if stats['feature_cache_hit'] else 'miss'} "
+                         f"({stats['featurize_time']:.2f}s featurizing)\n")
+    if stats.get("base_version"):
+        results_text += f"- 🧩 Updated From: {stats['base_version']} (corpus now {stats['total_samples']} samples)\n"
+    if result["quantized_version"]:
+        results_text += f"- 🗜️ Int8 Export: {quantized_backend(result['backend'])}/{result['quantized_version']}\n"
+    if result["quantization"]:
+        results_text += f"- 📉 Int8 vs Full Precision: {result['quantization']['summary']}\n"
+    return results_text
+
+def simulate_training(training_data: str, backend: str, epochs: int, training_file=None, mode: str = FULL_BATCH,
+                      batch_size: int = DEFAULT_BATCH_SIZE, quantize: bool = False) -> Iterator[Tuple[str, str]]:
+    """Submit a background training job and stream its progress
 
-def predict_intent(text: str, model_backend: str) -> Tuple[str, str]:
-    """Simulate intent prediction"""
+    ``epochs`` and ``batch_size`` drive the out-of-core mode; full-batch
+    training runs L-BFGS to convergence instead. ``quantize`` also exports
+    an int8 copy of the model.
+    """
     
-    if not text.strip():
-        return "❌ Please enter some text to analyze.", ""
+    options = {"mode": mode, "epochs": int(epochs), "batch_size": int(batch_size), "quantize": bool(quantize)}
+    if training_file is not None:
+        path = training_file if isinstance(training_file, str) else training_file.name
+        job_id = TRAINING_JOBS.submit(backend, training_path=path, **options)
+    elif training_data and training_data.strip():
+        job_id = TRAINING_JOBS.submit(backend, training_text=training_data, **options)
+    else:
+        yield "❌ Please paste training data or upload a training file.", ""
+        return
     
-    # Simulated prediction logic
-    predictions = {
-        "flight": ("book_flight", 0.95, [{"entity": "destination", "value": "destination_city"}]),
-        "cancel": ("cancel_booking", 0.92, []),
-        "weather": ("weather_query", 0.88, [{"entity": "time", "value": "time_ref"}]),
-        "table": ("book_table", 0.90, [{"entity": "number", "value": "party_size"}]),
-        "help": ("help_request", 0.85, []),
-    }
+    yield f"🆔 Submitted training job {job_id}; waiting for a worker...", ""
+    for job in TRAINING_JOBS.follow(job_id):
+        yield job.progress_text(), format_training_results(job)
+
+def update_model(training_data: str, backend: str, training_file=None,
+                 quantize: bool = False) -> Iterator[Tuple[str, str]]:
+    """Incrementally update the latest saved model with new examples and stream the job"""
+    
+    versions = MODEL_STORE.versions(backend)
+    if not versions:
+        yield f"❌ No saved {backend} model to update yet. Use 🚀 Start Training first.", ""
+        return
+    if training_file is not None:
+        path = training_file if isinstance(training_file, str) else training_file.name
+        job_id = TRAINING_JOBS.submit(backend, training_path=path, max_iter=50, base_version=versions[-1],
+                                      quantize=bool(quantize))
+    elif training_data and training_data.strip():
+        job_id = TRAINING_JOBS.submit(backend, training_text=training_data, max_iter=50, base_version=versions[-1],
+                                      quantize=bool(quantize))
+    else:
+        yield "❌ Please paste the new or corrected examples or upload a file.", ""
+        return
     
-    # Simple keyword-based prediction for demo
-    text_lower = text.lower()
-    if any(word in text_lower for word in ["flight", "fly", "airport"]):
-        intent, confidence, entities = predictions["flight"]
-    elif any(word in text_lower for word in ["cancel", "remove", "delete"]):
-        intent, confidence, entities = predictions["cancel"]
-    elif any(word in text_lower for word in ["weather", "temperature", "rain"]):
-        intent, confidence, entities = predictions["weather"]
-    elif any(word in text_lower for word in ["table", "restaurant", "book", "reservation"]):
-        intent, confidence, entities = predictions["table"]
-    elif any(word in text_lower for word in ["help", "support", "assistance"]):
-        intent, confidence, entities = predictions["help"]
+    yield f"🆔 Submitted update job {job_id} for {backend}/{versions[-1]}; waiting for a worker...", ""
+    for job in TRAINING_JOBS.follow(job_id):
+        yield job.progress_text(), format_training_results(job)
+
+def list_training_jobs() -> pd.DataFrame:
+    """Table of submitted training jobs, newest first"""
+    rows = [{
+        "job": job.job_id,
+        "backend": job.backend,
+        "base": job.base_version or "",
+        "status": job.status,
+        "iteration": f"{job.iteration}/{job.max_iter}",
+        "version": job.result["version"] if job.result else "",
+        "submitted": datetime.fromtimestamp(job.submitted_at).strftime("%H:%M:%S"),
+    } for job in TRAINING_JOBS.jobs()]
+    return pd.DataFrame(rows, columns=["job", "backend", "base", "status", "iteration", "version", "submitted"])
+
+def read_dataset(pasted_text: str, uploaded_file) -> Tuple[NLUDataset, IngestReport]:
+    """Labelled examples from an uploaded file, else from pasted JSON / JSON lines / CSV"""
+    report = IngestReport()
+    if uploaded_file is not None:
+        path = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
+        examples = iter_examples(path, detect_format(path), report)
     else:
-        intent, confidence, entities = ("unknown", 0.45, [])
+        examples = iter_examples(io.StringIO(pasted_text or ""), sniff_format(pasted_text or ""), report)
+    return NLUDataset.from_examples(examples), report
+
+def export_dataset(dataset: NLUDataset, name: str) -> str:
+    """Write ``dataset`` as a JSON training file and return its path for download"""
+    path = os.path.join(tempfile.gettempdir(), f"{name}_{int(time.time())}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dataset.to_records(), f, indent=2)
+    return path
+
+def check_data_hygiene(training_data: str, training_file, test_file,
+                       threshold: float) -> Tuple[str, pd.DataFrame, pd.DataFrame, List[str]]:
+    """Gradio handler: near-duplicate clusters in the training data and train/test leakage"""
     
-    # Add some randomness
-    confidence += np.random.uniform(-0.05, 0.05)
-    confidence = max(0.0, min(1.0, confidence))
+    train, report = read_dataset(training_data, training_file)
+    if report.fatal or report.error_count:
+        return f"❌ Could not parse training data:\n{report.summary()}", pd.DataFrame(), pd.DataFrame(), []
+    if not len(train):
+        return "❌ Please paste training data or upload a training file.", pd.DataFrame(), pd.DataFrame(), []
+    
+    started = time.perf_counter()
+    duplicates = find_duplicates(train, threshold)
+    exports = [export_dataset(deduplicate(train, duplicates), "train_deduplicated")]
+    summary = f"""
+🧹 **Data Hygiene Report** (MinHash LSH, similarity ≥ {threshold:.2f}):
+
+- 🔁 Near-Duplicates: {duplicates.summary()}
+"""
+    leakage_df = pd.DataFrame()
+    if test_file is not None:
+        test, test_report = read_dataset("", test_file)
+        if test_report.fatal or test_report.error_count:
+            return f"❌ Could not parse test data:\n{test_report.summary()}", pd.DataFrame(), pd.DataFrame(), []
+        leakage = find_leakage(train, test, threshold)
+        exports.append(export_dataset(drop_leaked(test, leakage), "test_without_leaks"))
+        summary += f"- 🚰 Train/Test Leakage: {leakage.summary()}\n"
+        leakage_df = leakage.to_frame(train, test)
+    summary += f"- ⏱️ Check Time: {time.perf_counter() - started:.2f} seconds\n"
+    return summary, duplicates.to_frame(train), leakage_df, exports
+
+def predict_intent(text: str, model_backend: str, workspace: str = DEFAULT_WORKSPACE) -> Tuple[str, str]:
+    """Classify text with the workspace's model for the chosen backend"""
+    
+    if not text.strip():
+        return "❌ Please enter some text to analyze.", ""
+    
+    try:
+        engine = get_engine(model_backend, workspace)
+    except (KeyError, ValueError):
+        return f"❌ Unknown workspace `{workspace}`: no {model_backend} model is saved there.", ""
+    started = time.perf_counter_ns()
+    prediction = PREDICTION_CACHE.predict(engine, text)
+    elapsed_ms = (time.perf_counter_ns() - started) / 1e6
+    cache = PREDICTION_CACHE.stats()
+    breakdown = " · ".join(f"{stage} {ms:.3f}ms" for stage, ms in prediction["timings_ms"].items())
+    intent, confidence, entities = prediction["intent"], prediction["confidence"], prediction["entities"]
     
     result_text = f"""
 🔍 **Intent Prediction Results:**
@@ -134,58 +282,210 @@ def predict_intent(text: str, model_backend: str) -> Tuple[str, str]:
 
 **Analysis:**
 - Input Text: "{text}"
-- Processing Time: ~{np.random.uniform(50, 150):.0f}ms
-- Model Version: v1.0.0
+- Processing Time: {elapsed_ms:.2f}ms ({"cache hit" if prediction["cached"] else "cache miss"})
+- Stage Breakdown: {breakdown}
+- Model Version: {f"{engine.workspace}/{engine.version}" if engine.version else "unsaved (sample data)"}
+- Cache: {cache['hit_rate']:.0%} hit rate over {cache['hits'] + cache['misses']} lookups, {cache['entries']} entries
 """
     
     entities_text = ""
     if entities:
         entities_text = "**Detected Entities:**\n"
         for entity in entities:
-            entities_text += f"- {entity['entity']}: {entity['value']}\n"
+            entities_text += f"- {entity['entity']}: {entity['value']} ({entity['start']}-{entity['end']})\n"
     else:
         entities_text = "**Detected Entities:** None"
     
+    elapsed_ns = time.perf_counter_ns() - started
+    LATENCY.record("request", elapsed_ns)
+    EVENT_LOG.log_prediction(model_backend, intent, confidence, elapsed_ns / 1e6, prediction["cached"])
     return result_text, entities_text
 
-def evaluate_model(test_data: str) -> Tuple[str, str]:
-    """Simulate model evaluation"""
+def similar_examples(text: str, model_backend: str, workspace: str = DEFAULT_WORKSPACE,
+                     top_k: int = 5) -> Tuple[str, pd.DataFrame]:
+    """Labelled training utterances closest to ``text`` in the backend's corpus"""
+    if not text.strip():
+        return "", pd.DataFrame()
+    
+    index = get_search_index(model_backend, workspace)
+    if index is None:
+        return f"❌ Unknown workspace `{workspace}`.", pd.DataFrame()
+    if not len(index):
+        return "ℹ️ No training examples indexed for this backend yet. Train a model to build the index.", pd.DataFrame()
+    started = time.perf_counter()
+    matches = index.search(text, k=int(top_k))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not matches:
+        return f"🔎 No training example shares a word with this text ({len(index):,} searched).", pd.DataFrame()
+    summary = f"🔎 **{len(matches)} most similar of {len(index):,} training examples** ({elapsed_ms:.1f}ms)"
+    df = pd.DataFrame(matches, columns=["similarity", "intent", "text"]).round({"similarity": 3})
+    return summary, df
+
+def predict_batch(texts: List[str], backend: str, top_k: int = 3) -> pd.DataFrame:
+    """Classify a list of utterances in one vectorized pass"""
+    result = get_engine(backend).predict_batch(list(texts), top_k=top_k)
+    return batch_to_frame(texts, result)
+
+def run_batch_prediction(pasted_text: str, uploaded_file, backend: str, top_k: int) -> Tuple[str, pd.DataFrame, str]:
+    """Gradio handler: score pasted lines or an uploaded JSONL/JSON/CSV/TXT file"""
     
-    # Generate synthetic evaluation metrics
-    np.random.seed(42)
+    if uploaded_file is not None:
+        path = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
+        texts = read_texts(path)
+    else:
+        texts = split_lines(pasted_text or "")
     
-    intents = ["book_flight", "cancel_booking", "weather_query", "book_table", "help_request"]
-    metrics = {}
+    if not texts:
+        return "❌ Please paste some utterances or upload a file.", pd.DataFrame(), None
     
-    for intent in intents:
-        precision = np.random.uniform(0.80, 0.95)
-        recall = np.random.uniform(0.82, 0.93)
-        f1 = 2 * (precision * recall) / (precision + recall)
-        support = np.random.randint(15, 45)
-        
-        metrics[intent] = {
-            "precision": precision,
-            "recall": recall,
-            "f1-score": f1,
-            "support": support
-        }
+    started = time.perf_counter()
+    df = predict_batch(texts, backend, top_k=int(top_k))
+    elapsed = time.perf_counter() - started
+    EVENT_LOG.log_predictions(backend, df["intent"], df["confidence"], np.full(len(df), elapsed * 1000 / len(df)))
     
-    # Overall metrics
-    overall_accuracy = np.random.uniform(0.88, 0.94)
-    macro_avg_f1 = np.mean([m["f1-score"] for m in metrics.values()])
+    output_path = os.path.join(tempfile.gettempdir(), f"batch_predictions_{int(time.time())}.csv")
+    df.to_csv(output_path, index=False)
+    
+    summary = f"""
+📦 **Batch Prediction Results:**
+
+- 📈 Utterances Scored: {len(df)}
+- ⏱️ Total Time: {elapsed:.3f} seconds ({len(df) / max(elapsed, 1e-9):,.0f} utterances/s)
+- 🔧 Model Backend: {backend}
+- 🎯 Mean Confidence: {df['confidence'].mean():.2%}
+
+Showing the first {min(len(df), 1000)} rows; download the CSV for the full table.
+"""
+    return summary, df.head(1000), output_path
+
+def uncertainty_histogram(histogram: np.ndarray) -> go.Figure:
+    """Bar chart of how many utterances fall in each uncertainty decile"""
+    buckets = [f"{i / 10:.1f}-{(i + 1) / 10:.1f}" for i in range(len(histogram))]
+    fig = go.Figure(data=go.Bar(x=buckets, y=histogram, marker_color="#764ba2"))
+    fig.update_layout(title="Uncertainty Distribution", xaxis_title="Uncertainty Score",
+                      yaxis_title="Utterances", height=350)
+    return fig
+
+def run_active_learning(pasted_text: str, uploaded_file, backend: str, method: str, top_k: int,
+                        confidence_threshold: float) -> Tuple[str, pd.DataFrame, go.Figure]:
+    """Gradio handler: rank unlabeled utterances by model uncertainty"""
+    
+    if uploaded_file is not None:
+        path = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
+        texts = read_texts(path)
+    else:
+        texts = split_lines(pasted_text or "")
+    
+    if not texts:
+        return "❌ Please paste some unlabeled utterances or upload a file.", pd.DataFrame(), go.Figure()
+    
+    started = time.perf_counter()
+    ranking = rank_uncertain(get_engine(backend), texts, method=method, top_k=int(top_k),
+                             confidence_threshold=confidence_threshold)
+    elapsed = time.perf_counter() - started
+    summary = ranking["summary"]
+    
+    summary_text = f"""
+🎯 **Uncertainty Sampling Results:**
+
+- 📈 Utterances Scored: {summary['total']}
+- 🚩 Flagged as Uncertain: {summary['flagged']} ({summary['flagged'] / summary['total']:.1%})
+- 📉 Low Confidence (< 50%): {summary['low_confidence']}
+- 📊 High Confidence (> 80%): {summary['high_confidence']}
+- 🎯 Average Confidence: {summary['average_confidence']:.2%}
+- 🧮 Method: {method}
+- ⏱️ Ranking Time: {elapsed:.3f} seconds
+
+Label the {len(ranking['text'])} utterances below first; they are where the model is least sure.
+"""
+    return summary_text, uncertainty_to_frame(ranking), uncertainty_histogram(summary["score_histogram"])
+
+def performance_report() -> Tuple[str, pd.DataFrame, go.Figure, str]:
+    """Latency histograms per prediction stage, as a table, a chart and Prometheus text"""
+    snapshot = LATENCY.snapshot()
+    rows = [{"stage": stage, **{k: round(v, 4) if isinstance(v, float) else v for k, v in summary.items()}}
+            for stage, summary in snapshot.items() if summary["count"]]
+    df = pd.DataFrame(rows, columns=["stage", "count", "mean_ms", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms"])
+    
+    fig = go.Figure()
+    for column, color in [("p50_ms", "#667eea"), ("p95_ms", "#764ba2"), ("p99_ms", "#f093fb")]:
+        fig.add_trace(go.Bar(name=column.split("_")[0], x=df["stage"], y=df[column], marker_color=color))
+    fig.update_layout(title="Latency by Stage", barmode="group", yaxis_title="Milliseconds", height=400)
+    
+    requests = snapshot.get("request", {"count": 0})
+    registry = MODEL_REGISTRY.stats()
+    summary = f"""
+⚡ **Performance Summary:**
+
+- 📨 Requests Measured: {requests['count']}
+- ⏱️ Request p50 / p99: {requests.get('p50_ms', 0):.3f}ms / {requests.get('p99_ms', 0):.3f}ms
+- 🧩 Stages Tracked: {len(df)}
+- 🗂️ Resident Models: {registry['models']} ({registry['bytes'] / (1 << 20):.1f} of {registry['max_bytes'] / (1 << 20):.0f} MB), {registry['hit_rate']:.0%} hit rate, {registry['evictions']} evicted
+
+Histograms use HDR-style log-linear buckets (about 6% resolution) and cover every call since start-up or the last reset.
+"""
+    return summary, df, fig, LATENCY.to_prometheus()
+
+def reset_performance() -> Tuple[str, pd.DataFrame, go.Figure, str]:
+    """Clear the latency histograms"""
+    LATENCY.reset()
+    return performance_report()
+
+def confusion_heatmap(cm: np.ndarray, labels: List[str]) -> go.Figure:
+    """Plotly heatmap of a confusion matrix"""
+    fig = go.Figure(data=go.Heatmap(
+        z=cm,
+        x=labels,
+        y=labels,
+        colorscale="Blues",
+        text=cm,
+        texttemplate="%{text}",
+        hovertemplate="Actual: %{y}<br>Predicted: %{x}<br>Count: %{z}<extra></extra>"
+    ))
+    fig.update_layout(
+        title="Confusion Matrix",
+        xaxis_title="Predicted Intent",
+        yaxis_title="Actual Intent",
+        yaxis=dict(autorange="reversed")
+    )
+    return fig
+
+def evaluate_model(test_data: str, backend: str = "huggingface") -> Tuple[str, str, go.Figure]:
+    """Evaluate the trained model on the supplied test set"""
+    
+    if test_data and test_data.strip():
+        report = IngestReport()
+        examples = NLUDataset.from_examples(iter_examples(io.StringIO(test_data), sniff_format(test_data), report))
+        if report.fatal or report.error_count:
+            return f"❌ Could not parse test data:\n{report.summary()}", "", None
+    else:
+        examples = SAMPLE_TRAINING_DATA
+    if not len(examples):
+        return "❌ The test set is empty.", "", None
+    
+    started = time.perf_counter()
+    report = evaluate(get_engine(backend), examples, feature_cache=FEATURE_CACHE)
+    elapsed = time.perf_counter() - started
+    macro, weighted = report["macro avg"], report["weighted avg"]
     
     results_text = f"""
 📊 **Model Evaluation Results:**
 
 **Overall Performance:**
-- 🎯 Accuracy: {overall_accuracy:.2%}
-- ⚖️ Macro F1-Score: {macro_avg_f1:.2%}
-- 📈 Total Test Samples: {sum(m['support'] for m in metrics.values())}
-
-**Per-Intent Performance:**
+- 🎯 Accuracy: {report['accuracy']:.2%}
+- ⚖️ Macro F1-Score: {macro['f1-score']:.2%} (P {macro['precision']:.2%} / R {macro['recall']:.2%})
+- 📏 Weighted F1-Score: {weighted['f1-score']:.2%} (P {weighted['precision']:.2%} / R {weighted['recall']:.2%})
+- 📈 Total Test Samples: {macro['support']}
+- 🔧 Model Backend: {backend}
+- ⏱️ Evaluation Time: {elapsed:.3f} seconds
 """
+    if is_quantized(backend):
+        delta = compare_models(get_engine(base_backend(backend)), get_engine(backend), examples,
+                               feature_cache=FEATURE_CACHE)
+        results_text += f"- 🗜️ Int8 vs Full Precision: {delta.summary()}\n"
+    results_text += "\n**Per-Intent Performance:**\n"
     
-    for intent, metric in metrics.items():
+    for intent, metric in report["labels"].items():
         results_text += f"""
 **{intent}:**
 - Precision: {metric['precision']:.2%}
@@ -194,18 +494,77 @@ def evaluate_model(test_data: str) -> Tuple[str, str]:
 - Support: {metric['support']} samples
 """
     
-    # Create confusion matrix visualization
-    confusion_text = """
-📈 **Confusion Matrix Analysis:**
+    cm, labels = report["confusion_matrix"], report["confusion_labels"]
+    errors = cm.copy()
+    np.fill_diagonal(errors, 0)
+    pairs = np.argsort(-errors, axis=None)[:5]
+    confusion_text = "\n📈 **Confusion Matrix Analysis:**\n\n"
+    if errors.sum() == 0:
+        confusion_text += "No misclassifications: every test utterance was predicted correctly.\n"
+    else:
+        confusion_text += f"{errors.sum()} of {cm.sum()} test utterances were misclassified.\nMost frequent confusions:\n"
+        for flat in pairs:
+            actual, predicted = np.unravel_index(flat, errors.shape)
+            if errors[actual, predicted]:
+                confusion_text += f"- {labels[actual]} → {labels[predicted]}: {errors[actual, predicted]}\n"
+    
+    return results_text, confusion_text, confusion_heatmap(cm, labels)
 
-Model shows strong performance across all intent categories with minimal cross-class confusion.
-Key insights:
-- Highest performance: weather_query and book_flight
-- Areas for improvement: help_request disambiguation
-- Recommendation: Increase training data for edge cases
-"""
+def parse_values(text: str, cast) -> List:
+    """Comma-separated hyperparameter values, e.g. ``"1e-4, 1e-3"``"""
+    return [cast(value.strip()) for value in (text or "").split(",") if value.strip()]
+
+def run_cross_validation(training_data: str, training_file, synthetic_size: int, backends: List[str], alphas: str,
+                         max_iters: str, folds: int, search: str, n_configs: int,
+                         workers: int) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Gradio handler: k-fold sweep over hyperparameters, streaming the leaderboard"""
     
-    return results_text, confusion_text
+    report = IngestReport()
+    if training_file is not None:
+        path = training_file if isinstance(training_file, str) else training_file.name
+        dataset = NLUDataset.from_examples(iter_examples(path, detect_format(path), report))
+        source = os.path.basename(path)
+    elif training_data and training_data.strip():
+        dataset = NLUDataset.from_examples(iter_examples(io.StringIO(training_data), sniff_format(training_data), report))
+        source = "pasted data"
+    else:
+        dataset = NLUDataset.from_examples(synthetic_examples(int(synthetic_size)))
+        source = "synthetic corpus"
+    if report.fatal or report.error_count:
+        yield f"❌ Could not parse training data:\n{report.summary()}", pd.DataFrame()
+        return
+    
+    try:
+        space = {"backend": backends or ["huggingface"], "alpha": parse_values(alphas, float) or [1e-3],
+                 "max_iter": parse_values(max_iters, int) or [200]}
+    except ValueError:
+        yield "❌ Alphas and max iterations must be comma-separated numbers.", pd.DataFrame()
+        return
+    configs = param_grid(space) if search == "Grid" else random_configs(space, int(n_configs))
+    total = len(configs) * int(folds)
+    
+    results = []
+    started = time.perf_counter()
+    try:
+        for result in run_sweep(dataset, configs, folds=int(folds), max_workers=int(workers)):
+            results.append(result)
+            yield (f"🧪 {len(results)}/{total} fold runs finished on {len(dataset)} utterances ({source}), "
+                   f"{time.perf_counter() - started:.1f}s elapsed..."), pd.DataFrame(leaderboard(results))
+    except ValueError as exc:
+        yield f"❌ {exc}", pd.DataFrame()
+        return
+    
+    rows = leaderboard(results)
+    best = rows[0]
+    summary = f"""
+🏆 **Cross-Validation Leaderboard:**
+
+- 📚 Corpus: {len(dataset)} utterances, {len(dataset.intent_counts())} intents ({source})
+- 🧪 Configurations: {len(configs)} × {int(folds)} folds ({search.lower()} search)
+- 🥇 Best: {best['backend']} (alpha {best['alpha']:g}, max_iter {best['max_iter']}) with macro F1 {best['mean_macro_f1']:.2%} ± {best['std_macro_f1']:.2%}
+- ⏱️ Sweep Time: {time.perf_counter() - started:.1f} seconds on {int(workers)} worker process(es)
+"""
+    yield summary, pd.DataFrame(rows).round(4)
 
 def create_sample_data() -> str:
     """Generate sample training data in JSON format"""
@@ -244,9 +603,571 @@ This is a comprehensive Natural Language Understanding training platform that su
 **✅ 100% Complete** - All development phases finished, production-ready with comprehensive documentation.
 """
 
-# Create Gradio interface
-def create_gradio_app():
-    """Create the main Gradio application"""
+# Create Gradio interface, one builder per tab
+def build_overview_tab() -> None:
+    """Project overview and feature summary"""
+    with gr.Tab("🏠 Project Overview"):
+        gr.Markdown(get_project_info())
+        
+        with gr.Row():
+            with gr.Column():
+                gr.Markdown("""
+                ### 🎯 Demo Features
+                This Hugging Face Space demonstrates the core functionality of the full application:
+                - **NLU Model Training** simulation
+                - **Intent Prediction** with confidence scores
+                - **Model Evaluation** with detailed metrics
+                - **Interactive Testing** interface
+                """)
+            
+            with gr.Column():
+                gr.Markdown("""
+                ### 🚀 Full Application
+                The complete application includes:
+                - Multi-user authentication system
+                - Workspace management
+                - Real-time model training
+                - Entity annotation tools
+                - Analytics dashboard
+                - Production deployment with Docker
+                """)
+
+def build_training_tab() -> None:
+    """Training form, Update Model and the background jobs table"""
+    with gr.Tab("🤖 NLU Training"):
+        gr.Markdown("### 🔧 Train Your NLU Model")
+        
+        with gr.Row():
+            with gr.Column():
+                training_data_input = gr.Textbox(
+                    label="Training Data (JSON format)",
+                    value=create_sample_data(),
+                    lines=10,
+                    placeholder="Enter your training data in JSON format..."
+                )
+                
+                training_file_input = gr.File(
+                    label="...or upload training data (JSON / JSONL / CSV)",
+                    file_types=[".json", ".jsonl", ".csv"]
+                )
+                
+                backend_select = gr.Dropdown(
+                    choices=BACKENDS,
+                    value="huggingface",
+                    label="Select NLU Backend"
+                )
+                
+                mode_select = gr.Radio(
+                    choices=TRAINING_MODES,
+                    value=FULL_BATCH,
+                    label="Training Mode"
+                )
+                
+                with gr.Row():
+                    epochs_slider = gr.Slider(
+                        minimum=1,
+                        maximum=10,
+                        value=5,
+                        step=1,
+                        label="Training Epochs (out-of-core)"
+                    )
+                    
+                    batch_size_select = gr.Dropdown(
+                        choices=[16, 32, 64, 128, 256],
+                        value=DEFAULT_BATCH_SIZE,
+                        label="Batch Size (out-of-core)"
+                    )
+                
+                quantize_checkbox = gr.Checkbox(
+                    value=True,
+                    label="🗜️ Also export an int8 model (serve it as <backend>-int8)"
+                )
+                
+                with gr.Row():
+                    train_btn = gr.Button("🚀 Start Training", variant="primary")
+                    update_btn = gr.Button("🧩 Update Model")
+                
+                gr.Markdown("*Update Model* folds the examples above into the latest saved model in seconds, without retraining on the full corpus.")
+                
+                with gr.Accordion("🧹 Data Hygiene: near-duplicates and train/test leakage", open=False):
+                    hygiene_test_file = gr.File(
+                        label="Test set to check for leakage (optional)",
+                        file_types=[".json", ".jsonl", ".csv"]
+                    )
+                    
+                    hygiene_threshold = gr.Slider(
+                        minimum=0.5,
+                        maximum=1.0,
+                        value=DEFAULT_THRESHOLD,
+                        step=0.05,
+                        label="Similarity Threshold (Jaccard of character shingles)"
+                    )
+                    
+                    hygiene_btn = gr.Button("🔍 Check Duplicates & Leakage")
+            
+            with gr.Column():
+                training_progress = gr.Textbox(
+                    label="Training Progress",
+                    lines=8,
+                    placeholder="Training progress will appear here..."
+                )
+                
+                training_results = gr.Textbox(
+                    label="Training Results",
+                    lines=10,
+                    placeholder="Training results will appear here..."
+                )
+        
+        hygiene_summary = gr.Markdown()
+        
+        with gr.Row():
+            duplicates_table = gr.Dataframe(
+                label="Near-duplicate clusters (biggest first)",
+                interactive=False
+            )
+            
+            leakage_table = gr.Dataframe(
+                label="Test utterances leaking from the training set",
+                interactive=False
+            )
+        
+        hygiene_exports = gr.File(
+            label="Deduplicated training set / leak-free test set",
+            file_count="multiple"
+        )
+        
+        gr.Markdown("#### 🗂️ Training Jobs")
+        jobs_table = gr.Dataframe(
+            value=list_training_jobs,
+            label="Background training jobs (newest first)",
+            interactive=False
+        )
+        refresh_jobs_btn = gr.Button("🔄 Refresh Jobs")
+        
+        train_btn.click(
+            fn=simulate_training,
+            inputs=[training_data_input, backend_select, epochs_slider, training_file_input, mode_select,
+                    batch_size_select, quantize_checkbox],
+            outputs=[training_progress, training_results]
+        ).then(
+            fn=list_training_jobs,
+            outputs=jobs_table
+        )
+        
+        update_btn.click(
+            fn=update_model,
+            inputs=[training_data_input, backend_select, training_file_input, quantize_checkbox],
+            outputs=[training_progress, training_results]
+        ).then(
+            fn=list_training_jobs,
+            outputs=jobs_table
+        )
+        
+        hygiene_btn.click(
+            fn=check_data_hygiene,
+            inputs=[training_data_input, training_file_input, hygiene_test_file, hygiene_threshold],
+            outputs=[hygiene_summary, duplicates_table, leakage_table, hygiene_exports]
+        )
+        
+        refresh_jobs_btn.click(
+            fn=list_training_jobs,
+            outputs=jobs_table
+        )
+
+def build_prediction_tab() -> None:
+    """Single-utterance intent prediction"""
+    with gr.Tab("🔍 Intent Prediction"):
+        gr.Markdown("### 🎯 Test Intent Classification")
+        
+        with gr.Row():
+            with gr.Column():
+                text_input = gr.Textbox(
+                    label="Enter text to classify",
+                    placeholder="I want to book a flight to London tomorrow",
+                    lines=3
+                )
+                
+                model_backend = gr.Dropdown(
+                    choices=SERVING_BACKENDS,
+                    value="huggingface",
+                    label="Model Backend"
+                )
+                
+                workspace_input = gr.Textbox(
+                    value=DEFAULT_WORKSPACE,
+                    label="Workspace",
+                    placeholder=DEFAULT_WORKSPACE
+                )
+                
+                similar_k = gr.Slider(
+                    minimum=1,
+                    maximum=20,
+                    value=5,
+                    step=1,
+                    label="Similar training examples to show"
+                )
+                
+                predict_btn = gr.Button("🔍 Predict Intent", variant="primary")
+                
+                # Example buttons
+                gr.Markdown("### 💡 Try these examples:")
+                examples = [
+                    "I want to book a flight to New York",
+                    "Cancel my reservation",
+                    "What's the weather like today?",
+                    "Book a table for 4 people",
+                    "I need help with my account"
+                ]
+                
+                for example in examples:
+                    gr.Button(example, size="sm").click(
+                        lambda x=example: x,
+                        outputs=text_input
+                    )
+            
+            with gr.Column():
+                prediction_results = gr.Textbox(
+                    label="Prediction Results",
+                    lines=8,
+                    placeholder="Prediction results will appear here..."
+                )
+                
+                entities_output = gr.Textbox(
+                    label="Detected Entities",
+                    lines=5,
+                    placeholder="Detected entities will appear here..."
+                )
+                
+                similar_summary = gr.Markdown()
+                similar_output = gr.Dataframe(label="🔎 Most Similar Training Examples")
+        
+        predict_btn.click(
+            fn=predict_intent,
+            inputs=[text_input, model_backend, workspace_input],
+            outputs=[prediction_results, entities_output]
+        ).then(
+            fn=similar_examples,
+            inputs=[text_input, model_backend, workspace_input, similar_k],
+            outputs=[similar_summary, similar_output]
+        )
+
+def build_batch_tab() -> None:
+    """Batch prediction over pasted or uploaded utterances"""
+    with gr.Tab("📦 Batch Prediction"):
+        gr.Markdown("### 📦 Classify Many Utterances at Once")
+        
+        with gr.Row():
+            with gr.Column():
+                batch_text_input = gr.Textbox(
+                    label="Utterances (one per line)",
+                    placeholder="I want to book a flight to London\nCancel my reservation",
+                    lines=8
+                )
+                
+                batch_file_input = gr.File(
+                    label="...or upload a JSONL / JSON / CSV / TXT file",
+                    file_types=[".jsonl", ".json", ".csv", ".txt"]
+                )
+                
+                batch_backend = gr.Dropdown(
+                    choices=SERVING_BACKENDS,
+                    value="huggingface",
+                    label="Model Backend"
+                )
+                
+                batch_top_k = gr.Slider(
+                    minimum=1,
+                    maximum=5,
+                    value=3,
+                    step=1,
+                    label="Top-k Intents"
+                )
+                
+                batch_btn = gr.Button("📦 Run Batch Prediction", variant="primary")
+            
+            with gr.Column():
+                batch_summary = gr.Markdown()
+                batch_download = gr.File(label="Download Predictions (CSV)")
+        
+        batch_results = gr.Dataframe(label="Predictions", wrap=True)
+        
+        batch_btn.click(
+            fn=run_batch_prediction,
+            inputs=[batch_text_input, batch_file_input, batch_backend, batch_top_k],
+            outputs=[batch_summary, batch_results, batch_download]
+        )
+
+def build_active_learning_tab() -> None:
+    """Uncertainty ranking of unlabeled utterances"""
+    with gr.Tab("🎯 Active Learning"):
+        gr.Markdown("### 🎯 Find the Utterances Worth Labeling Next")
+        
+        with gr.Row():
+            with gr.Column():
+                al_text_input = gr.Textbox(
+                    label="Unlabeled utterances (one per line)",
+                    placeholder="book something for tomorrow\nwhat about my account",
+                    lines=8
+                )
+                
+                al_file_input = gr.File(
+                    label="...or upload a JSONL / JSON / CSV / TXT file",
+                    file_types=[".jsonl", ".json", ".csv", ".txt"]
+                )
+                
+                al_backend = gr.Dropdown(
+                    choices=BACKENDS,
+                    value="huggingface",
+                    label="Model Backend"
+                )
+                
+                al_method = gr.Dropdown(
+                    choices=list(UNCERTAINTY_METHODS),
+                    value="entropy",
+                    label="Uncertainty Method"
+                )
+                
+                al_top_k = gr.Slider(
+                    minimum=5,
+                    maximum=500,
+                    value=50,
+                    step=5,
+                    label="Samples to Select"
+                )
+                
+                al_threshold = gr.Slider(
+                    minimum=0.1,
+                    maximum=0.95,
+                    value=0.7,
+                    step=0.05,
+                    label="Confidence Threshold"
+                )
+                
+                al_btn = gr.Button("🎯 Rank by Uncertainty", variant="primary")
+            
+            with gr.Column():
+                al_summary = gr.Markdown()
+                al_plot = gr.Plot(label="Uncertainty Distribution")
+        
+        al_results = gr.Dataframe(label="Most Uncertain Utterances", wrap=True)
+        
+        al_btn.click(
+            fn=run_active_learning,
+            inputs=[al_text_input, al_file_input, al_backend, al_method, al_top_k, al_threshold],
+            outputs=[al_summary, al_results, al_plot]
+        )
+
+def build_evaluation_tab() -> None:
+    """Evaluation report and confusion matrix"""
+    with gr.Tab("📊 Model Evaluation"):
+        gr.Markdown("### 📈 Evaluate Model Performance")
+        
+        with gr.Row():
+            with gr.Column():
+                test_data_input = gr.Textbox(
+                    label="Test Data (optional)",
+                    placeholder="Enter test data as a JSON array or JSON lines, or leave empty to use the default dataset",
+                    lines=5
+                )
+                
+                eval_backend = gr.Dropdown(
+                    choices=SERVING_BACKENDS,
+                    value="huggingface",
+                    label="Model Backend"
+                )
+                
+                evaluate_btn = gr.Button("📊 Evaluate Model", variant="primary")
+                
+                gr.Markdown("""
+                ### 📋 Evaluation Metrics
+                - **Accuracy**: Overall classification accuracy
+                - **Precision**: Ratio of correct positive predictions
+                - **Recall**: Ratio of correct predictions over actual positives
+                - **F1-Score**: Harmonic mean of precision and recall
+                """)
+            
+            with gr.Column():
+                evaluation_results = gr.Textbox(
+                    label="Evaluation Results",
+                    lines=15,
+                    placeholder="Evaluation results will appear here..."
+                )
+                
+                confusion_analysis = gr.Textbox(
+                    label="Confusion Matrix Analysis",
+                    lines=8,
+                    placeholder="Confusion matrix analysis will appear here..."
+                )
+                
+                confusion_plot = gr.Plot(label="Confusion Matrix")
+        
+        evaluate_btn.click(
+            fn=evaluate_model,
+            inputs=[test_data_input, eval_backend],
+            outputs=[evaluation_results, confusion_analysis, confusion_plot]
+        )
+
+def build_cross_validation_tab() -> None:
+    """K-fold hyperparameter sweep leaderboard"""
+    with gr.Tab("🧪 Cross-Validation"):
+        gr.Markdown("### 🧪 K-Fold Hyperparameter Sweep")
+        
+        with gr.Row():
+            with gr.Column():
+                cv_data_input = gr.Textbox(
+                    label="Training Data (optional)",
+                    placeholder="JSON array, JSON lines or CSV; leave empty to use a synthetic corpus",
+                    lines=5
+                )
+                
+                cv_file_input = gr.File(
+                    label="Or upload a training file",
+                    file_types=[".json", ".jsonl", ".csv"]
+                )
+                
+                cv_synthetic_size = gr.Slider(
+                    minimum=500, maximum=50000, value=5000, step=500,
+                    label="Synthetic Corpus Size (used without data)"
+                )
+                
+                cv_backends = gr.CheckboxGroup(
+                    choices=BACKENDS,
+                    value=BACKENDS,
+                    label="Backends"
+                )
+                
+                with gr.Row():
+                    cv_alphas = gr.Textbox(value="1e-4, 1e-3, 1e-2", label="L2 Alphas")
+                    cv_max_iters = gr.Textbox(value="100, 200", label="Max Iterations")
+                
+                with gr.Row():
+                    cv_folds = gr.Slider(minimum=2, maximum=10, value=5, step=1, label="Folds")
+                    cv_workers = gr.Slider(minimum=1, maximum=max(os.cpu_count() or 1, 16), step=1,
+                                           value=os.cpu_count() or 1, label="Worker Processes")
+                
+                with gr.Row():
+                    cv_search = gr.Radio(choices=["Grid", "Random"], value="Grid", label="Search")
+                    cv_n_configs = gr.Slider(minimum=1, maximum=50, value=10, step=1,
+                                             label="Random Configurations")
+                
+                cv_btn = gr.Button("🧪 Run Sweep", variant="primary")
+            
+            with gr.Column():
+                cv_summary = gr.Markdown()
+                cv_leaderboard = gr.Dataframe(label="Leaderboard (best macro F1 first)")
+        
+        cv_btn.click(
+            fn=run_cross_validation,
+            inputs=[cv_data_input, cv_file_input, cv_synthetic_size, cv_backends, cv_alphas,
+                    cv_max_iters, cv_folds, cv_search, cv_n_configs, cv_workers],
+            outputs=[cv_summary, cv_leaderboard]
+        )
+
+def build_performance_tab() -> None:
+    """Stage latency histograms and Prometheus export"""
+    with gr.Tab("⚡ Performance"):
+        gr.Markdown("### ⚡ Where the Milliseconds Go")
+        
+        with gr.Row():
+            perf_refresh_btn = gr.Button("🔄 Refresh", variant="primary")
+            perf_reset_btn = gr.Button("🧹 Reset Histograms")
+        
+        perf_summary = gr.Markdown()
+        perf_table = gr.Dataframe(label="Latency per Stage (ms)")
+        perf_plot = gr.Plot(label="Latency by Stage")
+        perf_prometheus = gr.Code(label="Prometheus Exposition", language=None)
+        
+        perf_refresh_btn.click(
+            fn=performance_report,
+            outputs=[perf_summary, perf_table, perf_plot, perf_prometheus],
+            api_name="performance"
+        )
+        
+        perf_reset_btn.click(
+            fn=reset_performance,
+            outputs=[perf_summary, perf_table, perf_plot, perf_prometheus]
+        )
+
+def build_api_docs_tab() -> None:
+    """REST API reference for the full application"""
+    with gr.Tab("📚 API Documentation"):
+        gr.Markdown("""
+        ### 🔗 REST API Endpoints
+        
+        The full application provides a comprehensive REST API:
+        
+        #### 🔐 Authentication
+        - `POST /api/auth/register` - User registration
+        - `POST /api/auth/login` - User login  
+        - `GET /api/auth/profile` - Get user profile
+        
+        #### 🤖 Training & Prediction
+        - `POST /api/training/upload-and-train` - Upload data and train model
+        - `POST /api/training/predict` - Predict intent for text
+        - `GET /api/training/models` - List all trained models
+        - `DELETE /api/training/model/:id` - Delete trained model
+        
+        #### 📊 Model Evaluation
+        - `POST /api/evaluation/evaluate` - Evaluate model performance
+        - `GET /api/evaluation/metrics/:modelId` - Get evaluation metrics
+        - `POST /api/evaluation/compare` - Compare multiple models
+        
+        #### 🏷️ Entity Management
+        - `POST /api/entities/annotate` - Annotate entities in text
+        - `GET /api/entities/types` - Get available entity types
+        - `POST /api/entities/train` - Train NER model
+        
+        #### 🎯 Active Learning
+        - `GET /api/active-learning/uncertain-samples` - Get uncertain samples
+        - `POST /api/active-learning/feedback` - Provide feedback
+        - `GET /api/active-learning/history` - Get learning history
+        
+        ### 📋 Authentication
+        All API requests require JWT authentication:
+        ```
+        Authorization: Bearer <your_jwt_token>
+        ```
+        
+        ### 📊 Response Format
+        ```json
+        {
+            "success": true,
+            "data": { ... },
+            "message": "Success message"
+        }
+        ```
+        
+        ### 🚀 Getting Started
+        1. Clone the repository: [GitHub Link](https://github.com/Amarjit99/Chatbot-NLU-Trainer--Evaluator)
+        2. Follow setup instructions in README.md
+        3. Use Docker for easy deployment: `docker-compose up -d`
+        4. Access the full application at `http://localhost`
+        """)
+
+# Tab builders in display order. NLU_GRADIO_TABS=prediction,batch starts a
+# worker with only those tabs, which is ready to serve in a fraction of the time.
+TABS = {
+    "overview": build_overview_tab,
+    "training": build_training_tab,
+    "prediction": build_prediction_tab,
+    "batch": build_batch_tab,
+    "active_learning": build_active_learning_tab,
+    "evaluation": build_evaluation_tab,
+    "cross_validation": build_cross_validation_tab,
+    "performance": build_performance_tab,
+    "api_docs": build_api_docs_tab,
+}
+
+def create_gradio_app(tabs: Optional[List[str]] = None):
+    """Create the main Gradio application with the named ``TABS`` (all by default)"""
+    
+    names = tabs or list(TABS)
+    unknown = [name for name in names if name not in TABS]
+    if unknown:
+        raise ValueError(f"Unknown tab(s) {', '.join(unknown)}; choose from {', '.join(TABS)}")
+    
+    # Map saved models now so the first prediction does not pay for loading
+    load_saved_engines()
     
     # Custom CSS for better styling
     custom_css = """
@@ -275,231 +1196,8 @@ def create_gradio_app():
         """)
         
         with gr.Tabs():
-            # Tab 1: Project Overview
-            with gr.Tab("🏠 Project Overview"):
-                gr.Markdown(get_project_info())
-                
-                with gr.Row():
-                    with gr.Column():
-                        gr.Markdown("""
-                        ### 🎯 Demo Features
-                        This Hugging Face Space demonstrates the core functionality of the full application:
-                        - **NLU Model Training** simulation
-                        - **Intent Prediction** with confidence scores
-                        - **Model Evaluation** with detailed metrics
-                        - **Interactive Testing** interface
-                        """)
-                    
-                    with gr.Column():
-                        gr.Markdown("""
-                        ### 🚀 Full Application
-                        The complete application includes:
-                        - Multi-user authentication system
-                        - Workspace management
-                        - Real-time model training
-                        - Entity annotation tools
-                        - Analytics dashboard
-                        - Production deployment with Docker
-                        """)
-            
-            # Tab 2: NLU Training Demo
-            with gr.Tab("🤖 NLU Training"):
-                gr.Markdown("### 🔧 Train Your NLU Model")
-                
-                with gr.Row():
-                    with gr.Column():
-                        training_data_input = gr.Textbox(
-                            label="Training Data (JSON format)",
-                            value=create_sample_data(),
-                            lines=10,
-                            placeholder="Enter your training data in JSON format..."
-                        )
-                        
-                        backend_select = gr.Dropdown(
-                            choices=["huggingface", "rasa", "spacy"],
-                            value="huggingface",
-                            label="Select NLU Backend"
-                        )
-                        
-                        epochs_slider = gr.Slider(
-                            minimum=1,
-                            maximum=10,
-                            value=5,
-                            step=1,
-                            label="Training Epochs"
-                        )
-                        
-                        train_btn = gr.Button("🚀 Start Training", variant="primary")
-                    
-                    with gr.Column():
-                        training_progress = gr.Textbox(
-                            label="Training Progress",
-                            lines=5,
-                            placeholder="Training progress will appear here..."
-                        )
-                        
-                        training_results = gr.Textbox(
-                            label="Training Results",
-                            lines=10,
-                            placeholder="Training results will appear here..."
-                        )
-                
-                train_btn.click(
-                    fn=simulate_training,
-                    inputs=[training_data_input, backend_select, epochs_slider],
-                    outputs=[training_progress, training_results]
-                )
-            
-            # Tab 3: Intent Prediction
-            with gr.Tab("🔍 Intent Prediction"):
-                gr.Markdown("### 🎯 Test Intent Classification")
-                
-                with gr.Row():
-                    with gr.Column():
-                        text_input = gr.Textbox(
-                            label="Enter text to classify",
-                            placeholder="I want to book a flight to London tomorrow",
-                            lines=3
-                        )
-                        
-                        model_backend = gr.Dropdown(
-                            choices=["huggingface", "rasa", "spacy"],
-                            value="huggingface",
-                            label="Model Backend"
-                        )
-                        
-                        predict_btn = gr.Button("🔍 Predict Intent", variant="primary")
-                        
-                        # Example buttons
-                        gr.Markdown("### 💡 Try these examples:")
-                        examples = [
-                            "I want to book a flight to New York",
-                            "Cancel my reservation",
-                            "What's the weather like today?",
-                            "Book a table for 4 people",
-                            "I need help with my account"
-                        ]
-                        
-                        for example in examples:
-                            gr.Button(example, size="sm").click(
-                                lambda x=example: x,
-                                outputs=text_input
-                            )
-                    
-                    with gr.Column():
-                        prediction_results = gr.Textbox(
-                            label="Prediction Results",
-                            lines=8,
-                            placeholder="Prediction results will appear here..."
-                        )
-                        
-                        entities_output = gr.Textbox(
-                            label="Detected Entities",
-                            lines=5,
-                            placeholder="Detected entities will appear here..."
-                        )
-                
-                predict_btn.click(
-                    fn=predict_intent,
-                    inputs=[text_input, model_backend],
-                    outputs=[prediction_results, entities_output]
-                )
-            
-            # Tab 4: Model Evaluation
-            with gr.Tab("📊 Model Evaluation"):
-                gr.Markdown("### 📈 Evaluate Model Performance")
-                
-                with gr.Row():
-                    with gr.Column():
-                        test_data_input = gr.Textbox(
-                            label="Test Data (optional)",
-                            placeholder="Enter test data or use default dataset",
-                            lines=5
-                        )
-                        
-                        evaluate_btn = gr.Button("📊 Evaluate Model", variant="primary")
-                        
-                        gr.Markdown("""
-                        ### 📋 Evaluation Metrics
-                        - **Accuracy**: Overall classification accuracy
-                        - **Precision**: Ratio of correct positive predictions
-                        - **Recall**: Ratio of correct predictions over actual positives
-                        - **F1-Score**: Harmonic mean of precision and recall
-                        """)
-                    
-                    with gr.Column():
-                        evaluation_results = gr.Textbox(
-                            label="Evaluation Results",
-                            lines=15,
-                            placeholder="Evaluation results will appear here..."
-                        )
-                        
-                        confusion_analysis = gr.Textbox(
-                            label="Confusion Matrix Analysis",
-                            lines=8,
-                            placeholder="Confusion matrix analysis will appear here..."
-                        )
-                
-                evaluate_btn.click(
-                    fn=evaluate_model,
-                    inputs=[test_data_input],
-                    outputs=[evaluation_results, confusion_analysis]
-                )
-            
-            # Tab 5: API Documentation
-            with gr.Tab("📚 API Documentation"):
-                gr.Markdown("""
-                ### 🔗 REST API Endpoints
-                
-                The full application provides a comprehensive REST API:
-                
-                #### 🔐 Authentication
-                - `POST /api/auth/register` - User registration
-                - `POST /api/auth/login` - User login  
-                - `GET /api/auth/profile` - Get user profile
-                
-                #### 🤖 Training & Prediction
-                - `POST /api/training/upload-and-train` - Upload data and train model
-                - `POST /api/training/predict` - Predict intent for text
-                - `GET /api/training/models` - List all trained models
-                - `DELETE /api/training/model/:id` - Delete trained model
-                
-                #### 📊 Model Evaluation
-                - `POST /api/evaluation/evaluate` - Evaluate model performance
-                - `GET /api/evaluation/metrics/:modelId` - Get evaluation metrics
-                - `POST /api/evaluation/compare` - Compare multiple models
-                
-                #### 🏷️ Entity Management
-                - `POST /api/entities/annotate` - Annotate entities in text
-                - `GET /api/entities/types` - Get available entity types
-                - `POST /api/entities/train` - Train NER model
-                
-                #### 🎯 Active Learning
-                - `GET /api/active-learning/uncertain-samples` - Get uncertain samples
-                - `POST /api/active-learning/feedback` - Provide feedback
-                - `GET /api/active-learning/history` - Get learning history
-                
-                ### 📋 Authentication
-                All API requests require JWT authentication:
-                ```
-                Authorization: Bearer <your_jwt_token>
-                ```
-                
-                ### 📊 Response Format
-                ```json
-                {
-                    "success": true,
-                    "data": { ... },
-                    "message": "Success message"
-                }
-                ```
-                
-                ### 🚀 Getting Started
-                1. Clone the repository: [GitHub Link](https://github.com/Amarjit99/Chatbot-NLU-Trainer--Evaluator)
-                2. Follow setup instructions in README.md
-                3. Use Docker for easy deployment: `docker-compose up -d`
-                4. Access the full application at `http://localhost`
-                """)
+            for name in names:
+                TABS[name]()
         
         # Footer
         gr.HTML("""
@@ -517,7 +1215,8 @@ def create_gradio_app():
 
 # Launch the app
 if __name__ == "__main__":
-    app = create_gradio_app()
+    tabs = [name.strip() for name in os.environ.get("NLU_GRADIO_TABS", "").split(",") if name.strip()]
+    app = create_gradio_app(tabs or None)
     app.launch(
         server_name="0.0.0.0",
         server_port=7860,
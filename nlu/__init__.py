@@ -0,0 +1,61 @@
+"""
+NLU engine package
+==================
+
+In-process intent classification used by the Gradio and Streamlit apps.
+"""
+
+from .artifact import DEFAULT_WORKSPACE, ModelStore, check_name, load_engine, save_engine
+from .cache import PredictionCache, normalize_text
+from .classifier import QuantizedSoftmaxClassifier, SoftmaxClassifier, softmax
+from .dataset import NLUDataset
+from .engine import (BACKEND_PRESETS, UNKNOWN_INTENT, IntentEngine, batch_to_frame,
+                     build_entity_lexicon)
+from .entities import EntityExtractor
+from .events import EventAggregates, EventLog
+from .feature_cache import FeatureCache
+from .featurizer import FeaturizerConfig, HashingTfidfFeaturizer, tokenize
+from .ingest import IngestError, IngestReport, iter_batches, iter_examples
+from .metrics import classification_report, confusion_matrix, evaluate
+from .registry import ModelRegistry
+from .search import SearchIndexStore, SimilarityIndex
+from .telemetry import LATENCY, LatencyHistogram, LatencyRegistry
+
+__all__ = [
+    "BACKEND_PRESETS",
+    "DEFAULT_WORKSPACE",
+    "LATENCY",
+    "UNKNOWN_INTENT",
+    "EntityExtractor",
+    "EventAggregates",
+    "EventLog",
+    "FeatureCache",
+    "FeaturizerConfig",
+    "HashingTfidfFeaturizer",
+    "IngestError",
+    "IngestReport",
+    "IntentEngine",
+    "LatencyHistogram",
+    "LatencyRegistry",
+    "ModelRegistry",
+    "ModelStore",
+    "NLUDataset",
+    "PredictionCache",
+    "QuantizedSoftmaxClassifier",
+    "SearchIndexStore",
+    "SimilarityIndex",
+    "SoftmaxClassifier",
+    "batch_to_frame",
+    "build_entity_lexicon",
+    "check_name",
+    "classification_report",
+    "confusion_matrix",
+    "evaluate",
+    "iter_batches",
+    "iter_examples",
+    "load_engine",
+    "normalize_text",
+    "save_engine",
+    "softmax",
+    "tokenize",
+]
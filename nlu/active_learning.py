@@ -0,0 +1,179 @@
+"""
+Active learning
+===============
+
+Uncertainty sampling over unlabeled utterances. Every scorer takes the full
+``(n, k)`` probability matrix from a batch prediction and scores all rows in
+one pass, returning values in ``[0, 1]`` where higher means less certain:
+
+- ``entropy``: Shannon entropy normalized by ``log k``;
+- ``margin``: one minus the gap between the two most likely intents;
+- ``least_confidence``: one minus the top probability.
+
+``rank_uncertain`` streams a corpus through the engine in batches and keeps a
+running top-k with ``argpartition``. Memory stays bounded by the batch size,
+and ranking a large log never needs a full sort.
+"""
+
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .engine import UNKNOWN_INTENT, IntentEngine
+
+
+def _top_two(probs: np.ndarray):
+    """Column index of the best and second-best intent per row"""
+    k = probs.shape[1]
+    if k < 2:
+        zeros = np.zeros(len(probs), dtype=np.int64)
+        return zeros, zeros
+    top = np.argpartition(probs, k - 2, axis=1)[:, -2:]
+    values = np.take_along_axis(probs, top, axis=1)
+    first = values[:, 1] >= values[:, 0]
+    return np.where(first, top[:, 1], top[:, 0]), np.where(first, top[:, 0], top[:, 1])
+
+
+def entropy_scores(probs: np.ndarray) -> np.ndarray:
+    """Normalized entropy per row"""
+    k = probs.shape[1]
+    if k < 2:
+        return np.zeros(len(probs), dtype=np.float32)
+    # p * log(p) -> 0 as p -> 0; clipping avoids log(0) without a mask
+    logs = np.log(np.clip(probs, np.finfo(probs.dtype).tiny, None))
+    return np.clip(-np.einsum("ij,ij->i", probs, logs) / np.log(k), 0.0, 1.0).astype(np.float32)
+
+
+def margin_scores(probs: np.ndarray) -> np.ndarray:
+    """One minus the gap between the best and second-best intent"""
+    if probs.shape[1] < 2:
+        return np.zeros(len(probs), dtype=np.float32)
+    rows = np.arange(len(probs))
+    best, second = _top_two(probs)
+    return (1.0 - (probs[rows, best] - probs[rows, second])).astype(np.float32)
+
+
+def least_confidence_scores(probs: np.ndarray) -> np.ndarray:
+    """One minus the top probability"""
+    return (1.0 - probs.max(axis=1)).astype(np.float32)
+
+
+UNCERTAINTY_METHODS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "entropy": entropy_scores,
+    "margin": margin_scores,
+    "least_confidence": least_confidence_scores,
+}
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, highest first, without sorting everything"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def uncertainty_reasons(confidence: np.ndarray, scores: np.ndarray, gaps: np.ndarray,
+                        unknown: np.ndarray, min_gap: float = 0.2) -> np.ndarray:
+    """Human-readable reason per row, following the backend's active-learning service"""
+    return np.select(
+        [unknown, confidence < 0.3, confidence < 0.5, gaps < min_gap, scores > 0.7],
+        ["No known vocabulary", "Very low confidence", "Low confidence", "Ambiguous predictions",
+         "High uncertainty"],
+        default="Uncertain prediction",
+    )
+
+
+def rank_uncertain(engine: IntentEngine, texts: List[str], method: str = "entropy", top_k: int = 50,
+                   confidence_threshold: float = 0.7, min_gap: float = 0.2,
+                   batch_size: int = 8192) -> Dict:
+    """Score ``texts`` with ``engine`` and pick the ``top_k`` most uncertain
+
+    Utterances with no known features get the maximum score, since the model
+    has nothing to go on. Returns the selection as column arrays (``index``,
+    ``text``, ``intent``, ``confidence``, ``second_intent``, ``gap``,
+    ``score``, ``reason``) plus a ``summary`` over all rows.
+    """
+    if method not in UNCERTAINTY_METHODS:
+        raise ValueError(f"Unknown uncertainty method {method!r}; choose from {sorted(UNCERTAINTY_METHODS)}")
+    scorer = UNCERTAINTY_METHODS[method]
+    n = len(texts)
+    labels = np.array(list(engine.intents) + [UNKNOWN_INTENT], dtype=object)
+
+    # Running selection: candidate rows and their per-row details
+    keep_index = np.empty(0, dtype=np.int64)
+    keep: Dict[str, np.ndarray] = {}
+    histogram = np.zeros(10, dtype=np.int64)
+    confidence_sum = 0.0
+    flagged = low = high = 0
+
+    for start in range(0, n, batch_size):
+        X, probs = engine.predict_proba(texts[start:start + batch_size])
+        unknown = np.diff(X.indptr) == 0
+        scores = scorer(probs)
+        scores[unknown] = 1.0
+
+        rows = np.arange(len(probs))
+        best, second = _top_two(probs)
+        confidence = np.where(unknown, 0.0, probs[rows, best])
+        gaps = np.where(unknown, 0.0, probs[rows, best] - probs[rows, second])
+
+        confidence_sum += float(confidence.sum())
+        flagged += int(np.count_nonzero((confidence < confidence_threshold) | (scores > 0.5) | (gaps < min_gap)))
+        low += int(np.count_nonzero(confidence < 0.5))
+        high += int(np.count_nonzero(confidence > 0.8))
+        histogram += np.bincount(np.minimum((scores * 10).astype(np.int64), 9), minlength=10)
+
+        batch = {
+            "score": scores,
+            "intent": np.where(unknown, len(engine.intents), best),
+            "second_intent": second,
+            "confidence": confidence,
+            "gap": gaps,
+            "unknown": unknown,
+        }
+        # Merge this batch into the running top-k and shrink back to k rows
+        candidates = np.concatenate([keep_index, np.arange(start, start + len(scores))])
+        merged = {name: np.concatenate([keep[name], column]) if keep else column for name, column in batch.items()}
+        selected = top_k_indices(merged["score"], top_k)
+        keep_index = candidates[selected]
+        keep = {name: column[selected] for name, column in merged.items()}
+
+    if not keep:
+        keep = {name: np.empty(0) for name in ("score", "intent", "second_intent", "confidence", "gap")}
+        keep["unknown"] = np.empty(0, dtype=bool)
+    return {
+        "index": keep_index,
+        "text": [texts[i] for i in keep_index],
+        "intent": labels[keep["intent"].astype(np.int64)],
+        "confidence": keep["confidence"],
+        "second_intent": labels[keep["second_intent"].astype(np.int64)],
+        "gap": keep["gap"],
+        "score": keep["score"],
+        "reason": uncertainty_reasons(keep["confidence"], keep["score"], keep["gap"], keep["unknown"], min_gap),
+        "summary": {
+            "method": method,
+            "total": n,
+            "flagged": flagged,
+            "low_confidence": low,
+            "high_confidence": high,
+            "average_confidence": confidence_sum / n if n else 0.0,
+            "score_histogram": histogram,
+        },
+    }
+
+
+def uncertainty_to_frame(ranking: Dict):
+    """DataFrame view of a ``rank_uncertain`` selection for the UIs"""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "text": ranking["text"],
+        "predicted_intent": ranking["intent"],
+        "confidence": np.round(ranking["confidence"], 4),
+        "runner_up": ranking["second_intent"],
+        "gap": np.round(ranking["gap"], 4),
+        "uncertainty": np.round(ranking["score"], 4),
+        "reason": ranking["reason"],
+    })
@@ -0,0 +1,189 @@
+"""
+Model artifacts
+===============
+
+A trained ``IntentEngine`` is saved as a directory::
+
+    <root>/<workspace>/<backend>/v<N>/
+        manifest.json     format version, backend, intents, featurizer config, stats
+        entities.json     entity lexicon (value -> label)
+        coef.npy          (n_features, n_classes) float32 weights
+        intercept.npy     (n_classes,) float32 biases
+        idf.npy           (n_features,) float32 IDF weights
+        doc_freq.npy      (n_features,) int64 document frequencies
+
+An int8 model (``nlu.quantize``) stores ``coef_rows.npy`` (int32 feature
+ids), ``coef_q.npy`` (int8 weight rows) and ``coef_scale.npy`` (float32
+scale per row) in place of ``coef.npy``, and ``"quantization": "int8"``
+in the manifest's ``classifier`` entry. It has no ``doc_freq.npy``: the
+document frequencies only matter for updating a model, which int8 models
+do not support.
+
+Arrays are raw ``.npy`` files so loading memory-maps them instead of reading
+or unpickling: startup cost is independent of model size, and every process
+that maps the same version shares one copy of the weights via the page cache.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .classifier import QuantizedSoftmaxClassifier, SoftmaxClassifier
+from .engine import IntentEngine
+from .featurizer import FeaturizerConfig, HashingTfidfFeaturizer
+
+ARTIFACT_FORMAT = 1
+DEFAULT_MODEL_DIR = os.environ.get("NLU_MODEL_DIR", "nlu_models")
+DEFAULT_WORKSPACE = "default"
+
+_ARRAYS = ("coef", "intercept", "idf", "doc_freq")
+_QUANTIZED_ARRAYS = ("coef_rows", "coef_q", "coef_scale", "intercept", "idf")
+_VERSION_RE = re.compile(r"^v(\d+)$")
+# Workspace and backend names become path components, so no separators or dots
+_NAME_RE = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def check_name(name: str, kind: str = "workspace") -> str:
+    """Return ``name`` if it is safe to use as one directory name, else raise ``ValueError``"""
+    if not isinstance(name, str) or not _NAME_RE.fullmatch(name):
+        raise ValueError(f"Invalid {kind} name {name!r}: use only letters, digits, '_' and '-'")
+    return name
+
+
+def save_engine(engine: IntentEngine, path: str) -> str:
+    """Write ``engine`` to the artifact directory ``path`` atomically
+
+    Raises ``OSError`` if ``path`` already exists.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=parent)
+    try:
+        classifier = engine.classifier
+        quantized = isinstance(classifier, QuantizedSoftmaxClassifier)
+        if quantized:
+            arrays = {"coef_rows": classifier.rows, "coef_q": classifier.coef_q, "coef_scale": classifier.scales}
+        else:
+            arrays = {"coef": classifier.coef_}
+        arrays.update({"intercept": classifier.intercept_, "idf": engine.featurizer.idf})
+        if not quantized:
+            arrays["doc_freq"] = engine.featurizer.doc_freq
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "backend": engine.backend,
+            "intents": engine.intents,
+            "featurizer": engine.featurizer.config.to_dict(),
+            "n_docs": engine.featurizer.n_docs,
+            "classifier": {"alpha": classifier.alpha, "max_iter": classifier.max_iter, "tol": classifier.tol,
+                           "n_iter": classifier.n_iter_, "quantization": "int8" if quantized else None},
+            "training_stats": engine.training_stats,
+            "arrays": {name: {"dtype": str(a.dtype), "shape": list(a.shape)} for name, a in arrays.items()},
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        with open(os.path.join(staging, "entities.json"), "w", encoding="utf-8") as f:
+            json.dump(engine.entity_lexicon, f, ensure_ascii=False)
+        # rename() refuses to replace a non-empty directory, so an existing
+        # version is never overwritten by a concurrent writer
+        os.rename(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return path
+
+
+def load_engine(path: str, mmap: bool = True) -> IntentEngine:
+    """Load an artifact directory, memory-mapping its arrays by default"""
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported model artifact format {manifest.get('format')!r} in {path}")
+    with open(os.path.join(path, "entities.json"), encoding="utf-8") as f:
+        lexicon = json.load(f)
+    params = manifest["classifier"]
+    quantized = params.get("quantization") == "int8"
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+              for name in (_QUANTIZED_ARRAYS if quantized else _ARRAYS)}
+
+    featurizer = HashingTfidfFeaturizer(FeaturizerConfig.from_dict(manifest["featurizer"]))
+    featurizer.idf = arrays["idf"]
+    featurizer.doc_freq = arrays.get("doc_freq")
+    featurizer.n_docs = manifest["n_docs"]
+    if quantized:
+        # The row index is binary-searched on every batch, so it is read into memory
+        classifier = QuantizedSoftmaxClassifier(
+            np.asarray(arrays["coef_rows"]), arrays["coef_q"], np.asarray(arrays["coef_scale"]),
+            np.asarray(arrays["intercept"]), featurizer.config.n_features, params["alpha"], params["max_iter"],
+            params["tol"], params["n_iter"])
+    else:
+        classifier = SoftmaxClassifier(alpha=params["alpha"], max_iter=params["max_iter"], tol=params["tol"])
+        classifier.coef_ = arrays["coef"]
+        classifier.intercept_ = np.asarray(arrays["intercept"])
+        classifier.n_iter_ = params["n_iter"]
+
+    engine = IntentEngine(featurizer, classifier, manifest["intents"], lexicon, manifest["backend"])
+    engine.training_stats = manifest.get("training_stats", {})
+    engine.version = os.path.basename(os.path.normpath(path))
+    return engine
+
+
+class ModelStore:
+    """Versioned artifact directories laid out as ``<root>/<workspace>/<backend>/v<N>``"""
+
+    def __init__(self, root: str = DEFAULT_MODEL_DIR):
+        self.root = root
+
+    def _dir(self, workspace: str, backend: str) -> str:
+        return os.path.join(self.root, check_name(workspace), check_name(backend, "backend"))
+
+    def versions(self, backend: str, workspace: str = DEFAULT_WORKSPACE) -> List[str]:
+        """Saved versions, oldest first"""
+        try:
+            names = os.listdir(self._dir(workspace, backend))
+        except FileNotFoundError:
+            return []
+        numbered = [(int(m.group(1)), name) for name in names if (m := _VERSION_RE.match(name))]
+        return [name for _, name in sorted(numbered)]
+
+    def save(self, engine: IntentEngine, workspace: str = DEFAULT_WORKSPACE) -> str:
+        """Save ``engine`` as the next version and return that version"""
+        while True:
+            existing = self.versions(engine.backend, workspace)
+            version = f"v{int(existing[-1][1:]) + 1 if existing else 1}"
+            path = os.path.join(self._dir(workspace, engine.backend), version)
+            try:
+                save_engine(engine, path)
+                break
+            except OSError:
+                # Another process claimed this version number first; take the next one
+                if not os.path.isdir(path):
+                    raise
+        engine.workspace, engine.version = workspace, version
+        return version
+
+    def load(self, backend: str, version: Optional[str] = None, workspace: str = DEFAULT_WORKSPACE,
+             mmap: bool = True) -> Optional[IntentEngine]:
+        """Load ``version`` (the latest when omitted); ``None`` if nothing is saved"""
+        if version is None:
+            existing = self.versions(backend, workspace)
+            if not existing:
+                return None
+            version = existing[-1]
+        elif not _VERSION_RE.match(version):
+            raise ValueError(f"Invalid model version {version!r}")
+        engine = load_engine(os.path.join(self._dir(workspace, backend), version), mmap=mmap)
+        engine.workspace = workspace
+        return engine
+
+    def manifest(self, backend: str, version: str, workspace: str = DEFAULT_WORKSPACE) -> Dict:
+        with open(os.path.join(self._dir(workspace, backend), version, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
@@ -0,0 +1,130 @@
+"""
+Micro-batching
+==============
+
+Scoring 64 utterances in one ``predict_batch`` call costs little more than
+scoring one, because the work is a single sparse matrix product.
+``MicroBatcher`` exploits that for servers handling many concurrent single
+requests. Each ``await batcher.predict(text)`` joins a queue. A worker task
+takes the first waiting request, keeps collecting for up to ``max_wait_ms``
+or until ``max_batch`` requests are waiting, and scores them all in one
+vectorized pass on an executor thread.
+
+Requests that arrive while a batch is being scored simply wait for the next
+one, so batches grow with load. Throughput rises with concurrency while an
+idle server adds at most ``max_wait_ms`` to a lone request.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .engine import IntentEngine
+from .telemetry import LATENCY
+
+
+def score_batch(engine: IntentEngine, texts: List[str]) -> List[Dict]:
+    """``engine.predict``-shaped results (minus timings) for many texts from one matrix pass"""
+    result = engine.predict_batch(texts, top_k=len(engine.intents))
+    intents, confidences = result["intent"].tolist(), result["confidence"].tolist()
+    top_intents, top_confidences = result["top_intents"].tolist(), result["top_confidences"].tolist()
+    return [
+        {
+            "text": text,
+            "intent": intents[i],
+            "confidence": confidences[i],
+            "ranking": [{"intent": intent, "confidence": confidence}
+                        for intent, confidence in zip(top_intents[i], top_confidences[i])],
+            "entities": engine.extract_entities(text),
+        }
+        for i, text in enumerate(texts)
+    ]
+
+
+class MicroBatcher:
+    """Coalesces concurrent single predictions for one model into vectorized batches"""
+
+    def __init__(self, resolve: Callable[[], IntentEngine], max_batch: int = 64, max_wait_ms: float = 2.0,
+                 executor: Optional[Executor] = None):
+        # Called per batch, so a newly installed model is picked up without restarting
+        self.resolve = resolve
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def predict(self, text: str) -> Dict:
+        """Classify ``text`` as part of the next batch"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, time.perf_counter_ns(), future))
+        return await future
+
+    async def _collect(self) -> List:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (e.g. client disconnects) need no scoring
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+            started = time.perf_counter_ns()
+            LATENCY.histogram("batch_queue").record_many(np.array([started - item[1] for item in batch]))
+            texts = [item[0] for item in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, lambda: score_batch(self.resolve(), texts))
+            except Exception as exc:
+                # Fail every waiting caller rather than the worker
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
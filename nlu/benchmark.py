@@ -0,0 +1,285 @@
+"""
+Benchmarks
+==========
+
+Measures the hot paths of the NLU engine on synthetic corpora shaped like
+``SAMPLE_TRAINING_DATA``. The metrics are training throughput, single
+prediction latency percentiles, batch throughput, evaluation time and peak
+RSS. Results are written as JSON and compared against a stored baseline.
+
+Each corpus size runs in a fresh worker process, so peak RSS belongs to that
+size alone::
+
+    python -m nlu.benchmark --sizes 1k,100k,1m --output results.json
+    python -m nlu.benchmark --baseline benchmarks/baseline.json       # gate
+    python -m nlu.benchmark --save-baseline benchmarks/baseline.json  # refresh
+
+The command exits with status 1 when any metric regresses past the tolerance.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .dataset import NLUDataset
+from .engine import IntentEngine
+from .metrics import evaluate
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = "1k,100k,1m"
+DEFAULT_TOLERANCE = 0.25
+# Accuracy is gated on an absolute drop; timing noise does not apply to it
+ACCURACY_TOLERANCE = 0.02
+
+# Metric name -> True when larger is better
+METRICS = {
+    "train_seconds": False,
+    "train_samples_per_second": True,
+    "predict_p50_ms": False,
+    "predict_p95_ms": False,
+    "predict_p99_ms": False,
+    "batch_utterances_per_second": True,
+    "evaluate_seconds": False,
+    "accuracy": True,
+    "peak_rss_mb": False,
+}
+
+_TEMPLATES = {
+    "book_flight": ["I want to book a flight to {city}", "fly me to {city} {time}",
+                    "find flights from {city} to {city2}", "book a plane ticket to {city} for {number} people"],
+    "cancel_booking": ["cancel my reservation", "please cancel the booking for {time}",
+                       "I need to cancel my flight to {city}", "drop my table reservation"],
+    "weather_query": ["what's the weather like {time}", "is it going to rain in {city} {time}",
+                      "weather forecast for {city}", "how hot will it be {time}"],
+    "book_table": ["book a table for {number} people", "reserve a table for {number} {time}",
+                   "get me a table in {city} for {number}", "dinner reservation for {number} at {time}"],
+    "help_request": ["I need help with my account", "how do I reset my password",
+                     "can someone help me {time}", "my account is locked"],
+}
+# Phrasings real users send for several intents; no model can get all of them right
+_SHARED_TEMPLATES = {
+    "I need to change my booking for {time}": ("book_flight", "book_table", "cancel_booking"),
+    "what about {city} {time}": ("book_flight", "weather_query"),
+    "can you help me with my reservation": ("cancel_booking", "help_request"),
+}
+_INTENT_TEMPLATES = {
+    intent: templates + [t for t, owners in _SHARED_TEMPLATES.items() if intent in owners]
+    for intent, templates in _TEMPLATES.items()
+}
+_SLOTS = {
+    "city": ("destination", ["New York", "London", "Paris", "Tokyo", "Berlin", "Madrid", "Sydney", "Toronto"]),
+    "city2": ("origin", ["Boston", "Dublin", "Rome", "Oslo", "Lisbon", "Seoul"]),
+    "time": ("time", ["today", "tomorrow", "tonight", "next week", "this weekend", "on Monday"]),
+    "number": ("number", ["2", "3", "4", "5", "6", "8", "10"]),
+}
+# Filler tokens give large corpora a realistically long vocabulary tail
+_FILLER_VOCAB = 50_000
+# Share of utterances relabelled with a random intent, like annotation mistakes
+DEFAULT_LABEL_NOISE = 0.02
+
+
+def parse_size(size: str) -> int:
+    """``"100k"`` -> 100000, ``"1m"`` -> 1000000"""
+    size = size.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(size[-1:], 1)
+    return int(float(size.rstrip("km")) * scale)
+
+
+def synthetic_examples(n: int, seed: int = 0, label_noise: float = DEFAULT_LABEL_NOISE) -> Iterator[Dict]:
+    """Yield ``n`` labelled utterances with entity spans in the sample-data schema
+
+    Some phrasings are shared between intents and ``label_noise`` of the
+    labels are drawn at random, so accuracy stays below 1.0 and a weaker
+    model shows up in the benchmark.
+    """
+    rng = np.random.default_rng(seed)
+    intents = sorted(_TEMPLATES)
+    intent_ids = rng.integers(len(intents), size=n)
+    template_ids = rng.integers(1 << 30, size=n)
+    slot_ids = rng.integers(1 << 30, size=(n, len(_SLOTS)))
+    filler_counts = rng.integers(0, 3, size=n)
+    fillers = rng.integers(_FILLER_VOCAB, size=(n, 2))
+    noisy = rng.random(n) < label_noise
+    noise_ids = rng.integers(len(intents), size=n)
+
+    for i in range(n):
+        intent = intents[intent_ids[i]]
+        templates = _INTENT_TEMPLATES[intent]
+        text = templates[template_ids[i] % len(templates)]
+        entities = []
+        for j, (slot, (label, values)) in enumerate(_SLOTS.items()):
+            marker = "{" + slot + "}"
+            if marker in text:
+                value = values[slot_ids[i, j] % len(values)]
+                start = text.index(marker)
+                text = text.replace(marker, value, 1)
+                entities.append({"entity": label, "value": value, "start": start, "end": start + len(value)})
+        if filler_counts[i]:
+            text += " " + " ".join(f"w{np.base_repr(int(w), 36).lower()}" for w in fillers[i, :filler_counts[i]])
+        if noisy[i]:
+            intent = intents[noise_ids[i]]
+        yield {"text": text, "intent": intent, "entities": entities}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    # ru_maxrss survives the fork + exec that starts a spawned worker, so it
+    # is at least the parent's RSS; VmHWM covers only this process image
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def run_size(n: int, backend: str = "huggingface", seed: int = 0, latency_samples: int = 2000,
+             batch_rows: int = 100_000, eval_rows: int = 100_000) -> Dict:
+    """Benchmark one corpus size in the current process"""
+    train = NLUDataset.from_examples(synthetic_examples(n, seed))
+    test = NLUDataset.from_examples(synthetic_examples(min(eval_rows, max(n // 5, 1)), seed + 1))
+
+    started = time.perf_counter()
+    engine = IntentEngine.train(train, backend=backend)
+    train_seconds = time.perf_counter() - started
+
+    texts = test.texts()
+    for text in texts[:50]:
+        engine.predict(text)
+    latencies = np.empty(latency_samples)
+    for i in range(latency_samples):
+        text = texts[i % len(texts)]
+        started = time.perf_counter()
+        engine.predict(text)
+        latencies[i] = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+
+    batch = (texts * (batch_rows // len(texts) + 1))[:batch_rows]
+    started = time.perf_counter()
+    for start in range(0, len(batch), 8192):
+        engine.predict_batch(batch[start:start + 8192])
+    batch_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    report = evaluate(engine, test)
+    evaluate_seconds = time.perf_counter() - started
+
+    return {
+        "utterances": n,
+        "backend": backend,
+        "train_seconds": train_seconds,
+        "train_samples_per_second": n / train_seconds,
+        "predict_p50_ms": float(p50),
+        "predict_p95_ms": float(p95),
+        "predict_p99_ms": float(p99),
+        "batch_utterances_per_second": len(batch) / batch_seconds,
+        "evaluate_seconds": evaluate_seconds,
+        "accuracy": report["accuracy"],
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(sizes: List[str], backend: str = "huggingface", seed: int = 0,
+                   log=print) -> Dict:
+    """Run every size in its own spawned process and collect the results"""
+    results = {}
+    ctx = mp.get_context("spawn")
+    for size in sizes:
+        log(f"Benchmarking {size} utterances ({backend})...")
+        with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+            results[size] = pool.submit(run_size, parse_size(size), backend, seed).result()
+        log("  " + ", ".join(f"{k}={v:.4g}" for k, v in results[size].items() if isinstance(v, float)))
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+    """Per-metric comparison rows; ``regressed`` marks changes worse than ``tolerance``"""
+    rows = []
+    for size, metrics in current["results"].items():
+        reference = baseline.get("results", {}).get(size)
+        if not reference:
+            continue
+        for name, higher_is_better in METRICS.items():
+            new, old = metrics.get(name), reference.get(name)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            if name == "accuracy":
+                regressed = old - new > ACCURACY_TOLERANCE
+            else:
+                regressed = (-change if higher_is_better else change) > tolerance
+            rows.append({"size": size, "metric": name, "baseline": old, "current": new,
+                         "change": change, "regressed": regressed})
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'size':>6}  {'metric':<28} {'baseline':>12} {'current':>12} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        lines.append(f"{row['size']:>6}  {row['metric']:<28} {row['baseline']:>12.4g} {row['current']:>12.4g} "
+                     f"{row['change']:>+7.1%}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the NLU engine hot paths")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated corpus sizes, e.g. 1k,100k,1m")
+    parser.add_argument("--backend", default="huggingface", help="featurizer preset to benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON and fail on regressions")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before a metric counts as regressed")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks([s for s in args.sizes.split(",") if s.strip()], args.backend, args.seed)
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row["regressed"]]
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Prediction cache
+================
+
+Chat traffic repeats heavily (greetings, "cancel my reservation", menu
+clicks), so ``PredictionCache`` keeps a bounded LRU of classification results
+in front of ``IntentEngine.predict``.
+
+Entries are keyed on ``(backend, workspace/version, normalized text)``. The
+normalized text is NFKC-folded, lowercased and whitespace-collapsed. Keying
+on the version means a retrained or switched model never sees another
+model's entries. Old entries simply age out, and ``invalidate`` drops them
+eagerly when a backend's model is replaced.
+
+Only the intent / confidence / ranking part is cached. Entities carry
+character offsets into the caller's exact text, so they are re-extracted on
+every call.
+"""
+
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .engine import IntentEngine
+from .telemetry import LATENCY
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Per-entry bookkeeping (key tuple, OrderedDict node, timestamp) on top of the payload
+_ENTRY_OVERHEAD = 200
+
+
+def normalize_text(text: str) -> str:
+    """Canonical cache form of an utterance: NFKC, lowercase, single spaces"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+
+
+def model_key(engine: IntentEngine) -> Tuple[str, str]:
+    """Identity of the model behind ``engine`` for cache keys"""
+    # Saved versions are immutable, so reloaded copies of one version share entries
+    if engine.version is None:
+        return engine.backend, f"unsaved-{engine.token}"
+    return engine.backend, f"{engine.workspace}/{engine.version}"
+
+
+def _entry_size(text: str, value: Dict) -> int:
+    size = _ENTRY_OVERHEAD + sys.getsizeof(text) + sys.getsizeof(value)
+    for item in value["ranking"]:
+        size += sys.getsizeof(item) + sys.getsizeof(item["intent"])
+    return size
+
+
+class PredictionCache:
+    """Thread-safe LRU of predictions bounded by entry count, memory and age"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 << 20, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Dict, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop(self, key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.nbytes -= size
+
+    def get(self, engine: IntentEngine, text: str) -> Optional[Dict]:
+        """Cached classification of ``text`` by ``engine``, or ``None``"""
+        key = (*model_key(engine), normalize_text(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._pop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, engine: IntentEngine, text: str, value: Dict) -> None:
+        """Store a classification, evicting least recently used entries past the caps"""
+        key = (*model_key(engine), normalize_text(text))
+        size = _entry_size(key[2], value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def predict(self, engine: IntentEngine, text: str) -> Dict:
+        """``engine.predict(text)`` served from the cache when possible
+
+        Misses classify the normalized text, so a hit returns exactly what
+        a miss would have computed. The result carries a ``cached`` flag and
+        per-stage ``timings_ms``.
+        """
+        started = time.perf_counter_ns()
+        cached = self.get(engine, text)
+        hit = cached is not None
+        if hit:
+            elapsed = time.perf_counter_ns() - started
+            LATENCY.record("cache_hit", elapsed)
+            timings = {"cache": elapsed / 1e6}
+        else:
+            # Entities are extracted once below, from the caller's text
+            prediction = engine.classify(normalize_text(text))
+            cached = {k: prediction[k] for k in ("intent", "confidence", "ranking")}
+            self.put(engine, text, cached)
+            timings = prediction["timings_ms"]
+        entities_started = time.perf_counter_ns()
+        entities = engine.extract_entities(text)
+        timings["entities"] = (time.perf_counter_ns() - entities_started) / 1e6
+        return {"text": text, **cached, "entities": entities, "cached": hit, "timings_ms": timings}
+
+    def invalidate(self, backend: Optional[str] = None) -> int:
+        """Drop every entry (or only ``backend``'s) and return how many were removed"""
+        with self._lock:
+            keys = [key for key in self._entries if backend is None or key[0] == backend]
+            for key in keys:
+                self._pop(key)
+            return len(keys)
+
+    def stats(self) -> Dict:
+        """Counters plus current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+        }
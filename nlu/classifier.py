@@ -0,0 +1,222 @@
+"""
+Linear softmax classifier
+=========================
+
+Multinomial logistic regression over sparse feature rows. Weights are a dense
+C-ordered ``(n_features, n_classes)`` matrix so scoring a batch is a single
+sparse-dense matrix product that only touches the rows of the active features.
+
+``QuantizedSoftmaxClassifier`` is the serving-only int8 form of a fitted
+model. It keeps only the non-zero weight rows, each as int8 values with one
+float32 scale, and dequantizes just the rows a batch touches.
+"""
+
+from typing import Callable, Optional, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def softmax(scores: np.ndarray) -> np.ndarray:
+    """Row-wise softmax that is stable for large scores"""
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+class SoftmaxClassifier:
+    """L2-regularised multinomial logistic regression trained with L-BFGS"""
+
+    def __init__(self, alpha: float = 1e-3, max_iter: int = 200, tol: float = 1e-5):
+        self.alpha = alpha
+        self.max_iter = max_iter
+        self.tol = tol
+        self.coef_: Optional[np.ndarray] = None
+        self.intercept_: Optional[np.ndarray] = None
+        self.n_iter_ = 0
+
+    @property
+    def n_classes(self) -> int:
+        return 0 if self.coef_ is None else self.coef_.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.coef_.nbytes + self.intercept_.nbytes
+
+    def fit(self, X: sp.csr_matrix, y: np.ndarray, n_classes: int,
+            callback: Optional[Callable[[int, float], None]] = None) -> "SoftmaxClassifier":
+        """Fit weights for integer labels ``y`` in ``[0, n_classes)``
+
+        ``callback(iteration, loss)`` is called after every L-BFGS iteration
+        (one full pass over the data).
+        """
+        n_samples, n_features = X.shape
+        # Only columns that occur in the corpus can get non-zero weights, so the
+        # optimisation runs in that (much smaller) subspace.
+        active = np.unique(X.indices)
+        X_active = X[:, active].tocsr()
+        Y = np.zeros((n_samples, n_classes), dtype=np.float64)
+        Y[np.arange(n_samples), y] = 1.0
+        n_active = len(active)
+        last_loss = [0.0]
+
+        def objective(params: np.ndarray):
+            W = params[:n_active * n_classes].reshape(n_active, n_classes)
+            b = params[n_active * n_classes:]
+            P = softmax(X_active @ W + b)
+            loss = -np.log(P[Y > 0] + 1e-12).sum() / n_samples
+            loss += 0.5 * self.alpha * np.sum(W * W)
+            last_loss[0] = loss
+            G = (P - Y) / n_samples
+            grad_W = X_active.T @ G + self.alpha * W
+            return loss, np.concatenate([np.asarray(grad_W).ravel(), G.sum(axis=0)])
+
+        iteration = [0]
+
+        def on_iteration(_params: np.ndarray) -> None:
+            iteration[0] += 1
+            callback(iteration[0], float(last_loss[0]))
+
+        # Imported here: scipy.optimize costs about as much as the rest of the
+        # package to import, and processes that only serve predictions never need it
+        from scipy.optimize import minimize
+
+        x0 = np.zeros(n_active * n_classes + n_classes)
+        result = minimize(objective, x0, jac=True, method="L-BFGS-B",
+                          callback=on_iteration if callback else None,
+                          options={"maxiter": self.max_iter, "gtol": self.tol})
+        W = result.x[:n_active * n_classes].reshape(n_active, n_classes)
+        self.coef_ = np.zeros((n_features, n_classes), dtype=np.float32)
+        self.coef_[active] = W
+        self.intercept_ = result.x[n_active * n_classes:].astype(np.float32)
+        self.n_iter_ = int(result.nit)
+        return self
+
+    def partial_fit(self, X: sp.csr_matrix, y: np.ndarray, n_classes: int, anchor: Union[float, np.ndarray] = 1.0,
+                    intercept_anchor: float = 1.0,
+                    callback: Optional[Callable[[int, float], None]] = None) -> "SoftmaxClassifier":
+        """Warm-started update of the fitted weights from new rows only
+
+        Starts at the current weights; classes beyond the old model's get
+        zero columns. It minimises the new rows' mean loss plus a quadratic
+        penalty for moving away from the old weights:
+        ``anchor[j] / 2 * ||W[j] - W_old[j]||^2`` per feature ``j`` (scalar or
+        ``(n_features,)``) and ``intercept_anchor / 2 * ||b - b_old||^2``. The
+        penalty stands in for the data the model was fitted on. Only weights
+        of features present in ``X`` move, so the cost depends on the new
+        rows, not the corpus.
+        """
+        n_samples, n_features = X.shape
+        old_classes = self.n_classes
+        coef = np.zeros((n_features, n_classes), dtype=np.float32)
+        coef[:, :old_classes] = self.coef_
+        intercept = np.zeros(n_classes, dtype=np.float32)
+        intercept[:old_classes] = self.intercept_
+
+        active = np.unique(X.indices)
+        X_active = X[:, active].tocsr()
+        Y = np.zeros((n_samples, n_classes), dtype=np.float64)
+        Y[np.arange(n_samples), y] = 1.0
+        n_active = len(active)
+        x0 = np.concatenate([coef[active].astype(np.float64).ravel(), intercept.astype(np.float64)])
+        # Per-parameter penalty weights laid out like the parameter vector
+        weights = np.concatenate([
+            np.repeat(np.broadcast_to(np.asarray(anchor, dtype=np.float64), (n_features,))[active], n_classes),
+            np.full(n_classes, float(intercept_anchor)),
+        ])
+        last_loss = [0.0]
+
+        def objective(params: np.ndarray):
+            W = params[:n_active * n_classes].reshape(n_active, n_classes)
+            b = params[n_active * n_classes:]
+            P = softmax(X_active @ W + b)
+            delta = params - x0
+            loss = -np.log(P[Y > 0] + 1e-12).sum() / n_samples
+            loss += 0.5 * self.alpha * np.sum(W * W) + 0.5 * np.dot(weights * delta, delta)
+            last_loss[0] = loss
+            G = (P - Y) / n_samples
+            grad_W = X_active.T @ G + self.alpha * W
+            return loss, np.concatenate([np.asarray(grad_W).ravel(), G.sum(axis=0)]) + weights * delta
+
+        iteration = [0]
+
+        def on_iteration(_params: np.ndarray) -> None:
+            iteration[0] += 1
+            callback(iteration[0], float(last_loss[0]))
+
+        from scipy.optimize import minimize
+
+        result = minimize(objective, x0, jac=True, method="L-BFGS-B",
+                          callback=on_iteration if callback else None,
+                          options={"maxiter": self.max_iter, "gtol": self.tol})
+        coef[active] = result.x[:n_active * n_classes].reshape(n_active, n_classes)
+        self.coef_ = coef
+        self.intercept_ = result.x[n_active * n_classes:].astype(np.float32)
+        self.n_iter_ = int(result.nit)
+        return self
+
+    def decision_function(self, X: sp.csr_matrix) -> np.ndarray:
+        """Raw class scores for every row of ``X``"""
+        return np.asarray(X @ self.coef_) + self.intercept_
+
+    def predict_proba(self, X: sp.csr_matrix) -> np.ndarray:
+        """Class probabilities for every row of ``X``"""
+        return softmax(self.decision_function(X).astype(np.float64))
+
+
+class QuantizedSoftmaxClassifier:
+    """Int8 weights with a float32 scale per non-zero feature row, for serving only
+
+    Row ``j`` of the original weights is ``scales[k] * coef_q[k]`` where
+    ``rows[k] == j``. Rows that are all zero (hashed buckets no training
+    utterance used) are not stored.
+    """
+
+    def __init__(self, rows: np.ndarray, coef_q: np.ndarray, scales: np.ndarray, intercept: np.ndarray,
+                 n_features: int, alpha: float = 1e-3, max_iter: int = 200, tol: float = 1e-5, n_iter: int = 0):
+        self.rows = rows
+        self.coef_q = coef_q
+        self.scales = scales
+        self.intercept_ = intercept
+        self.n_features = n_features
+        self.alpha = alpha
+        self.max_iter = max_iter
+        self.tol = tol
+        self.n_iter_ = n_iter
+
+    @classmethod
+    def from_classifier(cls, classifier: SoftmaxClassifier) -> "QuantizedSoftmaxClassifier":
+        """Symmetric int8 quantization of a fitted classifier's weight rows"""
+        coef = np.asarray(classifier.coef_, dtype=np.float32)
+        peak = np.abs(coef).max(axis=1)
+        rows = np.flatnonzero(peak > 0).astype(np.int32)
+        scales = (peak[rows] / 127.0).astype(np.float32)
+        coef_q = np.rint(coef[rows] / scales[:, None]).clip(-127, 127).astype(np.int8)
+        return cls(rows, coef_q, scales, np.asarray(classifier.intercept_, dtype=np.float32), coef.shape[0],
+                   classifier.alpha, classifier.max_iter, classifier.tol, classifier.n_iter_)
+
+    @property
+    def n_classes(self) -> int:
+        return self.coef_q.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.coef_q.nbytes + self.scales.nbytes + self.intercept_.nbytes
+
+    def decision_function(self, X: sp.csr_matrix) -> np.ndarray:
+        """Raw class scores for every row of ``X``"""
+        if not len(self.rows):
+            return np.zeros((X.shape[0], self.n_classes)) + self.intercept_
+        positions = np.minimum(np.searchsorted(self.rows, X.indices), len(self.rows) - 1)
+        # Features with no stored row have zero weight
+        weights = np.where(self.rows[positions] == X.indices, X.data * self.scales[positions], 0.0)
+        contributions = self.coef_q[positions] * weights[:, None]
+        # Per-row sums of the non-zeros' contributions, as differences of one running sum
+        running = np.zeros((len(weights) + 1, self.n_classes))
+        np.cumsum(contributions, axis=0, out=running[1:])
+        return running[X.indptr[1:]] - running[X.indptr[:-1]] + self.intercept_
+
+    def predict_proba(self, X: sp.csr_matrix) -> np.ndarray:
+        """Class probabilities for every row of ``X``"""
+        return softmax(self.decision_function(X).astype(np.float64))
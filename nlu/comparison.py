@@ -0,0 +1,206 @@
+"""
+Backend comparison
+==================
+
+``compare_backends`` trains and evaluates every backend on the same
+stratified train / test split. For each one it measures what a deployment
+decision needs: training wall and CPU time, peak memory, artifact size on
+disk, single-utterance prediction latency, and held-out accuracy::
+
+    results = list(compare_backends(dataset))
+    rows = comparison_table(results, latency_slo_ms=5)
+
+    python -m nlu.comparison --size 20k --slo-ms 5
+
+Each backend trains in a fresh spawned worker process, so ``peak_rss_mb`` is
+that backend's own high-water mark. The figure includes the interpreter and
+its imports, which cost the same for every backend. Up to ``max_workers``
+backends run at once, and all of them read the corpus and the split from one
+``nlu.tuning.SharedCorpus`` block. Every backend featurizes from scratch, so
+no run benefits from a feature cache another one filled.
+
+CPU time does not depend on how busy the machine is, but wall time and
+latency do. Running more workers than there are cores therefore inflates
+both, which is why the default is one worker per core.
+
+``<backend>-int8`` entries train the full-precision model and then quantize
+it (``nlu.quantize``). Their training time includes the quantization step.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .artifact import save_engine
+from .benchmark import _peak_rss_mb, parse_size, synthetic_examples
+from .dataset import NLUDataset
+from .engine import BACKEND_PRESETS, IntentEngine
+from .metrics import evaluate
+from .quantize import base_backend, is_quantized, quantize_engine, quantized_backend
+from .tuning import SharedCorpus, attach_corpus, stratified_folds
+
+DEFAULT_TEST_SIZE = 0.2
+DEFAULT_LATENCY_SAMPLES = 1000
+
+
+def default_backends(quantized: bool = True) -> List[str]:
+    """Every backend preset, followed by its int8 variant when ``quantized``"""
+    backends = sorted(BACKEND_PRESETS)
+    return backends + [quantized_backend(backend) for backend in backends] if quantized else backends
+
+
+def holdout_split(intent_codes: np.ndarray, test_size: float = DEFAULT_TEST_SIZE, seed: int = 0) -> np.ndarray:
+    """1 for the stratified test rows, 0 for the training rows"""
+    if not 0 < test_size < 1:
+        raise ValueError("test_size must be between 0 and 1")
+    folds = max(2, round(1 / test_size))
+    return (stratified_folds(intent_codes, folds, seed) == 0).astype(np.int8)
+
+
+def _directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _run_backend(spec: Dict, backend: str, latency_samples: int) -> Dict:
+    _, dataset, split = attach_corpus(spec)
+    train = dataset.take(np.flatnonzero(split == 0))
+    test = dataset.take(np.flatnonzero(split == 1))
+    result = {"backend": backend, "train_utterances": len(train), "test_utterances": len(test)}
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        engine = IntentEngine.train(train, backend=base_backend(backend))
+    except ValueError as exc:
+        # e.g. the training split holds a single intent
+        return {**result, "error": str(exc)}
+    if is_quantized(backend):
+        engine = quantize_engine(engine)
+    train_seconds, train_cpu_seconds = time.perf_counter() - started, time.process_time() - cpu_started
+
+    started = time.perf_counter()
+    report = evaluate(engine, test)
+    evaluate_seconds = time.perf_counter() - started
+
+    texts = test.texts()
+    for text in texts[:50]:
+        engine.predict(text)
+    latencies = np.empty(latency_samples)
+    for i in range(latency_samples):
+        text = texts[i % len(texts)]
+        started = time.perf_counter()
+        engine.predict(text)
+        latencies[i] = time.perf_counter() - started
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+
+    with tempfile.TemporaryDirectory(prefix="nlu-compare-") as tmp:
+        disk_bytes = _directory_bytes(save_engine(engine, os.path.join(tmp, "model")))
+
+    return {
+        **result,
+        "accuracy": report["accuracy"],
+        "macro_f1": report["macro avg"]["f1-score"],
+        "train_seconds": train_seconds,
+        "train_cpu_seconds": train_cpu_seconds,
+        "evaluate_seconds": evaluate_seconds,
+        "predict_p50_ms": float(p50),
+        "predict_p95_ms": float(p95),
+        "peak_rss_mb": _peak_rss_mb(),
+        "model_disk_mb": disk_bytes / (1 << 20),
+    }
+
+
+def compare_backends(dataset: NLUDataset, backends: Optional[Iterable[str]] = None,
+                     test_size: float = DEFAULT_TEST_SIZE, seed: int = 0, max_workers: Optional[int] = None,
+                     latency_samples: int = DEFAULT_LATENCY_SAMPLES) -> Iterator[Dict]:
+    """Train and measure every backend on one split, yielding results as they finish
+
+    ``backends`` defaults to ``default_backends()``; ``max_workers`` defaults
+    to the number of cores.
+    """
+    backends = list(backends or default_backends())
+    split = holdout_split(dataset.intent_codes, test_size, seed)
+    if not split.any() or split.all():
+        raise ValueError(f"{len(dataset)} utterances are too few for a train / test split")
+    workers = min(max_workers or os.cpu_count() or 1, len(backends))
+    ctx = mp.get_context("spawn")
+    with SharedCorpus(dataset, split) as corpus:
+        queued, running = list(backends), {}
+        try:
+            while queued or running:
+                while queued and len(running) < workers:
+                    # One single-use process per backend keeps each peak RSS separate
+                    pool = ProcessPoolExecutor(1, mp_context=ctx)
+                    running[pool.submit(_run_backend, corpus.spec, queued.pop(0), latency_samples)] = pool
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future).shutdown()
+                    yield future.result()
+        finally:
+            # The caller may stop early; let started backends finish before the corpus is unlinked
+            for pool in running.values():
+                pool.shutdown(cancel_futures=True)
+
+
+def comparison_table(results: List[Dict], latency_slo_ms: Optional[float] = None) -> List[Dict]:
+    """Results ordered by macro F1 (ties to the lower p95), with ``meets_slo`` when an SLO is given"""
+    rows = []
+    for result in results:
+        row = dict(result)
+        if latency_slo_ms is not None:
+            row["meets_slo"] = "error" not in row and row["predict_p95_ms"] <= latency_slo_ms
+        rows.append(row)
+    rows.sort(key=lambda row: ("error" in row, -row.get("macro_f1", 0.0), row.get("predict_p95_ms", 0.0)))
+    return rows
+
+
+def format_table(rows: List[Dict]) -> str:
+    lines = [f"{'backend':<18} {'accuracy':>8} {'macro F1':>8} {'train s':>8} {'cpu s':>8} {'peak MB':>8} "
+             f"{'disk MB':>8} {'p95 ms':>8}"]
+    for row in rows:
+        if "error" in row:
+            lines.append(f"{row['backend']:<18} failed: {row['error']}")
+            continue
+        slo = {True: "  meets SLO", False: "  over SLO"}.get(row.get("meets_slo"), "")
+        peak = f"{row['peak_rss_mb']:>8.1f}" if row["peak_rss_mb"] is not None else f"{'n/a':>8}"
+        lines.append(f"{row['backend']:<18} {row['accuracy']:>8.2%} {row['macro_f1']:>8.2%} "
+                     f"{row['train_seconds']:>8.2f} {row['train_cpu_seconds']:>8.2f} {peak} "
+                     f"{row['model_disk_mb']:>8.2f} {row['predict_p95_ms']:>8.3f}{slo}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Train and measure every backend on the same split")
+    parser.add_argument("--data", metavar="PATH", help="labelled JSONL/JSON/CSV corpus (default: synthetic)")
+    parser.add_argument("--size", default="20k", help="synthetic corpus size when --data is not given")
+    parser.add_argument("--backends", help="comma-separated backends (default: every preset and its int8 variant)")
+    parser.add_argument("--test-size", type=float, default=DEFAULT_TEST_SIZE)
+    parser.add_argument("--workers", type=int, help="backends measured at once (default: one per core)")
+    parser.add_argument("--slo-ms", type=float, help="p95 single-prediction latency target")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.data:
+        from .ingest import detect_format, iter_examples
+
+        dataset = NLUDataset.from_examples(iter_examples(args.data, detect_format(args.data)))
+    else:
+        dataset = NLUDataset.from_examples(synthetic_examples(parse_size(args.size), args.seed))
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()] if args.backends else None
+    try:
+        results = list(compare_backends(dataset, backends, args.test_size, args.seed, args.workers))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(format_table(comparison_table(results, args.slo_ms)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
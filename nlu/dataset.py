@@ -0,0 +1,262 @@
+"""
+Columnar NLU dataset
+====================
+
+``NLUDataset`` keeps a training corpus in a handful of flat NumPy arrays
+instead of one dict per utterance:
+
+- all texts concatenated into one UTF-8 byte buffer, with an ``(n + 1,)``
+  offsets array marking where each utterance starts and ends;
+- intents as an ``int32`` code per row plus a small vocabulary of names;
+- entities as parallel ``start`` / ``end`` / ``label`` arrays, with an
+  ``(n + 1,)`` offsets array giving each row's range of entities.
+
+Contiguous slices are views over the same buffers, so ``dataset[a:b]`` copies
+nothing. Conversion to and from the ``load_sample_data`` dict format and
+pandas is provided for the UIs.
+"""
+
+import hashlib
+import json
+from array import array
+from typing import Dict, Iterable, Iterator, List, Union
+
+import numpy as np
+
+
+def _range_positions(offsets: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Flat positions covered by ``offsets[r]:offsets[r + 1]`` for each row ``r``"""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    # Each position is its start plus its rank inside the run it belongs to
+    run_starts = np.cumsum(lengths) - lengths
+    return np.repeat(starts - run_starts, lengths) + np.arange(total, dtype=np.int64)
+
+
+def _gather_ranges(values: np.ndarray, offsets: np.ndarray, rows: np.ndarray):
+    """Concatenate the ranges of ``values`` selected by ``rows`` and return new offsets"""
+    lengths = offsets[rows + 1] - offsets[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    return values[_range_positions(offsets, rows)], new_offsets
+
+
+class NLUDataset:
+    """Compact column store of labelled utterances and their entity spans"""
+
+    def __init__(self, text_buffer: np.ndarray, text_offsets: np.ndarray, intent_codes: np.ndarray,
+                 intent_vocab: List[str], entity_offsets: np.ndarray, entity_start: np.ndarray,
+                 entity_end: np.ndarray, entity_labels: np.ndarray, entity_vocab: List[str]):
+        self.text_buffer = text_buffer
+        self.text_offsets = text_offsets
+        self.intent_codes = intent_codes
+        self.intent_vocab = intent_vocab
+        self.entity_offsets = entity_offsets
+        self.entity_start = entity_start
+        self.entity_end = entity_end
+        self.entity_labels = entity_labels
+        self.entity_vocab = entity_vocab
+
+    # ------------------------------------------------------------------ building
+
+    @classmethod
+    def from_examples(cls, examples: Iterable[Dict]) -> "NLUDataset":
+        """Build a dataset from ``{"text", "intent", "entities"}`` dicts in one pass
+
+        ``examples`` may be any iterable, e.g. the ``nlu.ingest.iter_examples``
+        generator, so the dicts never need to exist all at once.
+        """
+        text_buffer = bytearray()
+        text_offsets = array("q", [0])
+        intent_codes = array("i")
+        entity_offsets = array("q", [0])
+        entity_start, entity_end, entity_labels = array("i"), array("i"), array("i")
+        intent_index: Dict[str, int] = {}
+        entity_index: Dict[str, int] = {}
+
+        for example in examples:
+            text = str(example["text"])
+            text_buffer += text.encode("utf-8")
+            text_offsets.append(len(text_buffer))
+            intent_codes.append(intent_index.setdefault(str(example["intent"]), len(intent_index)))
+            for entity in example.get("entities") or []:
+                label = str(entity.get("entity", entity.get("label")))
+                value = entity.get("value", entity.get("text"))
+                start, end = entity.get("start"), entity.get("end")
+                if start is None or end is None or (value is not None and text[start:end] != value):
+                    # Missing or stale offsets: anchor on the first occurrence of the value
+                    value = str(value or "")
+                    start = text.find(value)
+                    if not value or start == -1:
+                        continue
+                    end = start + len(value)
+                entity_start.append(int(start))
+                entity_end.append(int(end))
+                entity_labels.append(entity_index.setdefault(label, len(entity_index)))
+            entity_offsets.append(len(entity_start))
+
+        return cls(
+            np.frombuffer(bytes(text_buffer), dtype=np.uint8),
+            np.frombuffer(text_offsets, dtype=np.int64),
+            np.frombuffer(intent_codes, dtype=np.int32),
+            list(intent_index),
+            np.frombuffer(entity_offsets, dtype=np.int64),
+            np.frombuffer(entity_start, dtype=np.int32),
+            np.frombuffer(entity_end, dtype=np.int32),
+            np.frombuffer(entity_labels, dtype=np.int32),
+            list(entity_index),
+        )
+
+    @classmethod
+    def from_pandas(cls, df) -> "NLUDataset":
+        """Build a dataset from a DataFrame with ``text``, ``intent`` and optional ``entities``"""
+        def parse(entities) -> List[Dict]:
+            # CSV-loaded frames carry the entity list as a JSON string
+            if isinstance(entities, str):
+                entities = json.loads(entities) if entities.strip() else []
+            return entities if isinstance(entities, list) else []
+
+        entity_column = df["entities"] if "entities" in df.columns else [None] * len(df)
+        return cls.from_examples(
+            {"text": text, "intent": intent, "entities": parse(entities)}
+            for text, intent, entities in zip(df["text"], df["intent"], entity_column)
+        )
+
+    # ------------------------------------------------------------------ access
+
+    def __len__(self) -> int:
+        return len(self.intent_codes)
+
+    def text(self, i: int) -> str:
+        """Decoded text of row ``i``"""
+        return self.text_buffer[self.text_offsets[i]:self.text_offsets[i + 1]].tobytes().decode("utf-8")
+
+    def iter_texts(self) -> Iterator[str]:
+        """Decode the texts one at a time"""
+        buffer, offsets = self.text_buffer, self.text_offsets
+        for i in range(len(self)):
+            yield buffer[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def texts(self) -> List[str]:
+        return list(self.iter_texts())
+
+    def intents(self) -> np.ndarray:
+        """Intent name of every row"""
+        return np.asarray(self.intent_vocab, dtype=object)[self.intent_codes]
+
+    def entities(self, i: int) -> List[Dict]:
+        """Entities of row ``i`` in the ``load_sample_data`` format"""
+        text = self.text(i)
+        lo, hi = self.entity_offsets[i], self.entity_offsets[i + 1]
+        return [
+            {"entity": self.entity_vocab[label], "value": text[start:end], "start": int(start), "end": int(end)}
+            for start, end, label in zip(self.entity_start[lo:hi], self.entity_end[lo:hi], self.entity_labels[lo:hi])
+        ]
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict, "NLUDataset"]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return self.take(np.arange(start, stop, step))
+            stop = max(start, stop)
+            # Offsets are absolute positions in the shared buffers, so views suffice
+            return NLUDataset(
+                self.text_buffer, self.text_offsets[start:stop + 1], self.intent_codes[start:stop],
+                self.intent_vocab, self.entity_offsets[start:stop + 1], self.entity_start,
+                self.entity_end, self.entity_labels, self.entity_vocab,
+            )
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("NLUDataset index out of range")
+        return {"text": self.text(key), "intent": self.intent_vocab[self.intent_codes[key]],
+                "entities": self.entities(key)}
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, indices: np.ndarray) -> "NLUDataset":
+        """Gather the rows at ``indices`` into a new, self-contained dataset"""
+        indices = np.asarray(indices, dtype=np.int64)
+        text_buffer, text_offsets = _gather_ranges(self.text_buffer, self.text_offsets, indices)
+        _, entity_offsets = _gather_ranges(self.entity_start, self.entity_offsets, indices)
+        positions = _range_positions(self.entity_offsets, indices)
+        return NLUDataset(
+            text_buffer, text_offsets, self.intent_codes[indices], self.intent_vocab, entity_offsets,
+            self.entity_start[positions], self.entity_end[positions], self.entity_labels[positions],
+            self.entity_vocab,
+        )
+
+    def with_vocab(self, intent_vocab: List[str]) -> "NLUDataset":
+        """Re-code intents against ``intent_vocab`` (names missing from it are appended)"""
+        vocab = list(intent_vocab)
+        index = {name: i for i, name in enumerate(vocab)}
+        for name in self.intent_vocab:
+            if name not in index:
+                index[name] = len(vocab)
+                vocab.append(name)
+        remap = np.array([index[name] for name in self.intent_vocab], dtype=np.int32)
+        codes = remap[self.intent_codes] if len(remap) else self.intent_codes
+        return NLUDataset(self.text_buffer, self.text_offsets, codes, vocab, self.entity_offsets,
+                          self.entity_start, self.entity_end, self.entity_labels, self.entity_vocab)
+
+    def entity_lexicon(self) -> Dict[str, str]:
+        """Map lowercased entity values to their label, like ``build_entity_lexicon``"""
+        lexicon: Dict[str, str] = {}
+        for i in np.flatnonzero(np.diff(self.entity_offsets)):
+            for entity in self.entities(int(i)):
+                lexicon[entity["value"].lower()] = entity["entity"]
+        return lexicon
+
+    # ------------------------------------------------------------------ export
+
+    def to_records(self) -> List[Dict]:
+        """Convert back to the list-of-dicts format used by ``load_sample_data``"""
+        return list(self)
+
+    def to_pandas(self):
+        """DataFrame with ``text``, ``intent`` and ``entities`` columns"""
+        import pandas as pd
+
+        return pd.DataFrame({
+            "text": self.texts(),
+            "intent": self.intents(),
+            "entities": [self.entities(i) for i in range(len(self))],
+        })
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of array data referenced by this dataset (shared buffers counted in full)"""
+        return sum(a.nbytes for a in (
+            self.text_buffer, self.text_offsets, self.intent_codes, self.entity_offsets,
+            self.entity_start, self.entity_end, self.entity_labels,
+        ))
+
+    def intent_counts(self) -> Dict[str, int]:
+        """Number of rows per intent"""
+        counts = np.bincount(self.intent_codes, minlength=len(self.intent_vocab))
+        return {name: int(count) for name, count in zip(self.intent_vocab, counts) if count}
+
+    def content_hash(self) -> str:
+        """BLAKE2 digest of the texts, intents and entities
+
+        Equal content gives an equal hash however the dataset was built, so a
+        slice hashes like an identical standalone dataset.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps([self.intent_vocab, self.entity_vocab]).encode("utf-8"))
+        offsets = self.text_offsets
+        digest.update(np.ascontiguousarray(offsets - offsets[0], dtype=np.int64).tobytes())
+        digest.update(self.text_buffer[offsets[0]:offsets[-1]].tobytes())
+        digest.update(np.ascontiguousarray(self.intent_codes, dtype=np.int32).tobytes())
+        first, last = int(self.entity_offsets[0]), int(self.entity_offsets[-1])
+        digest.update(np.ascontiguousarray(self.entity_offsets - first, dtype=np.int64).tobytes())
+        for column in (self.entity_start, self.entity_end, self.entity_labels):
+            digest.update(np.ascontiguousarray(column[first:last], dtype=np.int64).tobytes())
+        return digest.hexdigest()
+
+    def __repr__(self) -> str:
+        return (f"NLUDataset({len(self)} utterances, {len(self.intent_vocab)} intents, "
+                f"{int(self.entity_offsets[-1] - self.entity_offsets[0])} entities)")
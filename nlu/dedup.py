@@ -0,0 +1,300 @@
+"""
+Near-duplicate and leakage detection
+====================================
+
+Corpora collect many copies of almost the same utterance ("Book a table for
+4 people" / "book a table for 4 ppl"). They inflate training time, and when
+they land on both sides of a train / test split they inflate the evaluation
+too. ``MinHashLSH`` finds them in one pass over the texts, without comparing
+every pair:
+
+1. Each utterance is normalised (``tokenize``, single spaces) and cut into
+   overlapping ``shingle_size``-byte shingles.
+2. Its MinHash signature keeps the minimum of ``num_perm`` universal hashes
+   over those shingles. Two signatures agree in a position with probability
+   equal to the Jaccard similarity of the shingle sets.
+3. Signatures are cut into ``bands`` bands. Utterances that share a band
+   land in the same bucket and become candidates. Each candidate pair is
+   verified against ``threshold`` with the signature estimate of its
+   similarity, and verified pairs are merged into clusters.
+
+The cost is O(bands * n log n) instead of O(n^2)::
+
+    report = find_duplicates(dataset)
+    clean = deduplicate(dataset, report)
+    leaks = find_leakage(train, test)
+    held_out = drop_leaked(test, leaks)
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .dataset import NLUDataset
+from .featurizer import tokenize
+from .ingest import iter_batches
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 32
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.7
+
+# Universal hashing modulo a Mersenne prime keeps a * x + b inside uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def shingle_text(text: str, shingle_size: int = DEFAULT_SHINGLE_SIZE) -> bytes:
+    """Normalised UTF-8 form of an utterance, padded so it has at least one shingle"""
+    return f" {' '.join(tokenize(text))} ".ljust(shingle_size).encode("utf-8")
+
+
+class MinHashLSH:
+    """MinHash signatures of shingled utterances, banded for locality-sensitive lookup"""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS,
+                 shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 0):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        if not 1 <= shingle_size <= 7:
+            raise ValueError("shingle_size must be between 1 and 7 bytes")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+        self._blocks: List[np.ndarray] = []
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+
+    def __len__(self) -> int:
+        return len(self.signature_matrix)
+
+    @property
+    def signature_matrix(self) -> np.ndarray:
+        """``(n, num_perm)`` signatures of every utterance added so far"""
+        if self._blocks:
+            self._signatures = np.vstack([self._signatures] + self._blocks)
+            self._blocks = []
+        return self._signatures
+
+    def _batch_signatures(self, texts: List[str]) -> np.ndarray:
+        k = self.shingle_size
+        encoded = [shingle_text(text, k) for text in texts]
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        lengths = np.array([len(e) for e in encoded], dtype=np.int64)
+        n_shingles = lengths - k + 1
+        first = np.cumsum(n_shingles) - n_shingles
+        # Byte offset of every shingle: its row's start plus its rank within the row
+        rows = np.repeat(np.arange(len(texts)), n_shingles)
+        positions = np.arange(n_shingles.sum()) - first[rows] + (np.cumsum(lengths) - lengths)[rows]
+        shingles = np.zeros(len(positions), dtype=np.uint64)
+        for offset in range(k):
+            shingles = (shingles << np.uint64(8)) | buffer[positions + offset]
+        shingles %= _PRIME
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) % _PRIME
+        return np.minimum.reduceat(hashed, first, axis=1).T.astype(np.uint32)
+
+    def signatures(self, texts: Iterable[str], batch_size: int = 1024) -> np.ndarray:
+        """MinHash signatures of ``texts`` without adding them to the index"""
+        blocks = [self._batch_signatures(batch) for batch in iter_batches(texts, batch_size)]
+        return np.vstack(blocks) if blocks else np.zeros((0, self.num_perm), dtype=np.uint32)
+
+    def add(self, texts: Iterable[str]) -> range:
+        """Index ``texts`` and return their row numbers"""
+        start = len(self)
+        self._blocks.append(self.signatures(texts))
+        return range(start, len(self))
+
+    def similarity(self, i: np.ndarray, j: np.ndarray, block: int = 1 << 16) -> np.ndarray:
+        """Estimated Jaccard similarity of rows ``i[k]`` and ``j[k]``"""
+        sig = self.signature_matrix
+        out = np.empty(len(i), dtype=np.float64)
+        for start in range(0, len(i), block):
+            stop = start + block
+            out[start:stop] = (sig[i[start:stop]] == sig[j[start:stop]]).mean(axis=1)
+        return out
+
+    def _band_candidates(self, band: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Link every row to the previous row and to the first row of its bucket:
+        # linear in the bucket size, however many identical utterances share it
+        rows_per_band = self.num_perm // self.bands
+        block = self.signature_matrix[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        key = block[:, 0].copy()
+        for column in range(1, rows_per_band):
+            key = key * _MIX + block[:, column]
+        order = np.argsort(key, kind="stable")
+        same = key[order][1:] == key[order][:-1]
+        starts = np.flatnonzero(np.r_[True, ~same])
+        first = order[np.repeat(starts, np.diff(np.r_[starts, len(order)]))]
+        linked = first != order
+        return np.r_[order[1:][same], order[linked]], np.r_[order[:-1][same], first[linked]]
+
+    def components(self, threshold: float = DEFAULT_THRESHOLD) -> np.ndarray:
+        """Cluster label per row: rows joined by pairs at least ``threshold`` similar share one"""
+        # Imported here like scipy.optimize: csgraph adds ~50ms to every app's cold start
+        from scipy.sparse.csgraph import connected_components
+
+        n = len(self)
+        labels = np.arange(n)
+        edges_i, edges_j = [], []
+        for band in range(self.bands):
+            i, j = self._band_candidates(band)
+            # Pairs already in one cluster need no verification
+            pending = labels[i] != labels[j]
+            i, j = i[pending], j[pending]
+            verified = self.similarity(i, j) >= threshold
+            if not verified.any():
+                continue
+            edges_i.append(i[verified])
+            edges_j.append(j[verified])
+            graph = sp.coo_matrix((np.ones(sum(len(e) for e in edges_i), dtype=np.int8),
+                                   (np.concatenate(edges_i), np.concatenate(edges_j))), shape=(n, n))
+            labels = connected_components(graph, directed=False)[1]
+        return labels
+
+
+def _clusters(labels: np.ndarray) -> List[np.ndarray]:
+    """Row groups sharing a label, biggest first, dropping singletons"""
+    order = np.argsort(labels, kind="stable")
+    starts = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1]])
+    groups = [group for group in np.split(order, starts[1:]) if len(group) > 1]
+    groups.sort(key=lambda group: (-len(group), group[0]))
+    return groups
+
+
+@dataclass
+class DuplicateReport:
+    """Near-duplicate clusters within one dataset"""
+    clusters: List[np.ndarray]
+    n_rows: int
+    threshold: float
+    # Clusters whose rows carry more than one intent
+    conflicts: int = 0
+
+    @property
+    def duplicate_rows(self) -> int:
+        """Rows ``deduplicate`` drops: all but the first of every cluster"""
+        return sum(len(cluster) - 1 for cluster in self.clusters)
+
+    def keep(self) -> np.ndarray:
+        """Row indices left after keeping the first row of every cluster"""
+        mask = np.ones(self.n_rows, dtype=bool)
+        for cluster in self.clusters:
+            mask[cluster[1:]] = False
+        return np.flatnonzero(mask)
+
+    def summary(self) -> str:
+        return (f"{len(self.clusters)} near-duplicate clusters cover {self.duplicate_rows + len(self.clusters)} of "
+                f"{self.n_rows} utterances; dropping {self.duplicate_rows} leaves {self.n_rows - self.duplicate_rows}"
+                f" ({self.conflicts} clusters mix intents)")
+
+    def to_frame(self, dataset: NLUDataset, top: int = 50, examples: int = 3):
+        """Table of the ``top`` biggest clusters with their intents and a few texts"""
+        import pandas as pd
+
+        rows = []
+        for number, cluster in enumerate(self.clusters[:top], 1):
+            intents = sorted({dataset.intent_vocab[code] for code in dataset.intent_codes[cluster]})
+            rows.append({"cluster": number, "size": len(cluster), "intents": ", ".join(intents),
+                         "examples": " | ".join(dataset.text(int(i)) for i in cluster[:examples])})
+        return pd.DataFrame(rows, columns=["cluster", "size", "intents", "examples"])
+
+
+@dataclass
+class LeakageReport:
+    """Test rows with a near-duplicate in the training set"""
+    test_rows: np.ndarray
+    # A training row in the same cluster as each leaked test row
+    train_rows: np.ndarray
+    similarity: np.ndarray
+    n_test: int
+    threshold: float
+
+    @property
+    def leak_rate(self) -> float:
+        return len(self.test_rows) / self.n_test if self.n_test else 0.0
+
+    def summary(self) -> str:
+        return (f"{len(self.test_rows)} of {self.n_test} test utterances ({self.leak_rate:.1%}) have a "
+                f"near-duplicate in the training set")
+
+    def to_frame(self, train: NLUDataset, test: NLUDataset, top: int = 50):
+        """Leaked test utterances next to their training-set match"""
+        import pandas as pd
+
+        test_intents, train_intents = test.intents(), train.intents()
+        rows = [{"test_row": int(t), "test_text": test.text(int(t)), "test_intent": test_intents[t],
+                 "train_text": train.text(int(r)), "train_intent": train_intents[r],
+                 "similarity": round(float(s), 3)}
+                for t, r, s in zip(self.test_rows[:top], self.train_rows[:top], self.similarity[:top])]
+        return pd.DataFrame(rows, columns=["test_row", "test_text", "test_intent", "train_text", "train_intent",
+                                           "similarity"])
+
+
+def find_duplicates(dataset: NLUDataset, threshold: float = DEFAULT_THRESHOLD, **index_options) -> DuplicateReport:
+    """Cluster the near-duplicate utterances of ``dataset``
+
+    ``index_options`` go to ``MinHashLSH``.
+    """
+    index = MinHashLSH(**index_options)
+    index.add(dataset.iter_texts())
+    clusters = _clusters(index.components(threshold))
+    conflicts = sum(1 for cluster in clusters if len(np.unique(dataset.intent_codes[cluster])) > 1)
+    return DuplicateReport(clusters, len(dataset), threshold, conflicts)
+
+
+def find_leakage(train: NLUDataset, test: NLUDataset, threshold: float = DEFAULT_THRESHOLD,
+                 **index_options) -> LeakageReport:
+    """Test rows that fall into a near-duplicate cluster with a training row
+
+    Both sets go into one index, so the check costs the same as
+    deduplicating their union.
+    """
+    index = MinHashLSH(**index_options)
+    index.add(train.iter_texts())
+    index.add(test.iter_texts())
+    labels = index.components(threshold)
+    n_train = len(train)
+    train_labels, first_train = np.unique(labels[:n_train], return_index=True)
+    match = np.full(labels.max() + 1 if len(labels) else 0, -1, dtype=np.int64)
+    match[train_labels] = first_train
+    matched = match[labels[n_train:]]
+    test_rows = np.flatnonzero(matched >= 0)
+    train_rows = matched[test_rows]
+    similarity = index.similarity(test_rows + n_train, train_rows)
+
+    # The cluster's first training row may only be similar through a chain;
+    # prefer the most similar training row a test row shares a bucket with
+    leaked = np.zeros(len(test), dtype=bool)
+    leaked[test_rows] = True
+    position = np.full(len(test), -1, dtype=np.int64)
+    position[test_rows] = np.arange(len(test_rows))
+    for band in range(index.bands):
+        i, j = index._band_candidates(band)
+        t, r = np.maximum(i, j) - n_train, np.minimum(i, j)
+        direct = (t >= 0) & (r < n_train)
+        t, r = t[direct], r[direct]
+        t, r = t[leaked[t]], r[leaked[t]]
+        candidate = index.similarity(t + n_train, r)
+        # Best candidate per test row wins; sorted so the last write is the best
+        order = np.argsort(candidate, kind="stable")
+        t, r, candidate = t[order], r[order], candidate[order]
+        better = candidate > similarity[position[t]]
+        similarity[position[t[better]]] = candidate[better]
+        train_rows[position[t[better]]] = r[better]
+    return LeakageReport(test_rows, train_rows, similarity, len(test), threshold)
+
+
+def deduplicate(dataset: NLUDataset, report: DuplicateReport) -> NLUDataset:
+    """``dataset`` with only the first utterance of every near-duplicate cluster"""
+    return dataset.take(report.keep())
+
+
+def drop_leaked(test: NLUDataset, report: LeakageReport) -> NLUDataset:
+    """``test`` without the utterances that leak from the training set"""
+    mask = np.ones(len(test), dtype=bool)
+    mask[report.test_rows] = False
+    return test.take(np.flatnonzero(mask))
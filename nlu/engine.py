@@ -0,0 +1,282 @@
+"""
+Intent engine
+=============
+
+Ties the hashed TF-IDF featurizer and the softmax classifier together and
+trains them from ``SAMPLE_TRAINING_DATA``-shaped examples::
+
+    [{"text": "...", "intent": "...", "entities": [{"entity": "...", "value": "..."}]}]
+"""
+
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from .classifier import QuantizedSoftmaxClassifier, SoftmaxClassifier
+from .dataset import NLUDataset
+from .entities import EntityExtractor
+from .featurizer import FeaturizerConfig, HashingTfidfFeaturizer
+from .telemetry import LATENCY
+
+UNKNOWN_INTENT = "unknown"
+
+# Feature space used for each backend offered in the UIs
+BACKEND_PRESETS: Dict[str, FeaturizerConfig] = {
+    "huggingface": FeaturizerConfig(word_ngrams=(1, 2), char_ngrams=(3, 5)),
+    "rasa": FeaturizerConfig(word_ngrams=(1, 2)),
+    "spacy": FeaturizerConfig(word_ngrams=(1, 1)),
+}
+
+
+def build_entity_lexicon(examples: List[Dict], lexicon: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Map lowercased annotated entity values to their entity label"""
+    lexicon = {} if lexicon is None else lexicon
+    for example in examples:
+        for entity in example.get("entities") or []:
+            value = entity.get("value", entity.get("text"))
+            label = entity.get("entity", entity.get("label"))
+            if value and label:
+                lexicon[str(value).lower()] = label
+    return lexicon
+
+
+def batch_to_frame(texts: List[str], result: Dict[str, np.ndarray]):
+    """Build the predictions table shown by the batch UIs from ``predict_batch`` output"""
+    import pandas as pd
+
+    alternatives = [
+        ", ".join(f"{intent} ({conf:.1%})" for intent, conf in zip(intents[1:], confs[1:]))
+        for intents, confs in zip(result["top_intents"], result["top_confidences"])
+    ]
+    return pd.DataFrame({
+        "text": list(texts),
+        "intent": result["intent"],
+        "confidence": result["confidence"].round(4),
+        "alternatives": alternatives,
+    })
+
+
+class IntentEngine:
+    """Trained featurizer + classifier pair with an entity lexicon"""
+
+    def __init__(self, featurizer: HashingTfidfFeaturizer,
+                 classifier: Union[SoftmaxClassifier, QuantizedSoftmaxClassifier],
+                 intents: List[str], entity_lexicon: Optional[Dict[str, str]] = None,
+                 backend: str = "rasa"):
+        self.featurizer = featurizer
+        self.classifier = classifier
+        self.intents = list(intents)
+        self.entity_lexicon = entity_lexicon or {}
+        self.backend = backend
+        self.training_stats: Dict = {}
+        # Artifact workspace / version once saved to / loaded from a ModelStore
+        self.workspace: Optional[str] = None
+        self.version: Optional[str] = None
+        # Unique for the life of the model, unlike id(), which is reused once it is collected
+        self.token = uuid.uuid4().hex
+
+    @property
+    def entity_lexicon(self) -> Dict[str, str]:
+        return self._entity_lexicon
+
+    @entity_lexicon.setter
+    def entity_lexicon(self, lexicon: Dict[str, str]) -> None:
+        self._entity_lexicon = lexicon
+        self._entity_extractor: Optional[EntityExtractor] = None
+
+    @classmethod
+    def train(cls, examples: Union[List[Dict], NLUDataset], backend: str = "rasa", alpha: float = 1e-3,
+              max_iter: int = 200, callback: Optional[Callable[[int, float], None]] = None,
+              feature_cache=None) -> "IntentEngine":
+        """Train a new engine from labelled example dicts or an ``NLUDataset``
+
+        ``callback(iteration, loss)`` reports optimiser progress. With a
+        ``nlu.feature_cache.FeatureCache``, an unchanged corpus skips
+        tokenizing and hashing.
+        """
+        started = time.perf_counter()
+        dataset = examples if isinstance(examples, NLUDataset) else NLUDataset.from_examples(examples)
+        if not len(dataset):
+            raise ValueError("No training examples provided")
+        # A slice may not use every intent in the shared vocabulary
+        present = np.unique(dataset.intent_codes)
+        if len(present) < 2:
+            raise ValueError("At least two different intents are needed to train a classifier")
+        intents = sorted(dataset.intent_vocab[code] for code in present)
+        remap = np.full(len(dataset.intent_vocab), -1, dtype=np.int64)
+        remap[[dataset.intent_vocab.index(intent) for intent in intents]] = np.arange(len(intents))
+        y = remap[dataset.intent_codes]
+
+        featurizer = HashingTfidfFeaturizer(BACKEND_PRESETS.get(backend, FeaturizerConfig()))
+        featurize_started = time.perf_counter()
+        if feature_cache is not None:
+            counts, cache_hit = feature_cache.count_matrix(dataset, featurizer)
+        else:
+            counts, cache_hit = featurizer.count_matrix(dataset.iter_texts()), None
+        X = featurizer.fit_counts(counts)
+        featurize_time = time.perf_counter() - featurize_started
+        classifier = SoftmaxClassifier(alpha=alpha, max_iter=max_iter).fit(X, y, len(intents), callback)
+
+        engine = cls(featurizer, classifier, intents, dataset.entity_lexicon(), backend)
+        train_pred = classifier.decision_function(X).argmax(axis=1)
+        engine.training_stats = {
+            "samples": X.shape[0],
+            "intents": len(intents),
+            "training_accuracy": float(np.mean(train_pred == y)),
+            "iterations": classifier.n_iter_,
+            "training_time": time.perf_counter() - started,
+            "featurize_time": featurize_time,
+        }
+        if cache_hit is not None:
+            engine.training_stats["feature_cache_hit"] = cache_hit
+        return engine
+
+    def update(self, examples: Union[List[Dict], NLUDataset], anchor: float = 0.01, max_iter: int = 50,
+               callback: Optional[Callable[[int, float], None]] = None) -> "IntentEngine":
+        """New engine refined with extra labelled examples, without refitting the corpus
+
+        The new examples are added to the document-frequency statistics. The
+        classifier is then warm-started from the current weights and fitted
+        on the new examples only (``SoftmaxClassifier.partial_fit``). Intents
+        the model has not seen are added as new classes. ``self`` is left
+        untouched, so it can keep serving while the update runs.
+
+        ``anchor`` sets how firmly the old corpus holds each weight in place.
+        Lower values let the new examples override more of what it taught.
+        """
+        if isinstance(self.classifier, QuantizedSoftmaxClassifier):
+            raise ValueError("int8 models are serving-only; update the full-precision model and quantize it again")
+        started = time.perf_counter()
+        dataset = examples if isinstance(examples, NLUDataset) else NLUDataset.from_examples(examples)
+        if not len(dataset):
+            raise ValueError("No training examples provided")
+        present = [dataset.intent_vocab[code] for code in np.unique(dataset.intent_codes)]
+        intents = self.intents + sorted(set(present) - set(self.intents))
+        dataset = dataset.with_vocab(intents)
+        y = dataset.intent_codes.astype(np.int64)
+
+        featurizer = self.featurizer.copy()
+        X = featurizer.partial_fit_transform(dataset.iter_texts())
+        classifier = SoftmaxClassifier(alpha=self.classifier.alpha, max_iter=max_iter, tol=self.classifier.tol)
+        classifier.coef_, classifier.intercept_ = self.classifier.coef_, self.classifier.intercept_
+        # The old corpus pins each weight in proportion to how many of its
+        # documents used that feature; features it never saw are free to move
+        scale = anchor / len(dataset)
+        classifier.partial_fit(X, y, len(intents), anchor=scale * self.featurizer.doc_freq,
+                               intercept_anchor=scale * self.featurizer.n_docs, callback=callback)
+
+        lexicon = {**self.entity_lexicon, **dataset.entity_lexicon()}
+        engine = IntentEngine(featurizer, classifier, intents, lexicon, self.backend)
+        train_pred = classifier.decision_function(X).argmax(axis=1)
+        engine.training_stats = {
+            "samples": X.shape[0],
+            "intents": len(intents),
+            "training_accuracy": float(np.mean(train_pred == y)),
+            "iterations": classifier.n_iter_,
+            "training_time": time.perf_counter() - started,
+            "base_version": self.version,
+            "total_samples": featurizer.n_docs,
+        }
+        return engine
+
+    @property
+    def model_size_bytes(self) -> int:
+        """Bytes held by the weight and IDF arrays"""
+        return self.classifier.nbytes + self.featurizer.idf.nbytes
+
+    def extract_entities(self, text: str) -> List[Dict]:
+        """Find lexicon entity values in ``text`` with character offsets"""
+        # Compiled on first use so loading an artifact stays cheap
+        if self._entity_extractor is None:
+            self._entity_extractor = EntityExtractor(self._entity_lexicon)
+        started = time.perf_counter_ns()
+        entities = self._entity_extractor.extract(text)
+        LATENCY.record("entities", time.perf_counter_ns() - started)
+        return entities
+
+    def predict_proba(self, texts: List[str]) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """Featurize ``texts`` as one matrix and return it with class probabilities"""
+        X = self.featurizer.transform(texts)
+        return X, self.classifier.predict_proba(X)
+
+    def predict_labels(self, texts: List[str]) -> np.ndarray:
+        """Best intent index per utterance, ``len(self.intents)`` meaning unknown"""
+        return self.predict_labels_from_counts(self.featurizer.count_matrix(texts))
+
+    def predict_labels_from_counts(self, counts: sp.csr_matrix) -> np.ndarray:
+        """``predict_labels`` for a precomputed raw count matrix"""
+        X = self.featurizer.weight(counts)
+        probs = self.classifier.predict_proba(X)
+        return np.where(np.diff(X.indptr) == 0, len(self.intents), probs.argmax(axis=1))
+
+    def classify(self, text: str) -> Dict:
+        """Intent, confidence, ranking and stage timings of one utterance, without entities"""
+        t0 = time.perf_counter_ns()
+        X = self.featurizer.transform([text])
+        t1 = time.perf_counter_ns()
+        probs = self.classifier.predict_proba(X)[0]
+        t2 = time.perf_counter_ns()
+        order = np.argsort(-probs)
+        ranking = [{"intent": self.intents[i], "confidence": float(probs[i])} for i in order]
+        if X.nnz == 0:
+            intent, confidence = UNKNOWN_INTENT, 0.0
+        else:
+            intent, confidence = ranking[0]["intent"], ranking[0]["confidence"]
+        t3 = time.perf_counter_ns()
+        LATENCY.record("featurize", t1 - t0)
+        LATENCY.record("score", t2 - t1)
+        LATENCY.record("format", t3 - t2)
+        return {
+            "intent": intent,
+            "confidence": confidence,
+            "ranking": ranking,
+            "timings_ms": {"featurize": (t1 - t0) / 1e6, "score": (t2 - t1) / 1e6, "format": (t3 - t2) / 1e6},
+        }
+
+    def predict(self, text: str) -> Dict:
+        """Classify one utterance and return intent, confidence, ranking, entities and stage timings
+
+        Each stage is also recorded in the ``nlu.telemetry.LATENCY`` histograms.
+        """
+        result = self.classify(text)
+        started = time.perf_counter_ns()
+        entities = self.extract_entities(text)
+        result["timings_ms"]["entities"] = (time.perf_counter_ns() - started) / 1e6
+        return {"text": text, "intent": result["intent"], "confidence": result["confidence"],
+                "ranking": result["ranking"], "entities": entities, "timings_ms": result["timings_ms"]}
+
+    def predict_batch(self, texts: List[str], top_k: int = 3) -> Dict[str, np.ndarray]:
+        """Classify many utterances in one matrix pass
+
+        Returns column arrays: ``intent`` and ``confidence`` per row plus
+        ``top_intents`` / ``top_confidences`` of shape ``(n, top_k)``.
+        """
+        t0 = time.perf_counter_ns()
+        X = self.featurizer.transform(texts)
+        t1 = time.perf_counter_ns()
+        probs = self.classifier.predict_proba(X)
+        t2 = time.perf_counter_ns()
+        labels = np.array(self.intents + [UNKNOWN_INTENT], dtype=object)
+        k = min(top_k, probs.shape[1])
+        # argpartition picks the k best columns per row without a full sort
+        top = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+        top_probs = np.take_along_axis(probs, top, axis=1)
+        order = np.argsort(-top_probs, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_probs = np.take_along_axis(top_probs, order, axis=1)
+
+        empty = np.diff(X.indptr) == 0
+        best = np.where(empty, len(self.intents), top[:, 0])
+        result = {
+            "intent": labels[best],
+            "confidence": np.where(empty, 0.0, top_probs[:, 0]),
+            "top_intents": labels[top],
+            "top_confidences": top_probs,
+        }
+        LATENCY.record("batch_featurize", t1 - t0)
+        LATENCY.record("batch_score", t2 - t1)
+        LATENCY.record("batch_format", time.perf_counter_ns() - t2)
+        return result
@@ -0,0 +1,104 @@
+"""
+Entity extraction
+=================
+
+``EntityExtractor`` compiles every annotated entity value from the training
+data into one Aho-Corasick automaton over lowercased characters. An
+utterance is scanned once, left to right, so latency depends on the length of
+the text and the number of matches, not on how many patterns exist.
+
+Raw matches may overlap, e.g. "new york" and "york". They are resolved
+leftmost-longest by sorting once and sweeping. Matches must start and end on
+word boundaries, so the number "4" is not found inside "14".
+"""
+
+from collections import deque
+from typing import Dict, List, Tuple
+
+
+def _fold_case(text: str) -> str:
+    """Lowercase ``text`` without changing its length, so offsets stay valid"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. "İ") expand when lowercased; leave those as they are
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class EntityExtractor:
+    """Single-pass dictionary matcher for entity values"""
+
+    def __init__(self, lexicon: Dict[str, str]):
+        # goto[state] maps a character to the next state; state 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (pattern length, label) for every pattern ending at a state, via fail links too
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        self.n_patterns = 0
+        for value, label in lexicon.items():
+            self._add(_fold_case(value.strip()), label)
+        self._link()
+
+    def _add(self, pattern: str, label: str) -> None:
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        # Later annotations of the same value win, like the lexicon dict itself
+        self._out[state] = [(len(pattern), label)]
+        self.n_patterns += 1
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first and merge suffix outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """Every word-bounded ``(start, end, label)`` occurrence, overlaps included"""
+        if not self.n_patterns:
+            return []
+        goto, fail, out = self._goto, self._fail, self._out
+        folded = _fold_case(text)
+        found = []
+        state = 0
+        for i, ch in enumerate(folded):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                if end < len(text) and text[end].isalnum():
+                    continue
+                for length, label in out[state]:
+                    start = end - length
+                    if start == 0 or not text[start - 1].isalnum():
+                        found.append((start, end, label))
+        return found
+
+    def extract(self, text: str) -> List[Dict]:
+        """Non-overlapping entities in the ``load_sample_data`` format, leftmost-longest"""
+        found = sorted(self.matches(text), key=lambda m: (m[0], m[0] - m[1]))
+        entities = []
+        last_end = 0
+        for start, end, label in found:
+            if start >= last_end:
+                entities.append({"entity": label, "value": text[start:end], "start": start, "end": end})
+                last_end = end
+        return entities
@@ -0,0 +1,291 @@
+"""
+Prediction and training event log
+=================================
+
+Every prediction and training run is appended to ``events.bin``, a flat
+file of fixed-size binary records (``EVENT_DTYPE``, 34 bytes each). Intent
+and backend names are stored as CRC32 codes. ``strings.tsv`` maps each code
+back to its name and is append-only too. Writers hold an exclusive
+``flock`` on the file for each append, so several processes can log into the
+same directory and a record is never split by another process's write. The
+directory is created by the first write, not when an ``EventLog`` is made.
+
+``EventAggregates`` holds the rolling totals the analytics dashboard shows:
+per-intent volume, confidence histogram, latency histogram, and predictions
+and models trained per day. ``EventLog.refresh`` folds only the records
+appended since the previous call, vectorized, into those totals. Rendering
+therefore costs the same after months of traffic as after a minute.
+Aggregates are checkpointed with the log offset they cover, so a restart
+replays just the tail.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Iterable
+
+import numpy as np
+
+from .telemetry import LatencyHistogram
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_EVENT_DIR = os.environ.get("NLU_EVENT_DIR", "nlu_events")
+
+PREDICTION, TRAINING = 0, 1
+
+EVENT_DTYPE = np.dtype([
+    ("timestamp", "<f8"),    # unix seconds
+    ("kind", "u1"),          # PREDICTION / TRAINING
+    ("cached", "u1"),        # prediction served from the cache
+    ("backend", "<u4"),      # crc32 of the backend name
+    ("label", "<u4"),        # crc32 of the predicted intent (predictions)
+    ("confidence", "<f4"),   # prediction confidence
+    ("latency_us", "<f4"),   # prediction latency / training time in microseconds
+    ("samples", "<u4"),      # training samples (training runs)
+    ("accuracy", "<f4"),     # training accuracy (training runs)
+])
+
+CONFIDENCE_BINS = 20
+_SECONDS_PER_DAY = 86400
+
+
+def _code(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8"))
+
+
+def _add_counts(target: Dict[str, int], keys: np.ndarray, names) -> None:
+    """Add the occurrence counts of ``keys`` to ``target`` under ``names(key)``"""
+    if not len(keys):
+        return
+    values, counts = np.unique(keys, return_counts=True)
+    for value, count in zip(values.tolist(), counts.tolist()):
+        name = names(value)
+        target[name] = target.get(name, 0) + count
+
+
+def _day(day_number: int) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(day_number * _SECONDS_PER_DAY))
+
+
+class EventAggregates:
+    """Rolling dashboard totals, updated by folding in batches of events"""
+
+    def __init__(self):
+        self.predictions = 0
+        self.cached_predictions = 0
+        self.trainings = 0
+        self.samples_trained = 0
+        self.accuracy_sum = 0.0
+        self.intent_counts: Dict[str, int] = {}
+        self.backend_predictions: Dict[str, int] = {}
+        self.backend_trainings: Dict[str, int] = {}
+        self.predictions_per_day: Dict[str, int] = {}
+        self.trainings_per_day: Dict[str, int] = {}
+        self.confidence_histogram = np.zeros(CONFIDENCE_BINS, dtype=np.int64)
+        self.accuracy_histogram = np.zeros(CONFIDENCE_BINS, dtype=np.int64)
+        self.latency = LatencyHistogram()
+
+    def fold(self, events: np.ndarray, strings: Dict[int, str]) -> None:
+        """Add a batch of ``EVENT_DTYPE`` records to the totals"""
+        def name(code: int) -> str:
+            return strings.get(code, f"#{code:08x}")
+
+        days = (events["timestamp"] // _SECONDS_PER_DAY).astype(np.int64)
+        predictions = events["kind"] == PREDICTION
+        trainings = events["kind"] == TRAINING
+
+        pred = events[predictions]
+        self.predictions += len(pred)
+        self.cached_predictions += int(pred["cached"].sum())
+        _add_counts(self.intent_counts, pred["label"], name)
+        _add_counts(self.backend_predictions, pred["backend"], name)
+        _add_counts(self.predictions_per_day, days[predictions], _day)
+        bins = np.clip((pred["confidence"] * CONFIDENCE_BINS).astype(np.int64), 0, CONFIDENCE_BINS - 1)
+        self.confidence_histogram += np.bincount(bins, minlength=CONFIDENCE_BINS)
+        self.latency.record_many((pred["latency_us"].astype(np.float64) * 1000).astype(np.int64))
+
+        train = events[trainings]
+        self.trainings += len(train)
+        self.samples_trained += int(train["samples"].sum())
+        self.accuracy_sum += float(train["accuracy"].astype(np.float64).sum())
+        _add_counts(self.backend_trainings, train["backend"], name)
+        _add_counts(self.trainings_per_day, days[trainings], _day)
+        bins = np.clip((train["accuracy"] * CONFIDENCE_BINS).astype(np.int64), 0, CONFIDENCE_BINS - 1)
+        self.accuracy_histogram += np.bincount(bins, minlength=CONFIDENCE_BINS)
+
+    @property
+    def average_accuracy(self) -> float:
+        return self.accuracy_sum / self.trainings if self.trainings else 0.0
+
+    def to_dict(self) -> Dict:
+        data = {k: v for k, v in vars(self).items() if isinstance(v, (int, float, dict))}
+        data["confidence_histogram"] = self.confidence_histogram.tolist()
+        data["accuracy_histogram"] = self.accuracy_histogram.tolist()
+        data["latency"] = self.latency.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EventAggregates":
+        aggregates = cls()
+        for key, value in data.items():
+            if key in ("confidence_histogram", "accuracy_histogram"):
+                setattr(aggregates, key, np.asarray(value, dtype=np.int64))
+            elif key == "latency":
+                aggregates.latency = LatencyHistogram.from_dict(value)
+            elif hasattr(aggregates, key):
+                setattr(aggregates, key, value)
+        return aggregates
+
+
+class EventLog:
+    """Append-only binary event log with incrementally maintained aggregates"""
+
+    def __init__(self, root: str = DEFAULT_EVENT_DIR, checkpoint_every: int = 100_000):
+        self.root = root
+        self.checkpoint_every = checkpoint_every
+        self.events_path = os.path.join(root, "events.bin")
+        self.strings_path = os.path.join(root, "strings.tsv")
+        self.checkpoint_path = os.path.join(root, "aggregates.json")
+        self._lock = threading.Lock()
+        self._strings: Dict[int, str] = {}
+        self._strings_offset = 0
+        self._aggregates = EventAggregates()
+        self._offset = 0                 # records already folded into the aggregates
+        self._since_checkpoint = 0
+        self._load_checkpoint()
+
+    # ------------------------------------------------------------------ writing
+
+    def _read_strings(self) -> None:
+        if not os.path.exists(self.strings_path):
+            return
+        with open(self.strings_path, "rb") as f:
+            f.seek(self._strings_offset)
+            data = f.read()
+        # Only consume complete lines; a concurrent writer may be mid-line
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8").splitlines():
+            code, _, name = line.partition("\t")
+            self._strings[int(code)] = name
+        self._strings_offset += end
+
+    def _intern(self, names: Iterable[str]) -> None:
+        new = {code: name for code, name in ((_code(name), name) for name in set(names))
+               if code not in self._strings}
+        if not new:
+            return
+        self._read_strings()
+        lines = "".join(f"{code}\t{name}\n" for code, name in new.items() if code not in self._strings)
+        if lines:
+            self._append(self.strings_path, lines.encode("utf-8"))
+        self._strings.update(new)
+
+    def _append(self, path: str, payload: bytes) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # A write can be cut short (signal, nearly full disk). The lock keeps
+            # other writers out until the rest is written, so records stay whole
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def _write(self, events: np.ndarray) -> None:
+        self._append(self.events_path, events.tobytes())
+
+    def log_predictions(self, backend: str, intents, confidences, latencies_ms, cached=None) -> None:
+        """Append one event per prediction in a single write"""
+        intents = np.asarray(intents, dtype=object)
+        n = len(intents)
+        if not n:
+            return
+        events = np.zeros(n, dtype=EVENT_DTYPE)
+        events["timestamp"] = time.time()
+        events["kind"] = PREDICTION
+        events["cached"] = 0 if cached is None else np.asarray(cached, dtype=np.uint8)
+        events["backend"] = _code(backend)
+        unique, inverse = np.unique(intents.astype(str), return_inverse=True)
+        events["label"] = np.array([_code(name) for name in unique], dtype=np.uint32)[inverse]
+        events["confidence"] = confidences
+        events["latency_us"] = np.asarray(latencies_ms, dtype=np.float64) * 1000
+        with self._lock:
+            self._intern([backend, *unique.tolist()])
+            self._write(events)
+
+    def log_prediction(self, backend: str, intent: str, confidence: float, latency_ms: float,
+                       cached: bool = False) -> None:
+        self.log_predictions(backend, [intent], [confidence], [latency_ms], [cached])
+
+    def log_training(self, backend: str, samples: int, accuracy: float, training_seconds: float) -> None:
+        event = np.zeros(1, dtype=EVENT_DTYPE)
+        event["timestamp"] = time.time()
+        event["kind"] = TRAINING
+        event["backend"] = _code(backend)
+        event["samples"] = samples
+        event["accuracy"] = accuracy
+        event["latency_us"] = training_seconds * 1e6
+        with self._lock:
+            self._intern([backend])
+            self._write(event)
+
+    # ------------------------------------------------------------------ reading
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.events_path) // EVENT_DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def refresh(self) -> EventAggregates:
+        """Fold events appended since the last call (by any process) and return the totals"""
+        with self._lock:
+            total = len(self)
+            if total < self._offset:
+                # The log was truncated or replaced; start over
+                self._aggregates, self._offset = EventAggregates(), 0
+            if total > self._offset:
+                self._read_strings()
+                tail = np.fromfile(self.events_path, dtype=EVENT_DTYPE, count=total - self._offset,
+                                   offset=self._offset * EVENT_DTYPE.itemsize)
+                self._aggregates.fold(tail, self._strings)
+                self._offset = total
+                self._since_checkpoint += len(tail)
+                if self._since_checkpoint >= self.checkpoint_every:
+                    self._checkpoint()
+            return self._aggregates
+
+    def _checkpoint(self) -> None:
+        payload = {"offset": self._offset, "aggregates": self._aggregates.to_dict()}
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.checkpoint_path)
+        self._since_checkpoint = 0
+
+    def checkpoint(self) -> None:
+        """Persist the aggregates with the log offset they cover"""
+        self.refresh()
+        with self._lock:
+            self._checkpoint()
+
+    def _load_checkpoint(self) -> None:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if payload.get("offset", 0) <= len(self):
+            self._aggregates = EventAggregates.from_dict(payload["aggregates"])
+            self._offset = payload["offset"]
@@ -0,0 +1,159 @@
+"""
+Feature cache
+=============
+
+Tokenizing and hashing a corpus is most of the cost of training or
+evaluating on it. Yet the result only depends on the texts and the
+featurizer config, not on the classifier settings being tried.
+``FeatureCache`` keeps that result on disk::
+
+    <root>/<key>/
+        data.npy  indices.npy  indptr.npy   raw term-count CSR matrix
+        labels.npy                          intent code per row
+        meta.json                           shape, intent vocabulary, featurizer config
+
+``key`` is a BLAKE2 hash of the featurizer config and
+``NLUDataset.content_hash``. Changing one utterance or one config field
+gives a new entry, and an unchanged corpus is recognised however it was
+loaded. The IDF weights are not cached; they are recomputed from the
+counts, which takes one ``bincount``.
+
+Entries are memory-mapped on load. Least recently used entries are deleted
+once the cache grows past ``max_bytes``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .dataset import NLUDataset
+from .featurizer import HashingTfidfFeaturizer
+
+CACHE_FORMAT = 1
+DEFAULT_FEATURE_CACHE_DIR = os.environ.get("NLU_FEATURE_CACHE_DIR", "nlu_feature_cache")
+DEFAULT_MAX_BYTES = int(float(os.environ.get("NLU_FEATURE_CACHE_MAX_MB", "2048")) * (1 << 20))
+
+_ARRAYS = ("data", "indices", "indptr", "labels")
+
+
+def dataset_key(dataset: NLUDataset, featurizer: HashingTfidfFeaturizer) -> str:
+    """Content hash of the dataset's texts and labels plus the featurizer config"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(json.dumps({"format": CACHE_FORMAT, "featurizer": featurizer.config.to_dict()},
+                             sort_keys=True).encode("utf-8"))
+    digest.update(dataset.content_hash().encode("ascii"))
+    return digest.hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class FeatureCache:
+    """Size-capped on-disk cache of raw count matrices keyed by content hash"""
+
+    def __init__(self, root: str = DEFAULT_FEATURE_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[sp.csr_matrix, np.ndarray]]:
+        """Memory-mapped ``(counts, labels)`` for ``key``, or ``None``"""
+        path = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+            # Mark as recently used for eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, half-written, unreadable, or evicted by another process mid-read
+            return None
+        counts = sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(meta["shape"]))
+        return counts, arrays["labels"]
+
+    def put(self, key: str, counts: sp.csr_matrix, labels: np.ndarray, meta: Optional[Dict] = None) -> None:
+        """Store an entry atomically, then evict old ones past ``max_bytes``
+
+        Failing to write (disk full, read-only root, another process storing
+        the same key first) only means the next run featurizes again.
+        """
+        staging = None
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+            arrays = {"data": counts.data, "indices": counts.indices, "indptr": counts.indptr, "labels": labels}
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"format": CACHE_FORMAT, "shape": list(counts.shape), "created_at": time.time(),
+                           **(meta or {})}, f)
+            os.rename(staging, os.path.join(self.root, key))
+        except OSError:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+            return
+        self.evict()
+
+    def count_matrix(self, dataset: NLUDataset, featurizer: HashingTfidfFeaturizer) -> Tuple[sp.csr_matrix, bool]:
+        """``featurizer.count_matrix`` of the dataset's texts, from the cache when possible
+
+        Returns the counts and whether they came from the cache.
+        """
+        key = dataset_key(dataset, featurizer)
+        cached = self.get(key)
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached[0], True
+        counts = featurizer.count_matrix(dataset.iter_texts())
+        self.put(key, counts, dataset.intent_codes,
+                 {"intent_vocab": dataset.intent_vocab, "featurizer": featurizer.config.to_dict()})
+        return counts, False
+
+    def entries(self) -> List[Dict]:
+        """Cached entries, most recently used first"""
+        if not os.path.isdir(self.root):
+            return []
+        rows = []
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and not entry.name.startswith("."):
+                rows.append({"key": entry.name, "bytes": _dir_size(entry.path), "last_used": entry.stat().st_mtime})
+        return sorted(rows, key=lambda row: row["last_used"], reverse=True)
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits ``max_bytes``"""
+        entries = self.entries()
+        total = sum(row["bytes"] for row in entries)
+        removed = 0
+        # Never evict the newest entry: it is the one just stored or used
+        while total > self.max_bytes and len(entries) - removed > 1:
+            victim = entries[-1 - removed]
+            shutil.rmtree(os.path.join(self.root, victim["key"]), ignore_errors=True)
+            total -= victim["bytes"]
+            removed += 1
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def stats(self) -> Dict:
+        entries = self.entries()
+        return {"entries": len(entries), "bytes": sum(row["bytes"] for row in entries), "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
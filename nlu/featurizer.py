@@ -0,0 +1,152 @@
+"""
+Hashed n-gram TF-IDF featurizer
+===============================
+
+Turns utterances into L2-normalised sparse TF-IDF rows. Terms (word n-grams
+and optional character n-grams) are hashed into a fixed number of columns with
+CRC32, so the feature space is stable across processes and needs no
+vocabulary dictionary.
+"""
+
+import re
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokenizer shared by training and prediction"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class FeaturizerConfig:
+    """Settings that define the hashed feature space"""
+    n_features: int = 2 ** 18
+    word_ngrams: Tuple[int, int] = (1, 2)
+    char_ngrams: Optional[Tuple[int, int]] = None
+    sublinear_tf: bool = True
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FeaturizerConfig":
+        data = dict(data)
+        for key in ("word_ngrams", "char_ngrams"):
+            if data.get(key) is not None:
+                data[key] = tuple(data[key])
+        return cls(**data)
+
+
+class HashingTfidfFeaturizer:
+    """Hashed word/char n-gram featurizer with document-frequency IDF weights"""
+
+    def __init__(self, config: Optional[FeaturizerConfig] = None):
+        self.config = config or FeaturizerConfig()
+        self.doc_freq = np.zeros(self.config.n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.idf = np.zeros(self.config.n_features, dtype=np.float32)
+
+    def terms(self, text: str) -> List[str]:
+        """Return every n-gram term extracted from one utterance"""
+        tokens = tokenize(text)
+        out = []
+        lo, hi = self.config.word_ngrams
+        for n in range(lo, hi + 1):
+            if n == 1:
+                out.extend(tokens)
+            else:
+                out.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        if self.config.char_ngrams:
+            clo, chi = self.config.char_ngrams
+            for token in tokens:
+                padded = f" {token} "
+                for n in range(clo, chi + 1):
+                    out.extend("#" + padded[i:i + n] for i in range(len(padded) - n + 1))
+        return out
+
+    def hash_terms(self, text: str) -> np.ndarray:
+        """Hash the terms of one utterance into column indices"""
+        n_features = self.config.n_features
+        return np.fromiter(
+            (zlib.crc32(term.encode("utf-8")) % n_features for term in self.terms(text)),
+            dtype=np.int32,
+        )
+
+    def count_matrix(self, texts: Iterable[str]) -> sp.csr_matrix:
+        """Raw hashed term counts, one row per utterance"""
+        n_features = self.config.n_features
+        chunks: List[np.ndarray] = []
+        for row, text in enumerate(texts):
+            chunks.append(self.hash_terms(text).astype(np.int64) + row * n_features)
+        n_rows = len(chunks)
+        keys = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+        # One sort over (row, column) keys both orders and de-duplicates the terms
+        keys, counts = np.unique(keys, return_counts=True)
+        rows = keys // n_features
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return sp.csr_matrix(
+            (counts.astype(np.float32), (keys - rows * n_features).astype(np.int32), indptr),
+            shape=(n_rows, n_features),
+        )
+
+    def update_stats(self, counts: sp.csr_matrix) -> None:
+        """Accumulate document frequencies from a count matrix and refresh IDF"""
+        # Not in place: loaded artifacts memory-map doc_freq read-only
+        self.doc_freq = self.doc_freq + np.bincount(counts.indices, minlength=self.config.n_features)
+        self.n_docs += counts.shape[0]
+        seen = self.doc_freq > 0
+        self.idf = np.zeros(self.config.n_features, dtype=np.float32)
+        self.idf[seen] = np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq[seen])) + 1.0
+
+    def weight(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """Apply TF scaling, IDF weights and L2 row normalisation to raw counts"""
+        data = counts.data
+        if self.config.sublinear_tf:
+            data = np.log1p(data)
+        # Buckets never seen during training carry zero IDF and drop out here
+        data = data * self.idf[counts.indices]
+        n_rows = counts.shape[0]
+        keep = data != 0
+        rows = np.repeat(np.arange(n_rows), np.diff(counts.indptr))[keep]
+        data, indices = data[keep], counts.indices[keep]
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        norms = np.sqrt(np.bincount(rows, weights=data.astype(np.float64) ** 2, minlength=n_rows))
+        norms[norms == 0] = 1.0
+        data = (data / norms[rows]).astype(np.float32)
+        return sp.csr_matrix((data, indices, indptr), shape=counts.shape)
+
+    def fit_counts(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """Learn IDF weights from a raw count matrix and return its feature matrix"""
+        self.doc_freq = np.zeros(self.config.n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.update_stats(counts)
+        return self.weight(counts)
+
+    def fit_transform(self, texts: Iterable[str]) -> sp.csr_matrix:
+        """Learn IDF weights from ``texts`` and return their feature matrix"""
+        return self.fit_counts(self.count_matrix(texts))
+
+    def partial_fit_transform(self, texts: Iterable[str]) -> sp.csr_matrix:
+        """Add ``texts`` to the learned document frequencies and return their feature matrix"""
+        counts = self.count_matrix(texts)
+        self.update_stats(counts)
+        return self.weight(counts)
+
+    def copy(self) -> "HashingTfidfFeaturizer":
+        """Independent copy whose statistics can be updated without touching this one"""
+        featurizer = HashingTfidfFeaturizer(self.config)
+        featurizer.doc_freq, featurizer.n_docs, featurizer.idf = self.doc_freq, self.n_docs, self.idf
+        return featurizer
+
+    def transform(self, texts: Iterable[str]) -> sp.csr_matrix:
+        """Featurize ``texts`` with the learned IDF weights"""
+        return self.weight(self.count_matrix(texts))
@@ -0,0 +1,154 @@
+"""
+Import-time budget
+==================
+
+A fresh Space or autoscaled pod cannot answer anything until its entry
+module has finished importing, so import time is most of a cold start.
+This module measures it with ``python -X importtime`` and holds each entry
+point to a stored budget::
+
+    python -m nlu.importtime                                          # report
+    python -m nlu.importtime --budget benchmarks/importtime.json      # gate
+    python -m nlu.importtime --save-budget benchmarks/importtime.json # refresh
+
+Every target is imported ``--repeat`` times in a fresh interpreter, and the
+fastest run is kept. The budget file holds a millisecond ceiling per target
+(the measurement plus ``--headroom`` when saved). The command exits with
+status 1 when a target goes over, and lists the slowest imports under it.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_TARGETS = "nlu,server,gradio_app,streamlit_app"
+DEFAULT_REPEAT = 3
+DEFAULT_HEADROOM = 0.5
+
+# Entry points live next to the nlu package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """``-X importtime`` lines as dicts with self / cumulative microseconds and nesting depth"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time: <self> | <cumulative> | <two spaces per nesting level><name>"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"name": name.strip(), "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                     "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def measure(target: str, repeat: int = DEFAULT_REPEAT, top: int = 8) -> Dict:
+    """Fastest cold import of ``target`` in milliseconds, plus its slowest nested imports"""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"], cwd=REPO_ROOT,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"importing {target} failed:\n{proc.stderr[-2000:]}")
+        rows = parse_importtime(proc.stderr)
+        end = max(i for i, row in enumerate(rows) if row["name"] == target and row["depth"] == 0)
+        if best is None or rows[end]["cumulative_us"] < best[0]:
+            best = (rows[end]["cumulative_us"], rows[:end])
+    total, rows = best
+    # Rows come children-first: the target's own imports are the depth-1 rows
+    # between it and the previous top-level import
+    children = []
+    for row in reversed(rows):
+        if row["depth"] == 0:
+            break
+        if row["depth"] == 1:
+            children.append(row)
+    children.sort(key=lambda row: -row["cumulative_us"])
+    return {"ms": total / 1000, "slowest": [{"module": row["name"], "ms": row["cumulative_us"] / 1000}
+                                            for row in children[:top]]}
+
+
+def run(targets: List[str], repeat: int = DEFAULT_REPEAT, log=print) -> Dict:
+    results = {}
+    for target in targets:
+        results[target] = measure(target, repeat)
+        log(f"{target:<16} {results[target]['ms']:>9.1f} ms")
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def check(results: Dict, budget: Dict) -> List[Dict]:
+    """Per-target rows; ``over`` marks imports slower than their budget"""
+    rows = []
+    for target, result in results["results"].items():
+        limit = budget.get("budgets_ms", {}).get(target)
+        if limit is None:
+            continue
+        rows.append({"target": target, "budget_ms": limit, "ms": result["ms"], "over": result["ms"] > limit,
+                     "slowest": result["slowest"]})
+    return rows
+
+
+def format_check(rows: List[Dict]) -> str:
+    lines = [f"{'target':<16} {'budget':>10} {'current':>10}"]
+    for row in rows:
+        lines.append(f"{row['target']:<16} {row['budget_ms']:>8.0f}ms {row['ms']:>8.1f}ms"
+                     f"{'  OVER BUDGET' if row['over'] else ''}")
+        if row["over"]:
+            lines.extend(f"    {entry['ms']:>8.1f}ms  {entry['module']}" for entry in row["slowest"])
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure entry-point import time against a budget")
+    parser.add_argument("--targets", default=DEFAULT_TARGETS, help="comma-separated modules to import")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="imports per target; the fastest counts")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--budget", help="fail when a target imports slower than this budget file allows")
+    parser.add_argument("--save-budget", help="write the measurements plus headroom as the new budget")
+    parser.add_argument("--headroom", type=float, default=DEFAULT_HEADROOM,
+                        help="slack added to the measurement when saving a budget")
+    args = parser.parse_args(argv)
+
+    results = run([t.strip() for t in args.targets.split(",") if t.strip()], args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.save_budget:
+        budget = {"meta": results["meta"],
+                  "budgets_ms": {target: math.ceil(result["ms"] * (1 + args.headroom) / 10) * 10
+                                 for target, result in results["results"].items()}}
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_budget)), exist_ok=True)
+        with open(args.save_budget, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2)
+        print(f"Wrote {args.save_budget}")
+
+    if args.budget:
+        with open(args.budget, encoding="utf-8") as f:
+            budget = json.load(f)
+        rows = check(results, budget)
+        print(format_check(rows))
+        over = [row for row in rows if row["over"]]
+        if over:
+            print(f"{len(over)} target(s) over their import-time budget")
+            return 1
+        print("All targets within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
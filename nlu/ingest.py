@@ -0,0 +1,284 @@
+"""
+Data ingestion
+==============
+
+Readers for the utterance files the apps accept: JSON arrays, JSONL, CSV in
+the ``sample-training-data.csv`` layout, and plain text with one utterance per
+line.
+
+Everything is a generator pipeline: records are pulled from the file a chunk
+at a time (JSON arrays are decoded element by element), validated one by one,
+and grouped into batches for the trainer, so a corpus never has to be held in
+memory as Python dicts.
+"""
+
+import csv
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+Source = Union[str, os.PathLike, IO]
+
+# Malformed rows kept in an IngestReport; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+class IngestError(ValueError):
+    """A malformed record, tagged with the line it starts on"""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+@dataclass
+class IngestReport:
+    """Running counts of what an ingestion pass accepted and rejected"""
+    rows_read: int = 0
+    rows_valid: int = 0
+    errors: List[IngestError] = field(default_factory=list)
+    error_count: int = 0
+    fatal: Optional[IngestError] = None
+
+    def add_error(self, error: IngestError) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+
+    def summary(self, limit: int = 20) -> str:
+        """Human-readable list of the rejected lines"""
+        lines = [f"{self.rows_valid} of {self.rows_read} rows accepted, {self.error_count} rejected"]
+        lines.extend(f"- {error}" for error in self.errors[:limit])
+        if self.error_count > limit:
+            lines.append(f"- ... and {self.error_count - limit} more")
+        if self.fatal:
+            lines.append(f"- stopped reading at {self.fatal}")
+        return "\n".join(lines)
+
+
+def detect_format(filename: str) -> str:
+    """Guess the file format from its extension"""
+    ext = os.path.splitext(str(filename).lower())[1]
+    return {".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json", ".csv": "csv"}.get(ext, "text")
+
+
+def sniff_format(text: str) -> str:
+    """Guess the format of pasted data from its first character"""
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return "json"
+    if stripped.startswith("{"):
+        return "jsonl"
+    return "csv"
+
+
+def _open_text(source: Source) -> IO[str]:
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "r", encoding="utf-8-sig", newline="")
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+
+
+def _iter_json_array(handle: IO[str], chunk_size: int = 1 << 16) -> Iterator[Tuple[int, object]]:
+    """Decode the elements of a top-level JSON array one at a time"""
+    decoder = json.JSONDecoder()
+    buf, pos, line, eof = "", 0, 1, False
+    expect = "["
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = handle.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+        return bool(chunk)
+
+    fill()
+    while True:
+        # Skip whitespace, counting the newlines that go past
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                line += buf[pos] == "\n"
+                pos += 1
+            if pos < len(buf) or not fill():
+                break
+        if pos >= len(buf):
+            raise IngestError(line, "unexpected end of file inside JSON array")
+        char = buf[pos]
+        if expect == "[":
+            if char != "[":
+                raise IngestError(line, "expected a JSON array of training examples")
+            pos += 1
+            # An empty array may close straight away, but not after a comma
+            expect = "first"
+        elif char == "]" and expect in ("first", ","):
+            return
+        elif char == "]":
+            raise IngestError(line, "trailing ',' before ']'")
+        elif expect == ",":
+            if char != ",":
+                raise IngestError(line, f"expected ',' or ']' but found {char!r}")
+            pos += 1
+            expect = "value"
+        else:
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError as e:
+                    # The element may straddle the chunk boundary; read more and retry.
+                    # fill() shifts the buffer even at end of file, so always
+                    # decode again and report the error from the current buffer
+                    if not eof:
+                        fill()
+                        continue
+                    raise IngestError(line + buf.count("\n", pos, e.pos), e.msg) from None
+            yield line, record
+            line += buf.count("\n", pos, end)
+            pos = end
+            expect = ","
+
+
+def iter_records(source: Source, fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yield ``(line_number, raw_record)`` for every record in ``source``
+
+    CSV rows come back as dicts of strings, plain-text lines as strings, and
+    JSON / JSONL elements as whatever they decode to. A JSONL line that is not
+    valid JSON is yielded as an ``IngestError`` so the caller can report it and
+    carry on; a broken JSON array raises since the rest cannot be recovered.
+    """
+    handle = _open_text(source)
+    try:
+        if fmt == "jsonl":
+            for line_no, line in enumerate(handle, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_no, IngestError(line_no, f"invalid JSON: {e.msg}")
+        elif fmt == "json":
+            yield from _iter_json_array(handle)
+        elif fmt == "csv":
+            reader = csv.DictReader(handle)
+            last_line = 1
+            for row in reader:
+                yield last_line + 1, row
+                last_line = reader.line_num
+        else:
+            for line_no, line in enumerate(handle, start=1):
+                yield line_no, line.rstrip("\r\n")
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            handle.close()
+        elif not isinstance(source, io.TextIOBase):
+            handle.detach()
+
+
+def _record_text(record) -> str:
+    if isinstance(record, IngestError):
+        return ""
+    return str(record.get("text") or "") if isinstance(record, dict) else str(record)
+
+
+def iter_texts(source: Source, fmt: str) -> Iterator[str]:
+    """Yield the utterance text of every record in ``source``"""
+    for _, record in iter_records(source, fmt):
+        yield _record_text(record)
+
+
+def read_texts(source: Source, filename: str = "") -> List[str]:
+    """Read the non-empty utterances from a file path or uploaded file object"""
+    name = filename or getattr(source, "name", "") or str(source)
+    return [text for text in iter_texts(source, detect_format(name)) if text.strip()]
+
+
+def split_lines(text: str) -> List[str]:
+    """Split pasted text into one utterance per non-empty line"""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _normalize_entity(text: str, entity, line: int) -> Dict:
+    if not isinstance(entity, dict):
+        raise IngestError(line, "each entity must be an object")
+    label = entity.get("entity", entity.get("label"))
+    value = entity.get("value", entity.get("text"))
+    start, end = entity.get("start"), entity.get("end")
+    if not label:
+        raise IngestError(line, "entity is missing its 'entity'/'label' name")
+    if value is None and isinstance(start, int) and isinstance(end, int):
+        value = text[start:end]
+    if not value:
+        raise IngestError(line, f"entity '{label}' has no value")
+    value = str(value)
+    if not (isinstance(start, int) and isinstance(end, int) and text[start:end] == value):
+        # Offsets are missing or do not match the value: anchor on the first occurrence
+        start = text.find(value)
+        if start == -1:
+            raise IngestError(line, f"entity value {value!r} does not occur in the text")
+        end = start + len(value)
+    return {"entity": str(label), "value": value, "start": start, "end": end}
+
+
+def validate_record(record, line: int) -> Dict:
+    """Check one raw record and return it as a normalized training example
+
+    Entities come out in the ``{"entity", "value", "start", "end"}`` shape used
+    by ``load_sample_data``, whatever input spelling (``label`` / ``text``) was
+    used.
+    """
+    if isinstance(record, IngestError):
+        raise record
+    if not isinstance(record, dict):
+        raise IngestError(line, "expected an object with 'text' and 'intent'")
+    text, intent = record.get("text"), record.get("intent")
+    if not isinstance(text, str) or not text.strip():
+        raise IngestError(line, "missing or empty 'text'")
+    if not isinstance(intent, str) or not intent.strip():
+        raise IngestError(line, "missing or empty 'intent'")
+    entities = record.get("entities") or []
+    if isinstance(entities, str):
+        # CSV layout stores the entity list as an embedded JSON column
+        try:
+            entities = json.loads(entities) if entities.strip() else []
+        except json.JSONDecodeError as e:
+            raise IngestError(line, f"invalid entities JSON: {e.msg}") from None
+    if not isinstance(entities, list):
+        raise IngestError(line, "'entities' must be a list")
+    return {
+        "text": text,
+        "intent": intent.strip(),
+        "entities": [_normalize_entity(text, entity, line) for entity in entities],
+    }
+
+
+def iter_examples(source: Source, fmt: str, report: Optional[IngestReport] = None) -> Iterator[Dict]:
+    """Yield validated training examples, recording rejected rows in ``report``"""
+    report = report if report is not None else IngestReport()
+    try:
+        for line, record in iter_records(source, fmt):
+            report.rows_read += 1
+            try:
+                example = validate_record(record, line)
+            except IngestError as error:
+                report.add_error(error)
+                continue
+            report.rows_valid += 1
+            yield example
+    except IngestError as error:
+        report.fatal = error
+
+
+def iter_batches(examples: Iterable[Dict], batch_size: int = 10000) -> Iterator[List[Dict]]:
+    """Group a stream of examples into lists of at most ``batch_size``"""
+    batch: List[Dict] = []
+    for example in examples:
+        batch.append(example)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
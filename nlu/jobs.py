@@ -0,0 +1,427 @@
+"""
+Background training jobs
+========================
+
+``TrainingJobQueue`` runs training in a pool of worker processes so the UI
+thread that submits a job gets a job ID back immediately and prediction
+requests in the same server keep being served while models train.
+
+Workers stream progress (stage messages, optimiser iteration, loss, ETA) back
+through a multiprocessing queue; a listener thread in the parent folds the
+events into ``TrainingJob`` records that the UIs poll or ``follow()``.
+Finished models are written as artifacts by the worker itself, so the parent
+only memory-maps the result instead of receiving pickled weights.
+
+Every job also brings the backend's ``nlu.search`` similar-utterance index
+in line with the corpus it trained on. The index is committed only once the
+model artifact is saved. With ``quantize`` a job also saves an int8 copy of
+its model under ``<backend>-int8`` (``nlu.quantize``).
+
+Jobs train in one of two modes: ``FULL_BATCH`` (L-BFGS over the whole
+corpus in memory, the default) or ``OUT_OF_CORE`` (chunked mini-batch SGD
+from ``nlu.out_of_core``, for corpora too large to hold at once).
+"""
+
+import io
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .artifact import DEFAULT_WORKSPACE, ModelStore, check_name
+from .dataset import NLUDataset
+from .engine import IntentEngine
+from .feature_cache import FeatureCache
+from .ingest import IngestReport, detect_format, iter_batches, iter_examples, sniff_format
+from .metrics import evaluate
+from .out_of_core import (DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_EPOCHS, ChunkedCorpus, evaluate_corpus,
+                          train_sgd)
+from .quantize import compare_models, quantize_engine
+from .search import DEFAULT_SEARCH_INDEX_DIR, SearchIndexStore, SimilarityIndex
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+FULL_BATCH, OUT_OF_CORE = "full", "out_of_core"
+
+_progress_queue = None
+
+
+def _init_worker(queue) -> None:
+    global _progress_queue
+    _progress_queue = queue
+
+
+def _emit(job_id: str, kind: str, payload) -> None:
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, kind, payload))
+
+
+def _progress_callback(job_id: str, budget: int) -> Callable[[int, float], None]:
+    first_iteration = [0.0]
+
+    def on_iteration(iteration: int, loss: float) -> None:
+        # Estimate from iteration timings only, so featurization does not skew the ETA
+        now = time.perf_counter()
+        if iteration == 1:
+            first_iteration[0] = now
+        per_iteration = (now - first_iteration[0]) / (iteration - 1) if iteration > 1 else None
+        eta = per_iteration * (budget - iteration) if per_iteration is not None else None
+        _emit(job_id, "progress", {"iteration": iteration, "max_iter": budget, "loss": loss, "eta": eta})
+
+    return on_iteration
+
+
+def _index_examples(job_id: str, index: Optional[SimilarityIndex], examples) -> Optional[SimilarityIndex]:
+    """Stage examples in the search index; returns ``None`` once indexing has failed for this job"""
+    if index is None:
+        return None
+    try:
+        index.add(examples, commit=False)
+        return index
+    except OSError as e:
+        # Similar-example search is a convenience; it never costs a trained model
+        _emit(job_id, "message", f"⚠️ Could not update the similar-example index: {e}")
+        index.discard()
+        return None
+
+
+def _train_full_batch(job_id: str, backend: str, store: ModelStore, workspace: str, examples, report: IngestReport,
+                      max_iter: int, base_version: Optional[str],
+                      index: Optional[SimilarityIndex]
+                      ) -> Tuple[IntentEngine, Dict, Optional[SimilarityIndex], Optional[NLUDataset]]:
+    _emit(job_id, "message", "📊 Streaming training data into a columnar dataset...")
+    dataset = NLUDataset.from_examples(examples)
+    _emit(job_id, "message", f"🔍 Validation: {report.summary()}")
+    if report.fatal:
+        raise ValueError(f"training data is malformed at {report.fatal}")
+    on_iteration = _progress_callback(job_id, max_iter)
+    feature_cache = FeatureCache()
+    if base_version:
+        base = store.load(backend, base_version, workspace)
+        _emit(job_id, "message", f"🧠 Updating {backend}/{base.version} with {len(dataset)} new samples "
+                                 f"(corpus of {base.featurizer.n_docs})...")
+        engine = base.update(dataset, max_iter=max_iter, callback=on_iteration)
+    else:
+        _emit(job_id, "message", f"🧠 Training {backend} model on {len(dataset)} samples...")
+        engine = IntentEngine.train(dataset, backend=backend, max_iter=max_iter, callback=on_iteration,
+                                    feature_cache=feature_cache)
+        if engine.training_stats.get("feature_cache_hit"):
+            _emit(job_id, "message", "♻️ Reused cached features for an unchanged corpus")
+    # Scoring the training corpus reuses the counts training just cached
+    metrics = evaluate(engine, dataset, feature_cache=feature_cache)
+    return engine, metrics, _index_examples(job_id, index, dataset), dataset
+
+
+def _train_out_of_core(job_id: str, backend: str, examples, report: IngestReport, epochs: int, batch_size: int,
+                       index: Optional[SimilarityIndex]
+                       ) -> Tuple[IntentEngine, Dict, Optional[SimilarityIndex], Optional[NLUDataset]]:
+    _emit(job_id, "message", "📦 Streaming training data to disk in hashed chunks...")
+    with ChunkedCorpus(backend) as corpus:
+        for chunk in iter_batches(examples, DEFAULT_CHUNK_SIZE):
+            corpus.add(chunk)
+            index = _index_examples(job_id, index, chunk)
+        _emit(job_id, "message", f"🔍 Validation: {report.summary()}")
+        if report.fatal:
+            raise ValueError(f"training data is malformed at {report.fatal}")
+        _emit(job_id, "message", f"🧠 Training {backend} model out of core on {len(corpus)} samples in "
+                                 f"{corpus.n_chunks} chunk(s): {epochs} epochs, batch size {batch_size}...")
+        engine = train_sgd(corpus, epochs=epochs, batch_size=batch_size,
+                           callback=_progress_callback(job_id, epochs))
+        # The corpus was streamed, so there is no dataset left to compare an int8 copy on
+        return engine, evaluate_corpus(engine, corpus), index, None
+
+
+def _train(job_id: str, backend: str, model_root: str, workspace: str, training_text: Optional[str],
+           training_path: Optional[str], max_iter: int, base_version: Optional[str] = None,
+           mode: str = FULL_BATCH, epochs: int = DEFAULT_EPOCHS, batch_size: int = DEFAULT_BATCH_SIZE,
+           search_root: Optional[str] = None, quantize: bool = False) -> Dict:
+    if mode not in (FULL_BATCH, OUT_OF_CORE):
+        raise ValueError(f"unknown training mode {mode!r}")
+    if mode == OUT_OF_CORE and base_version:
+        raise ValueError("incremental updates run in full-batch mode")
+    report = IngestReport()
+    if training_path:
+        examples = iter_examples(training_path, detect_format(training_path), report)
+    else:
+        examples = iter_examples(io.StringIO(training_text or ""), sniff_format(training_text or ""), report)
+    store = ModelStore(model_root)
+    index = SearchIndexStore(search_root).get(backend, workspace) if search_root else None
+    if index is not None and not base_version:
+        # A new model replaces the indexed corpus; an update adds to it
+        index.reset()
+    try:
+        if mode == OUT_OF_CORE:
+            engine, metrics, index, dataset = _train_out_of_core(job_id, backend, examples, report, epochs,
+                                                                 batch_size, index)
+        else:
+            engine, metrics, index, dataset = _train_full_batch(job_id, backend, store, workspace, examples, report,
+                                                                max_iter, base_version, index)
+        version = store.save(engine, workspace)
+    except BaseException:
+        if index is not None:
+            index.discard()
+        raise
+    _emit(job_id, "message", f"💾 Saved model artifact {backend}/{version}")
+    if index is not None:
+        try:
+            index.commit()
+            _emit(job_id, "message", f"🔎 Indexed {len(index)} utterances for similar-example search")
+        except OSError as e:
+            _emit(job_id, "message", f"⚠️ Could not update the similar-example index: {e}")
+    quantized_version, quantization = None, None
+    if quantize:
+        quantized = quantize_engine(engine)
+        quantized_version = store.save(quantized, workspace)
+        _emit(job_id, "message", f"🗜️ Saved int8 model artifact {quantized.backend}/{quantized_version}")
+        if dataset is not None:
+            # Training cached the corpus' counts, so this does not hash the texts again
+            comparison = compare_models(engine, quantized, dataset, feature_cache=FeatureCache())
+            quantization = {"summary": comparison.summary(), "accuracy_delta": comparison.accuracy_delta,
+                            "f1_delta": comparison.f1_delta, "agreement": comparison.agreement,
+                            "compression": comparison.compression}
+    return {
+        "backend": backend,
+        "workspace": workspace,
+        "version": version,
+        "training_stats": engine.training_stats,
+        "model_size_bytes": engine.model_size_bytes,
+        "accuracy": metrics["accuracy"],
+        "macro_avg": metrics["macro avg"],
+        "ingest_summary": report.summary(),
+        "quantized_version": quantized_version,
+        "quantization": quantization,
+    }
+
+
+def run_training_job(job_id: str, backend: str, model_root: str, workspace: str = DEFAULT_WORKSPACE,
+                     training_text: Optional[str] = None, training_path: Optional[str] = None,
+                     max_iter: int = 200, base_version: Optional[str] = None, mode: str = FULL_BATCH,
+                     epochs: int = DEFAULT_EPOCHS, batch_size: int = DEFAULT_BATCH_SIZE,
+                     search_root: Optional[str] = None, quantize: bool = False) -> None:
+    """Worker entry point: ingest, train, evaluate on the training set and save the artifact
+
+    With ``base_version`` the saved model is updated incrementally with the
+    new examples instead of being trained from scratch. ``OUT_OF_CORE`` mode
+    trains for ``epochs`` passes of ``batch_size`` mini-batches and ignores
+    ``max_iter``. With ``search_root`` the examples are also indexed for
+    similar-utterance search, and with ``quantize`` an int8 copy of the model
+    is saved too.
+
+    The outcome travels through the progress queue behind the job's other
+    events, so listeners never see a job finish before its last message.
+    """
+    _emit(job_id, "started", time.time())
+    try:
+        result = _train(job_id, backend, model_root, workspace, training_text, training_path, max_iter,
+                        base_version, mode, epochs, batch_size, search_root, quantize)
+    except Exception as e:
+        _emit(job_id, "failed", str(e))
+    else:
+        _emit(job_id, "completed", result)
+
+
+@dataclass
+class TrainingJob:
+    """State of one submitted training job as seen by the UI"""
+    job_id: str
+    backend: str
+    status: str = QUEUED
+    # Saved version an incremental update starts from; None for full training
+    base_version: Optional[str] = None
+    mode: str = FULL_BATCH
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # L-BFGS iterations, or epochs in OUT_OF_CORE mode
+    iteration: int = 0
+    max_iter: int = 0
+    loss: Optional[float] = None
+    eta: Optional[float] = None
+    messages: List[str] = field(default_factory=list)
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    revision: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED, CANCELLED)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the iteration budget used; 1.0 once finished"""
+        if self.done:
+            return 1.0
+        return self.iteration / self.max_iter if self.max_iter else 0.0
+
+    def progress_text(self) -> str:
+        """Multi-line progress log for display"""
+        kind = f"update of {self.backend}/{self.base_version}" if self.base_version else self.backend
+        if self.mode == OUT_OF_CORE:
+            kind += ", out of core"
+        lines = [f"🆔 Job {self.job_id} ({kind}): {self.status}"]
+        lines.extend(self.messages)
+        if self.status == RUNNING and self.iteration:
+            eta = f"ETA ≤ {self.eta:.1f}s" if self.eta is not None else "estimating ETA..."
+            step = "Epoch" if self.mode == OUT_OF_CORE else "Iteration"
+            lines.append(f"🔄 {step} {self.iteration}/{self.max_iter} - loss {self.loss:.4f} - {eta}")
+        if self.status == COMPLETED:
+            lines.append("✅ Training completed successfully!")
+        if self.status == CANCELLED:
+            lines.append(f"🚫 Training cancelled: {self.error}")
+        elif self.error:
+            lines.append(f"❌ Training failed: {self.error}")
+        return "\n".join(lines)
+
+
+class TrainingJobQueue:
+    """Process-pool backed queue of training jobs with streamed progress"""
+
+    def __init__(self, model_root: str, max_workers: Optional[int] = None,
+                 on_complete: Optional[Callable[[TrainingJob], None]] = None,
+                 search_root: Optional[str] = DEFAULT_SEARCH_INDEX_DIR):
+        self.model_root = model_root
+        self.search_root = search_root
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.on_complete = on_complete
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._ids = itertools.count(1)
+        self._changed = threading.Condition()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        # Created on first use, and again after a crash broke the last one;
+        # "spawn" keeps workers independent of the UI's threads
+        with self._changed:
+            if self._executor is None:
+                ctx = mp.get_context("spawn")
+                # Each pool gets its own progress queue: a worker killed in the middle of a put
+                # leaves the queue's lock held or half a message in its pipe. The listener of a
+                # broken pool's queue stays blocked on it, an idle daemon thread
+                queue = ctx.Queue()
+                threading.Thread(target=self._listen, args=(queue,), name="training-job-listener",
+                                 daemon=True).start()
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=ctx,
+                                                     initializer=_init_worker, initargs=(queue,))
+            return self._executor
+
+    def _update(self, job_id: str, fn: Callable[[TrainingJob], None]) -> None:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                fn(job)
+                job.revision += 1
+            self._changed.notify_all()
+
+    def _listen(self, queue) -> None:
+        while True:
+            job_id, kind, payload = queue.get()
+            if kind == "started":
+                self._update(job_id, lambda job: (setattr(job, "status", RUNNING),
+                                                  setattr(job, "started_at", payload)))
+            elif kind == "message":
+                self._update(job_id, lambda job: job.messages.append(payload))
+            elif kind == "progress":
+                self._update(job_id, lambda job: job.__dict__.update(payload))
+            elif kind in (COMPLETED, FAILED):
+                self._finish(job_id, kind, payload)
+
+    def _finish(self, job_id: str, status: str, payload) -> None:
+        job = self._jobs[job_id]
+        if job.done:
+            return
+        if status == COMPLETED:
+            self._update(job_id, lambda j: setattr(j, "result", payload))
+            # Install the new model before followers are told the job is done
+            if self.on_complete:
+                try:
+                    self.on_complete(job)
+                except Exception as e:
+                    self._update(job_id, lambda j: j.messages.append(f"⚠️ Could not load the new model: {e}"))
+
+        def apply(job: TrainingJob) -> None:
+            if status != COMPLETED:
+                job.error = payload
+            job.status, job.finished_at = status, time.time()
+
+        self._update(job_id, apply)
+
+    def _discard_pool(self, executor: ProcessPoolExecutor) -> None:
+        # A killed worker breaks the whole pool; the next submit starts a new one.
+        # Only the broken pool is dropped, not one a later submit already replaced it with
+        with self._changed:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _worker_exited(self, job_id: str, future, executor: ProcessPoolExecutor) -> None:
+        # Only a crashed worker process or a shutdown surfaces here; normal outcomes arrive via the queue
+        if future.cancelled():
+            # shutdown(cancel_futures=True) dropped the job before a worker picked it up
+            self._finish(job_id, CANCELLED, "the queue shut down before the job started")
+            return
+        error = future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            self._discard_pool(executor)
+        self._finish(job_id, FAILED, f"worker process died: {error}")
+
+    def submit(self, backend: str, training_text: Optional[str] = None, training_path: Optional[str] = None,
+               workspace: str = DEFAULT_WORKSPACE, max_iter: int = 200, base_version: Optional[str] = None,
+               mode: str = FULL_BATCH, epochs: int = DEFAULT_EPOCHS, batch_size: int = DEFAULT_BATCH_SIZE,
+               quantize: bool = False) -> str:
+        """Queue a training job and return its ID immediately
+
+        Pass ``base_version`` to update that saved model with the examples
+        instead of training a new one from them, or ``mode=OUT_OF_CORE`` to
+        stream them through mini-batch SGD for ``epochs`` epochs. With
+        ``quantize`` the job also exports an int8 copy of the model.
+        Raises ``ValueError`` for a malformed workspace or backend name.
+        """
+        check_name(workspace)
+        check_name(backend, "backend")
+        job_id = f"job-{next(self._ids):04d}"
+        budget = epochs if mode == OUT_OF_CORE else max_iter
+        with self._changed:
+            self._jobs[job_id] = TrainingJob(job_id, backend, base_version=base_version, mode=mode,
+                                             max_iter=budget)
+        args = (run_training_job, job_id, backend, self.model_root, workspace, training_text, training_path,
+                max_iter, base_version, mode, epochs, batch_size, self.search_root, quantize)
+        executor = self._ensure_pool()
+        try:
+            future = executor.submit(*args)
+        except BrokenProcessPool:
+            # Broke before the crashed job's callback ran; retry once on a fresh pool
+            self._discard_pool(executor)
+            executor = self._ensure_pool()
+            future = executor.submit(*args)
+        future.add_done_callback(lambda f: self._worker_exited(job_id, f, executor))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[TrainingJob]:
+        """All jobs, newest first"""
+        return sorted(self._jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+
+    def follow(self, job_id: str, timeout: float = 1.0) -> Iterator[TrainingJob]:
+        """Yield the job every time it changes (or every ``timeout`` seconds) until it finishes"""
+        revision = -1
+        while True:
+            with self._changed:
+                job = self._jobs[job_id]
+                if job.revision == revision and not job.done:
+                    self._changed.wait(timeout)
+                revision = job.revision
+            yield job
+            if job.done:
+                return
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
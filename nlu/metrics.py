@@ -0,0 +1,100 @@
+"""
+Evaluation metrics
+==================
+
+Confusion matrix and per-intent precision / recall / F1 computed from integer
+label arrays. The matrix is built with a single ``np.bincount`` over
+``true * k + pred`` and every metric is derived from it, so the cost is
+O(n + k²) regardless of how many rows were scored.
+"""
+
+from typing import Dict, List, Union
+
+import numpy as np
+
+from .dataset import NLUDataset
+from .engine import UNKNOWN_INTENT, IntentEngine
+
+
+def confusion_matrix(y_true: np.ndarray, y_pred: np.ndarray, n_classes: int) -> np.ndarray:
+    """``(k, k)`` counts with true labels on rows and predictions on columns"""
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_pred = np.asarray(y_pred, dtype=np.int64)
+    flat = np.bincount(y_true * n_classes + y_pred, minlength=n_classes * n_classes)
+    return flat.reshape(n_classes, n_classes)
+
+
+def _safe_divide(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    return np.divide(num, den, out=np.zeros(len(num), dtype=np.float64), where=den > 0)
+
+
+def classification_report(cm: np.ndarray, labels: List[str]) -> Dict:
+    """Per-label and averaged precision / recall / F1 from a confusion matrix"""
+    tp = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    precision = _safe_divide(tp, predicted)
+    recall = _safe_divide(tp, support)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    total = support.sum()
+
+    per_label = {
+        label: {
+            "precision": float(precision[i]),
+            "recall": float(recall[i]),
+            "f1-score": float(f1[i]),
+            "support": int(support[i]),
+        }
+        for i, label in enumerate(labels)
+        if support[i] or predicted[i]
+    }
+    # Averages only cover labels that occur in the test set
+    present = support > 0
+    weights = support[present] / total if total else support[present]
+    micro = float(tp.sum() / total) if total else 0.0
+    return {
+        "labels": per_label,
+        "accuracy": micro,
+        "macro avg": {
+            "precision": float(precision[present].mean()) if present.any() else 0.0,
+            "recall": float(recall[present].mean()) if present.any() else 0.0,
+            "f1-score": float(f1[present].mean()) if present.any() else 0.0,
+            "support": int(total),
+        },
+        "micro avg": {"precision": micro, "recall": micro, "f1-score": micro, "support": int(total)},
+        "weighted avg": {
+            "precision": float(np.dot(precision[present], weights)),
+            "recall": float(np.dot(recall[present], weights)),
+            "f1-score": float(np.dot(f1[present], weights)),
+            "support": int(total),
+        },
+    }
+
+
+def evaluate(engine: IntentEngine, examples: Union[List[Dict], NLUDataset], batch_size: int = 8192,
+             feature_cache=None) -> Dict:
+    """Score labelled ``examples`` with ``engine`` in batches and build the report
+
+    Test intents the model has never seen get their own confusion-matrix rows,
+    and utterances the model cannot featurize count as ``unknown``. With a
+    ``nlu.feature_cache.FeatureCache``, re-evaluating an unchanged test set
+    skips tokenizing and hashing.
+    """
+    dataset = examples if isinstance(examples, NLUDataset) else NLUDataset.from_examples(examples)
+    counts = feature_cache.count_matrix(dataset, engine.featurizer)[0] if feature_cache is not None else None
+    dataset = dataset.with_vocab(list(engine.intents) + [UNKNOWN_INTENT])
+    labels = dataset.intent_vocab
+    y_true = dataset.intent_codes.astype(np.int64)
+    y_pred = np.empty(len(dataset), dtype=np.int64)
+    for start in range(0, len(dataset), batch_size):
+        if counts is not None:
+            y_pred[start:start + batch_size] = engine.predict_labels_from_counts(counts[start:start + batch_size])
+        else:
+            y_pred[start:start + batch_size] = engine.predict_labels(dataset[start:start + batch_size].texts())
+
+    cm = confusion_matrix(y_true, y_pred, len(labels))
+    report = classification_report(cm, labels)
+    keep = (cm.sum(axis=0) + cm.sum(axis=1)) > 0
+    report["confusion_matrix"] = cm[np.ix_(keep, keep)]
+    report["confusion_labels"] = [label for label, k in zip(labels, keep) if k]
+    return report
@@ -0,0 +1,225 @@
+"""
+Out-of-core training
+====================
+
+``IntentEngine.train`` holds the corpus' whole TF-IDF matrix in memory and
+fits it with full-batch L-BFGS. This module trains the same model from a
+stream of examples of any length. Memory is bounded by the chunk size and
+the fixed-width hashed feature space (``n_features x n_classes`` weights),
+never by the number of utterances or the size of their vocabulary::
+
+    with ChunkedCorpus.from_examples(iter_examples(path, "jsonl"), backend="rasa") as corpus:
+        engine = train_sgd(corpus, epochs=5, batch_size=64)
+        report = evaluate_corpus(engine, corpus)
+
+1. ``ChunkedCorpus`` reads ``chunk_size`` examples at a time, hashes them
+   into raw count matrices, adds their document frequencies to the
+   featurizer and spills each chunk to a scratch directory.
+2. ``train_sgd`` runs mini-batch SGD on the same L2-regularised softmax
+   loss. Every epoch visits the chunk index in a fresh random order and
+   shuffles the rows of the one chunk it has memory-mapped, so the corpus is
+   reshuffled without ever being loaded as a whole.
+3. ``evaluate_corpus`` scores the spilled chunks for the training report.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .classifier import SoftmaxClassifier, softmax
+from .engine import BACKEND_PRESETS, UNKNOWN_INTENT, IntentEngine, build_entity_lexicon
+from .featurizer import FeaturizerConfig, HashingTfidfFeaturizer
+from .ingest import iter_batches
+from .metrics import classification_report, confusion_matrix
+
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_EPOCHS = 5
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_LEARNING_RATE = 2.0
+
+_ARRAYS = ("data", "indices", "indptr", "labels")
+
+
+class ChunkedCorpus:
+    """A streamed corpus as raw hashed count matrices spilled to disk chunk by chunk"""
+
+    def __init__(self, backend: str = "rasa", root: Optional[str] = None):
+        self.backend = backend
+        self.featurizer = HashingTfidfFeaturizer(BACKEND_PRESETS.get(backend, FeaturizerConfig()))
+        # A root we created is ours to delete on close
+        self._owns_root = root is None
+        self.root = tempfile.mkdtemp(prefix="nlu-chunks-") if root is None else root
+        os.makedirs(self.root, exist_ok=True)
+        self.chunk_rows: List[int] = []
+        self.intent_vocab: List[str] = []
+        self.entity_lexicon: Dict[str, str] = {}
+        self._intent_index: Dict[str, int] = {}
+
+    @classmethod
+    def from_examples(cls, examples: Iterable[Dict], backend: str = "rasa", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      root: Optional[str] = None) -> "ChunkedCorpus":
+        """Featurize and spill a stream of example dicts, holding one chunk of them at a time"""
+        corpus = cls(backend, root)
+        try:
+            for chunk in iter_batches(examples, chunk_size):
+                corpus.add(chunk)
+        except BaseException:
+            corpus.close()
+            raise
+        return corpus
+
+    def __len__(self) -> int:
+        return sum(self.chunk_rows)
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self.chunk_rows)
+
+    def add(self, examples: List[Dict]) -> None:
+        """Append one chunk of example dicts"""
+        labels = np.array([self._intent_index.setdefault(str(example["intent"]), len(self._intent_index))
+                           for example in examples], dtype=np.int32)
+        self.intent_vocab = list(self._intent_index)
+        build_entity_lexicon(examples, self.entity_lexicon)
+        counts = self.featurizer.count_matrix(str(example["text"]) for example in examples)
+        self.featurizer.update_stats(counts)
+        path = os.path.join(self.root, f"chunk-{self.n_chunks:06d}")
+        os.makedirs(path)
+        arrays = {"data": counts.data, "indices": counts.indices, "indptr": counts.indptr, "labels": labels}
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+        self.chunk_rows.append(len(examples))
+
+    def chunk(self, i: int) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """Memory-mapped ``(counts, intent codes)`` of chunk ``i``"""
+        path = os.path.join(self.root, f"chunk-{i:06d}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        counts = sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                               shape=(self.chunk_rows[i], self.featurizer.config.n_features))
+        return counts, arrays["labels"]
+
+    def close(self) -> None:
+        if self._owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self) -> "ChunkedCorpus":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _sorted_intents(corpus: ChunkedCorpus) -> Tuple[List[str], np.ndarray]:
+    # Same class order as IntentEngine.train: intents sorted by name
+    intents = sorted(corpus.intent_vocab)
+    remap = np.array([intents.index(intent) for intent in corpus.intent_vocab], dtype=np.int64)
+    return intents, remap
+
+
+def train_sgd(corpus: ChunkedCorpus, epochs: int = DEFAULT_EPOCHS, batch_size: int = DEFAULT_BATCH_SIZE,
+              alpha: float = 1e-4, learning_rate: float = DEFAULT_LEARNING_RATE, seed: int = 0,
+              callback: Optional[Callable[[int, float], None]] = None) -> IntentEngine:
+    """Train an engine on a ``ChunkedCorpus`` with mini-batch SGD
+
+    Minimises the mean softmax loss plus ``alpha / 2 * ||W||^2``, with step
+    size ``learning_rate / (1 + learning_rate * alpha * t)`` at step ``t``.
+    ``callback(epoch, loss)`` reports the mean training loss of every epoch.
+    Each step only touches the weight rows of the features in its
+    mini-batch.
+    """
+    started = time.perf_counter()
+    if not len(corpus):
+        raise ValueError("No training examples provided")
+    if len(corpus.intent_vocab) < 2:
+        raise ValueError("At least two different intents are needed to train a classifier")
+    if epochs < 1 or batch_size < 1:
+        raise ValueError("epochs and batch_size must be positive")
+    intents, remap = _sorted_intents(corpus)
+    featurizer = corpus.featurizer
+    n_classes = len(intents)
+    rng = np.random.default_rng(seed)
+
+    # W = scale * V, so the L2 shrinkage of every weight is one scalar update per step
+    V = np.zeros((featurizer.config.n_features, n_classes), dtype=np.float32)
+    scale = 1.0
+    b = np.zeros(n_classes, dtype=np.float64)
+    step = 0
+    for epoch in range(1, epochs + 1):
+        total_loss = 0.0
+        for i in rng.permutation(corpus.n_chunks):
+            counts, labels = corpus.chunk(i)
+            order = rng.permutation(counts.shape[0])
+            # Only this chunk's rows are read into memory, in shuffled order
+            X = featurizer.weight(counts[order])
+            y = remap[labels[order]]
+            for start in range(0, X.shape[0], batch_size):
+                X_batch, y_batch = X[start:start + batch_size], y[start:start + batch_size]
+                m = X_batch.shape[0]
+                active = np.unique(X_batch.indices)
+                X_active = sp.csr_matrix((X_batch.data, np.searchsorted(active, X_batch.indices), X_batch.indptr),
+                                         shape=(m, len(active)))
+                P = softmax((X_active @ V[active]).astype(np.float64) * scale + b)
+                total_loss -= np.log(P[np.arange(m), y_batch] + 1e-12).sum()
+                P[np.arange(m), y_batch] -= 1.0
+                G = P / m
+
+                lr = learning_rate / (1.0 + learning_rate * alpha * step)
+                scale *= 1.0 - lr * alpha
+                V[active] -= ((lr / scale) * (X_active.T @ G)).astype(np.float32)
+                b -= lr * G.sum(axis=0)
+                if scale < 1e-6:
+                    V *= scale
+                    scale = 1.0
+                step += 1
+        if callback:
+            W_norm = float(np.sum(V.astype(np.float64) ** 2)) * scale * scale
+            callback(epoch, total_loss / len(corpus) + 0.5 * alpha * W_norm)
+
+    classifier = SoftmaxClassifier(alpha=alpha, max_iter=epochs)
+    classifier.coef_ = V * np.float32(scale)
+    classifier.intercept_ = b.astype(np.float32)
+    classifier.n_iter_ = epochs
+    engine = IntentEngine(featurizer, classifier, intents, corpus.entity_lexicon, corpus.backend)
+    engine.training_stats = {
+        "samples": len(corpus),
+        "intents": n_classes,
+        "iterations": epochs,
+        "epochs": epochs,
+        "batch_size": batch_size,
+        "chunks": corpus.n_chunks,
+        "training_time": time.perf_counter() - started,
+    }
+    return engine
+
+
+def evaluate_corpus(engine: IntentEngine, corpus: ChunkedCorpus) -> Dict:
+    """``nlu.metrics.evaluate`` over a ``ChunkedCorpus``, one chunk at a time
+
+    Also records the accuracy as ``training_accuracy`` in the engine's
+    ``training_stats`` when the engine was trained on this corpus.
+    """
+    labels = list(engine.intents) + [UNKNOWN_INTENT]
+    index = {label: i for i, label in enumerate(labels)}
+    # Corpus intents the engine does not know get their own confusion-matrix rows
+    for intent in corpus.intent_vocab:
+        index.setdefault(intent, len(labels))
+        if len(labels) == index[intent]:
+            labels.append(intent)
+    remap = np.array([index[intent] for intent in corpus.intent_vocab], dtype=np.int64)
+    cm = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    for i in range(corpus.n_chunks):
+        counts, codes = corpus.chunk(i)
+        cm += confusion_matrix(remap[codes], engine.predict_labels_from_counts(counts), len(labels))
+
+    report = classification_report(cm, labels)
+    keep = (cm.sum(axis=0) + cm.sum(axis=1)) > 0
+    report["confusion_matrix"] = cm[np.ix_(keep, keep)]
+    report["confusion_labels"] = [label for label, k in zip(labels, keep) if k]
+    if engine.featurizer is corpus.featurizer:
+        engine.training_stats["training_accuracy"] = report["accuracy"]
+    return report
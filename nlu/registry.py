@@ -0,0 +1,197 @@
+"""
+Model registry
+==============
+
+One process serves many workspaces, each with its own model per backend.
+``ModelRegistry`` keeps the engines in use resident, keyed by
+``(workspace, backend, version)``:
+
+* Artifacts load lazily from the ``ModelStore`` on first use. Concurrent
+  first requests for the same model wait on a single load.
+* Hot models stay resident, so routing a request to a model costs one
+  dict lookup.
+* Cold models are evicted least recently used first once the resident
+  models' ``model_size_bytes`` exceed the RAM budget. The model just
+  requested is never evicted, even if it alone exceeds the budget.
+
+A request without a version routes to the latest saved version. The store
+is listed again at most every ``refresh_seconds``, so a version saved by
+another process (a UI, a training worker) is picked up within that delay;
+``install`` switches to a version saved in this process immediately.
+
+Workspace and backend names must be plain directory names
+(``check_name``). Only the default workspace falls back to a sample-data
+model; a request for anything else with no saved model raises ``KeyError``,
+so arbitrary names cannot make the registry train and keep models.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .artifact import DEFAULT_WORKSPACE, ModelStore, check_name
+from .engine import IntentEngine
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("NLU_REGISTRY_MAX_MB", "1024")) * (1 << 20))
+DEFAULT_REFRESH_SECONDS = 1.0
+
+# Version key for engines with no saved artifact (e.g. the sample-data fallback)
+UNSAVED = "unsaved"
+
+Key = Tuple[str, str, str]
+
+
+class ModelRegistry:
+    """Lazily loaded engines keyed by (workspace, backend, version) under a RAM budget"""
+
+    def __init__(self, store: ModelStore, max_bytes: int = DEFAULT_MAX_BYTES, max_models: Optional[int] = None,
+                 fallback: Optional[Callable[[str], IntentEngine]] = None,
+                 refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        # Builds an engine for a backend that has nothing saved yet
+        self.fallback = fallback
+        self.refresh_seconds = refresh_seconds
+        self._models: "OrderedDict[Key, Tuple[IntentEngine, int]]" = OrderedDict()
+        # (workspace, backend) -> (latest version, time.monotonic() it was read from the store)
+        self._latest: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._loading: Dict[Key, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._models
+
+    def _resolve(self, workspace: str, backend: str) -> str:
+        now = time.monotonic()
+        cached = self._latest.get((workspace, backend))
+        if cached is not None and now - cached[1] < self.refresh_seconds:
+            return cached[0]
+        versions = self.store.versions(backend, workspace)
+        if not versions and (self.fallback is None or workspace != DEFAULT_WORKSPACE):
+            # Not cached, so a model saved later by another process is still found
+            raise KeyError(f"No saved model for {backend!r} in workspace {workspace!r}")
+        latest = versions[-1] if versions else UNSAVED
+        with self._lock:
+            self._latest[(workspace, backend)] = (latest, now)
+            if latest != UNSAVED:
+                self._drop_fallback(workspace, backend)
+        return latest
+
+    def _drop_fallback(self, workspace: str, backend: str) -> None:
+        # Nothing routes to the fallback once a real model exists
+        stale = self._models.pop((workspace, backend, UNSAVED), None)
+        if stale is not None:
+            self.nbytes -= stale[1]
+
+    def get(self, backend: str, workspace: str = DEFAULT_WORKSPACE, version: Optional[str] = None) -> IntentEngine:
+        """Resident engine for the key, loading it on first use
+
+        Raises ``ValueError`` for a malformed workspace or backend name and
+        ``KeyError`` when there is no such model.
+        """
+        check_name(workspace)
+        check_name(backend, "backend")
+        key = (workspace, backend, version or self._resolve(workspace, backend))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            # Another thread may have finished the same load while we waited
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+            started = time.perf_counter()
+            try:
+                engine = self._load(*key)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+            with self._lock:
+                self.load_seconds += time.perf_counter() - started
+                self.loads += 1
+                self._insert(key, engine)
+                self._loading.pop(key, None)
+        return engine
+
+    def _load(self, workspace: str, backend: str, version: str) -> IntentEngine:
+        if version != UNSAVED:
+            return self.store.load(backend, version, workspace)
+        if self.fallback is None or workspace != DEFAULT_WORKSPACE:
+            raise KeyError(f"No saved model for {backend!r} in workspace {workspace!r}")
+        return self.fallback(backend)
+
+    def _insert(self, key: Key, engine: IntentEngine) -> None:
+        if key in self._models:
+            self.nbytes -= self._models.pop(key)[1]
+        size = engine.model_size_bytes
+        self._models[key] = (engine, size)
+        self.nbytes += size
+        while len(self._models) > 1 and (
+                self.nbytes > self.max_bytes or (self.max_models is not None and len(self._models) > self.max_models)):
+            _, (_, evicted) = self._models.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def install(self, backend: str, version: str, workspace: str = DEFAULT_WORKSPACE) -> IntentEngine:
+        """Route unversioned requests to a newly saved ``version`` and load it now"""
+        with self._lock:
+            self._latest[(workspace, backend)] = (version, time.monotonic())
+            self._drop_fallback(workspace, backend)
+        return self.get(backend, workspace, version)
+
+    def evict(self, backend: Optional[str] = None, workspace: Optional[str] = None) -> int:
+        """Drop resident models (all, or those matching the filters) and return how many
+
+        Their latest-version pointers are forgotten too, so the next request
+        re-reads the store.
+        """
+        with self._lock:
+            for pair in [pair for pair in self._latest
+                         if (workspace is None or pair[0] == workspace) and (backend is None or pair[1] == backend)]:
+                del self._latest[pair]
+            keys = [key for key in self._models
+                    if (workspace is None or key[0] == workspace) and (backend is None or key[1] == backend)]
+            for key in keys:
+                self.nbytes -= self._models.pop(key)[1]
+            return len(keys)
+
+    def resident(self) -> List[Dict]:
+        """Resident models, most recently used first"""
+        with self._lock:
+            items = list(self._models.items())
+        return [{"workspace": workspace, "backend": backend, "version": version,
+                 "intents": len(engine.intents), "size_mb": size / (1 << 20)}
+                for (workspace, backend, version), (engine, size) in reversed(items)]
+
+    def stats(self) -> Dict:
+        """Counters plus current residency"""
+        lookups = self.hits + self.loads
+        return {
+            "models": len(self._models),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "loads": self.loads,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "load_seconds": self.load_seconds,
+        }
@@ -0,0 +1,452 @@
+"""
+Similar-utterance search
+========================
+
+When a prediction is wrong, the first thing to look at is the training
+examples closest to the query. ``SimilarityIndex`` is a persisted inverted
+index over hashed TF-IDF vectors of a training corpus. ``search`` returns the
+``k`` labelled utterances with the highest cosine similarity to a query::
+
+    <root>/<workspace>/<backend>/
+        manifest.json                  generation, featurizer config, intents, live segments
+        stats-<generation>-<id>/       doc_freq.npy  idf.npy
+        seg-<id>/
+            post_indptr.npy  post_rows.npy  post_tf.npy    feature -> (row, term frequency) postings
+            norms.npy                                      TF-IDF norm of every row
+            text_buffer.npy  text_offsets.npy  intent_codes.npy
+
+A query only reads the posting lists of its own features, so its cost grows
+with the number of rows sharing its terms rather than with the corpus. Each
+list is stored highest-impact row first. Setting ``max_postings`` reads only
+that many entries of each list, which bounds latency on corpora dominated by
+a few very common terms at some cost in recall.
+
+New examples are written as a new immutable segment, and the document
+frequencies are updated. Existing segments are not rewritten, so adding is
+cheap. IDF weights are applied at query time, so old segments score with the
+current IDF too; only their stored norms lag until a merge. Once there are
+more than ``max_segments`` segments, the small ones are merged. A merge
+streams into memory-mapped output files, one input segment or block of
+features at a time, so it never holds the merged index in memory. A commit
+replaces ``manifest.json`` atomically, and other processes pick up the new
+generation with ``reload``. A generation is identified by its uniquely named
+statistics directory rather than its number, so when two writers commit
+from the same base, readers still switch to whichever manifest is current.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from .artifact import DEFAULT_WORKSPACE, check_name
+from .dataset import NLUDataset
+from .featurizer import FeaturizerConfig, HashingTfidfFeaturizer
+
+INDEX_FORMAT = 1
+DEFAULT_SEARCH_INDEX_DIR = os.environ.get("NLU_SEARCH_INDEX_DIR", "nlu_search_index")
+DEFAULT_MAX_SEGMENTS = 8
+# Rows or postings copied per step of a merge; bounds its memory whatever the index size
+DEFAULT_MERGE_BLOCK = 1 << 20
+
+# Word unigrams and bigrams: close enough for "nearest training example"
+# and far fewer postings per query than character n-grams
+SEARCH_FEATURIZER = FeaturizerConfig(word_ngrams=(1, 2))
+
+_SEGMENT_ARRAYS = ("post_indptr", "post_rows", "post_tf", "norms", "text_buffer", "text_offsets", "intent_codes")
+
+
+class _Segment:
+    """One immutable, memory-mapped slice of the index"""
+
+    def __init__(self, path: str):
+        self.name = os.path.basename(path)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _SEGMENT_ARRAYS}
+        self.post_indptr, self.post_rows, self.post_tf = arrays["post_indptr"], arrays["post_rows"], arrays["post_tf"]
+        self.norms = arrays["norms"]
+        self.text_buffer, self.text_offsets = arrays["text_buffer"], arrays["text_offsets"]
+        self.intent_codes = arrays["intent_codes"]
+
+    def __len__(self) -> int:
+        return len(self.norms)
+
+    def text(self, i: int) -> str:
+        return self.text_buffer[self.text_offsets[i]:self.text_offsets[i + 1]].tobytes().decode("utf-8")
+
+    def search(self, features: np.ndarray, weights: np.ndarray, k: int,
+               max_postings: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Best ``k`` rows and their cosine scores for a query's IDF-weighted features"""
+        starts = self.post_indptr[features]
+        ends = self.post_indptr[features + 1]
+        if max_postings is not None:
+            ends = np.minimum(ends, starts + max_postings)
+        total = int((ends - starts).sum())
+        if not total:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        if total * 16 < len(self):
+            # Few postings: accumulate only the rows they touch
+            rows = np.concatenate([self.post_rows[a:b] for a, b in zip(starts, ends)])
+            values = np.concatenate([self.post_tf[a:b] * w for a, b, w in zip(starts, ends, weights)])
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=values) / self.norms[rows]
+        else:
+            # A row appears once per posting list, so a plain scatter-add per feature is safe
+            scores = np.zeros(len(self), dtype=np.float32)
+            for a, b, w in zip(starts, ends, weights):
+                scores[self.post_rows[a:b]] += self.post_tf[a:b] * np.float32(w)
+            scores /= self.norms
+            rows = np.arange(len(self))
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        keep = scores > 0
+        return rows[keep], scores[keep].astype(np.float64)
+
+
+def _sublinear(featurizer: HashingTfidfFeaturizer, counts: sp.csr_matrix) -> sp.csr_matrix:
+    data = np.log1p(counts.data) if featurizer.config.sublinear_tf else counts.data
+    return sp.csr_matrix((data.astype(np.float32), counts.indices, counts.indptr), shape=counts.shape)
+
+
+class SimilarityIndex:
+    """Persisted, incrementally updated top-k cosine search over labelled utterances"""
+
+    def __init__(self, root: str, config: Optional[FeaturizerConfig] = None,
+                 max_segments: int = DEFAULT_MAX_SEGMENTS, max_postings: Optional[int] = None):
+        self.root = root
+        self.max_segments = max_segments
+        self.max_postings = max_postings
+        self._config = config or SEARCH_FEATURIZER
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._manifest_mtime: Optional[int] = None
+        self._stats_dir: Optional[str] = None
+        # Uncommitted changes: segments written, and committed ones to delete after the next commit
+        self._dirty = False
+        self._written: List[str] = []
+        self._retired: List[str] = []
+        self._clear()
+        self.reload()
+
+    def _clear(self) -> None:
+        self.featurizer = HashingTfidfFeaturizer(self._config)
+        self.intent_vocab: List[str] = []
+        self.segments: List[_Segment] = []
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments)
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.root, "manifest.json")
+
+    # ------------------------------------------------------------------ reading
+
+    def reload(self) -> bool:
+        """Switch to a generation committed by another process; ``True`` if one was loaded"""
+        try:
+            mtime = os.stat(self._manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._manifest_mtime or self._dirty:
+            return False
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["stats"] == self._stats_dir:
+                self._manifest_mtime = mtime
+                return False
+            featurizer = HashingTfidfFeaturizer(FeaturizerConfig.from_dict(manifest["featurizer"]))
+            stats = os.path.join(self.root, manifest["stats"])
+            featurizer.doc_freq = np.load(os.path.join(stats, "doc_freq.npy"), mmap_mode="r")
+            featurizer.idf = np.load(os.path.join(stats, "idf.npy"), mmap_mode="r")
+            featurizer.n_docs = manifest["n_docs"]
+            segments = [_Segment(os.path.join(self.root, name)) for name in manifest["segments"]]
+        except (FileNotFoundError, ValueError, KeyError):
+            # Caught between a writer's commit and its cleanup; the next call retries
+            return False
+        with self._lock:
+            self.featurizer, self.intent_vocab, self.segments = featurizer, manifest["intents"], segments
+            self.generation, self._manifest_mtime, self._stats_dir = manifest["generation"], mtime, manifest["stats"]
+        return True
+
+    def search(self, text: str, k: int = 5) -> List[Dict]:
+        """The ``k`` indexed utterances most similar to ``text``, best first
+
+        Each result has ``text``, ``intent`` and ``similarity`` (cosine of
+        the TF-IDF vectors). Utterances that share no term with ``text`` are
+        never returned.
+        """
+        with self._lock:
+            featurizer, segments, intents = self.featurizer, self.segments, self.intent_vocab
+        query = featurizer.transform([text])
+        if not query.nnz or k < 1:
+            return []
+        # Rows hold raw term frequencies; applying the IDF here too makes the score a TF-IDF cosine
+        weights = query.data.astype(np.float64) * featurizer.idf[query.indices]
+        hits = []
+        for segment in segments:
+            rows, scores = segment.search(query.indices, weights, k, self.max_postings)
+            hits.extend(zip(scores.tolist(), [segment] * len(rows), rows.tolist()))
+        hits.sort(key=lambda hit: -hit[0])
+        return [{"text": segment.text(row), "intent": intents[segment.intent_codes[row]],
+                 "similarity": min(score, 1.0)}
+                for score, segment, row in hits[:k]]
+
+    def stats(self) -> Dict:
+        return {"utterances": len(self), "segments": len(self.segments), "generation": self.generation,
+                "intents": len(self.intent_vocab)}
+
+    # ------------------------------------------------------------------ writing
+
+    def _write_segment(self, tf: sp.csr_matrix, text_buffer: np.ndarray, text_offsets: np.ndarray,
+                       intent_codes: np.ndarray) -> _Segment:
+        n_rows, n_features = tf.shape
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32), np.diff(tf.indptr))
+        weighted = tf.data.astype(np.float64) * self.featurizer.idf[tf.indices]
+        norms = np.sqrt(np.bincount(rows, weights=weighted ** 2, minlength=n_rows))
+        norms[norms == 0] = 1.0
+        # Feature-major postings, highest-impact rows first so long lists can be cut short
+        order = np.lexsort((-(tf.data / norms[rows]), tf.indices))
+        post_indptr = np.zeros(n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tf.indices, minlength=n_features), out=post_indptr[1:])
+        arrays = {"post_indptr": post_indptr, "post_rows": rows[order], "post_tf": tf.data[order],
+                  "norms": norms.astype(np.float32), "text_buffer": text_buffer,
+                  "text_offsets": text_offsets.astype(np.int64), "intent_codes": intent_codes.astype(np.int32)}
+        staging = self._staging_dir()
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return self._publish_segment(staging)
+
+    def _staging_dir(self) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+
+    def _publish_segment(self, staging: str) -> _Segment:
+        path = os.path.join(self.root, f"seg-{time.time_ns():x}-{os.getpid()}")
+        os.rename(staging, path)
+        self._written.append(os.path.basename(path))
+        return _Segment(path)
+
+    def _merge(self, segments: List[_Segment], block: int = DEFAULT_MERGE_BLOCK) -> _Segment:
+        """One segment holding ``segments``' rows, with norms under the current IDF
+
+        Everything is copied ``block`` rows or postings at a time straight
+        into memory-mapped output files, so memory does not grow with the
+        size of the segments.
+        """
+        idf = np.asarray(self.featurizer.idf, dtype=np.float64)
+        n_features = len(segments[0].post_indptr) - 1
+        n_rows = sum(map(len, segments))
+        post_indptr = np.zeros(n_features + 1, dtype=np.int64)
+        for segment in segments:
+            post_indptr[1:] += np.diff(segment.post_indptr)
+        np.cumsum(post_indptr, out=post_indptr)
+        row_starts = np.cumsum([0] + [len(segment) for segment in segments[:-1]])
+        staging = self._staging_dir()
+        try:
+            def output(name, length, dtype):
+                return np.lib.format.open_memmap(os.path.join(staging, f"{name}.npy"), mode="w+", dtype=dtype,
+                                                 shape=(int(length),))
+
+            def feature_blocks():
+                """Postings of whole features, about ``block`` at a time, as (rows, tf, features)"""
+                start = 0
+                while start < n_features:
+                    # A single feature longer than a block gets a block of its own
+                    stop = int(np.searchsorted(post_indptr, post_indptr[start] + block, side="right")) - 1
+                    stop = min(max(stop, start + 1), n_features)
+                    rows, tf, features = [], [], []
+                    for segment, row_start in zip(segments, row_starts):
+                        indptr = np.asarray(segment.post_indptr[start:stop + 1])
+                        rows.append(segment.post_rows[indptr[0]:indptr[-1]].astype(np.int64) + row_start)
+                        tf.append(segment.post_tf[indptr[0]:indptr[-1]])
+                        features.append(np.repeat(np.arange(start, stop), np.diff(indptr)))
+                    yield start, stop, np.concatenate(rows), np.concatenate(tf), np.concatenate(features)
+                    start = stop
+
+            # Rows and texts, a block of rows at a time
+            text_buffer = output("text_buffer", sum(len(segment.text_buffer) for segment in segments), np.uint8)
+            text_offsets = output("text_offsets", n_rows + 1, np.int64)
+            intent_codes = output("intent_codes", n_rows, np.int32)
+            text = 0
+            for segment, row_start in zip(segments, row_starts):
+                for a in range(0, len(segment), block):
+                    b = min(a + block, len(segment))
+                    offsets = np.asarray(segment.text_offsets[a:b + 1])
+                    text_buffer[text:text + offsets[-1] - offsets[0]] = segment.text_buffer[offsets[0]:offsets[-1]]
+                    text_offsets[row_start + a:row_start + b] = offsets[:-1] - offsets[0] + text
+                    intent_codes[row_start + a:row_start + b] = segment.intent_codes[a:b]
+                    text += int(offsets[-1] - offsets[0])
+            text_offsets[n_rows] = text
+
+            # Norms under the current IDF: one pass to accumulate squares, then the roots
+            norms = output("norms", n_rows, np.float32)
+            squares = output("squares", n_rows, np.float64)
+            for _, _, rows, tf, features in feature_blocks():
+                np.add.at(squares, rows, (tf * idf[features]) ** 2)
+            for a in range(0, n_rows, block):
+                root = np.sqrt(squares[a:a + block])
+                root[root == 0] = 1.0
+                norms[a:a + block] = root
+            del squares
+            os.remove(os.path.join(staging, "squares.npy"))
+
+            # Postings, highest-impact rows first within each feature as in _write_segment
+            np.save(os.path.join(staging, "post_indptr.npy"), post_indptr)
+            post_rows = output("post_rows", post_indptr[-1], np.int32)
+            post_tf = output("post_tf", post_indptr[-1], np.float32)
+            for start, stop, rows, tf, features in feature_blocks():
+                order = np.lexsort((-(tf / norms[rows]), features))
+                post_rows[post_indptr[start]:post_indptr[stop]] = rows[order]
+                post_tf[post_indptr[start]:post_indptr[stop]] = tf[order]
+            for array in (post_rows, post_tf, norms, text_buffer, text_offsets, intent_codes):
+                array.flush()
+            del post_rows, post_tf, norms, text_buffer, text_offsets, intent_codes
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return self._publish_segment(staging)
+
+    def add(self, examples: Union[NLUDataset, Iterable[Dict]], commit: bool = True) -> int:
+        """Index labelled examples as a new segment and return how many were added
+
+        With ``commit=False`` the additions stay private to this object until
+        ``commit``, so several batches can be published together.
+        """
+        dataset = examples if isinstance(examples, NLUDataset) else NLUDataset.from_examples(examples)
+        if not len(dataset):
+            return 0
+        # Build on whatever another process committed last
+        self.reload()
+        dataset = dataset.with_vocab(self.intent_vocab)
+        counts = self.featurizer.count_matrix(dataset.iter_texts())
+        featurizer = self.featurizer.copy()
+        featurizer.update_stats(counts)
+        offsets = dataset.text_offsets
+        text_buffer = dataset.text_buffer[offsets[0]:offsets[-1]]
+        with self._lock:
+            self.featurizer = featurizer
+            self.intent_vocab = dataset.intent_vocab
+        self._dirty = True
+        segment = self._write_segment(_sublinear(featurizer, counts), text_buffer, offsets - offsets[0],
+                                      dataset.intent_codes)
+        segments = self.segments + [segment]
+        if len(segments) > self.max_segments:
+            # Fold the small segments together; the big base segment joins once they outgrow it
+            segments.sort(key=len, reverse=True)
+            small = segments[1:] if sum(map(len, segments[1:])) < len(segments[0]) else segments
+            merged = self._merge(small)
+            self._retired.extend(segment.name for segment in small)
+            segments = [s for s in segments if s not in small] + [merged]
+        with self._lock:
+            self.segments = segments
+        if commit:
+            self.commit()
+        return len(dataset)
+
+    def compact(self) -> None:
+        """Merge every segment into one and refresh all norms for the current IDF"""
+        if self.segments:
+            merged = self._merge(self.segments)
+            self._retired.extend(segment.name for segment in self.segments)
+            with self._lock:
+                self.segments = [merged]
+        self.commit()
+
+    def reset(self) -> None:
+        """Start over with an empty index; the old one is served until ``commit``"""
+        self._retired.extend(segment.name for segment in self.segments)
+        self._dirty = True
+        with self._lock:
+            self._clear()
+
+    def rebuild(self, examples: Union[NLUDataset, Iterable[Dict]]) -> int:
+        """Replace the whole index with ``examples``"""
+        self.reset()
+        added = self.add(examples, commit=False)
+        self.commit()
+        return added
+
+    def commit(self) -> None:
+        """Publish the current state as a new generation and delete what it replaced"""
+        os.makedirs(self.root, exist_ok=True)
+        generation = max(self.generation, self._committed_generation()) + 1
+        # Unique, so concurrent writers never clobber each other's statistics
+        stats = f"stats-{generation}-{time.time_ns():x}-{os.getpid()}"
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        np.save(os.path.join(staging, "doc_freq.npy"), np.asarray(self.featurizer.doc_freq))
+        np.save(os.path.join(staging, "idf.npy"), np.asarray(self.featurizer.idf))
+        os.rename(staging, os.path.join(self.root, stats))
+        manifest = {"format": INDEX_FORMAT, "generation": generation, "featurizer": self.featurizer.config.to_dict(),
+                    "n_docs": int(self.featurizer.n_docs), "intents": self.intent_vocab, "stats": stats,
+                    "segments": [segment.name for segment in self.segments], "created_at": time.time()}
+        tmp = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_path)
+
+        live = set(manifest["segments"])
+        retired = [name for name in self._retired + self._written if name not in live]
+        if self._stats_dir and self._stats_dir != stats:
+            retired.append(self._stats_dir)
+        for name in retired:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        self._written, self._retired, self._dirty = [], [], False
+        self.generation, self._stats_dir = generation, stats
+        self._manifest_mtime = os.stat(self._manifest_path).st_mtime_ns
+
+    def _committed_generation(self) -> int:
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                return int(json.load(f)["generation"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+
+    def discard(self) -> None:
+        """Drop uncommitted additions and go back to the last committed generation"""
+        for name in self._written:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        self._written, self._retired, self._dirty = [], [], False
+        self.generation, self._manifest_mtime, self._stats_dir = 0, None, None
+        with self._lock:
+            self._clear()
+        self.reload()
+
+
+class SearchIndexStore:
+    """One ``SimilarityIndex`` per (workspace, backend) under a root directory"""
+
+    def __init__(self, root: str = DEFAULT_SEARCH_INDEX_DIR):
+        self.root = root
+        self._indexes: Dict[Tuple[str, str], SimilarityIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, backend: str, workspace: str = DEFAULT_WORKSPACE) -> SimilarityIndex:
+        """The index for ``backend``'s training corpus, refreshed if another process committed
+
+        Raises ``ValueError`` for a workspace or backend name that is not a
+        plain directory name. Getting an index never writes to disk.
+        """
+        path = os.path.realpath(os.path.join(self.root, check_name(workspace), check_name(backend, "backend")))
+        root = os.path.realpath(self.root)
+        # Guards against a symlinked workspace directory pointing outside the root
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Search index for {workspace}/{backend} resolves outside {self.root}")
+        with self._lock:
+            index = self._indexes.get((workspace, backend))
+            if index is None:
+                index = SimilarityIndex(path)
+                self._indexes[(workspace, backend)] = index
+        index.reload()
+        return index
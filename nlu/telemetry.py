@@ -0,0 +1,216 @@
+"""
+Latency telemetry
+=================
+
+In-process latency histograms for the prediction hot path.
+
+``LatencyHistogram`` uses HDR-style log-linear buckets. Each power of two
+is split into ``2 ** SUB_BUCKET_BITS`` linear sub-buckets, so every recorded
+value lands in a bucket within about 6% of it. Recording is one bit-length
+computation and a list increment; memory is fixed, however many values
+arrive.
+
+``LATENCY`` is the process-wide registry the engine records into, one
+histogram per stage (``featurize``, ``score``, ``entities``, ``format``, ...).
+It can be read as a snapshot dict or exported in the Prometheus text format.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values are nanoseconds; 2**40 ns is about 18 minutes, far beyond any request
+_MAX_SHIFT = 40
+_N_BUCKETS = (_MAX_SHIFT + 1) * _SUB_BUCKETS
+
+# Cumulative "le" bounds (seconds) for Prometheus export; fixed so rates stay comparable
+PROMETHEUS_BOUNDS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                     0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def bucket_index(value: int) -> int:
+    """Bucket holding ``value`` nanoseconds"""
+    if value < _SUB_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift >= _MAX_SHIFT:
+        return _N_BUCKETS - 1
+    return ((shift + 1) << SUB_BUCKET_BITS) + (value >> shift) - _SUB_BUCKETS
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """``[lower, upper)`` nanoseconds covered by bucket ``index``"""
+    if index < _SUB_BUCKETS:
+        return index, index + 1
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    lower = (_SUB_BUCKETS + (index & (_SUB_BUCKETS - 1))) << shift
+    return lower, lower + (1 << shift)
+
+
+class LatencyHistogram:
+    """Fixed-memory log-linear histogram of durations in nanoseconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * _N_BUCKETS
+            self.count = 0
+            self.total_ns = 0
+            self.min_ns: Optional[int] = None
+            self.max_ns = 0
+
+    def record(self, value_ns: int) -> None:
+        index = bucket_index(value_ns)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ns += value_ns
+            if self.min_ns is None or value_ns < self.min_ns:
+                self.min_ns = value_ns
+            if value_ns > self.max_ns:
+                self.max_ns = value_ns
+
+    def record_many(self, values_ns: np.ndarray) -> None:
+        """Record an array of durations in one vectorized pass"""
+        values = np.maximum(np.asarray(values_ns, dtype=np.int64), 0)
+        if not len(values):
+            return
+        # For v >= 1, frexp's exponent is v.bit_length() (exact below 2**53)
+        bit_length = np.frexp(values.astype(np.float64))[1].astype(np.int64)
+        shift = np.maximum(bit_length - SUB_BUCKET_BITS - 1, 0)
+        index = np.where(values < _SUB_BUCKETS, values,
+                         ((shift + 1) << SUB_BUCKET_BITS) + (values >> shift) - _SUB_BUCKETS)
+        index = np.minimum(index, _N_BUCKETS - 1)
+        counts = np.bincount(index, minlength=_N_BUCKETS)
+        with self._lock:
+            self._counts = [a + int(b) for a, b in zip(self._counts, counts)]
+            self.count += len(values)
+            self.total_ns += int(values.sum())
+            low, high = int(values.min()), int(values.max())
+            self.min_ns = low if self.min_ns is None else min(self.min_ns, low)
+            self.max_ns = max(self.max_ns, high)
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable state (non-empty buckets only)"""
+        with self._lock:
+            return {"buckets": {str(i): c for i, c in enumerate(self._counts) if c}, "count": self.count,
+                    "total_ns": self.total_ns, "min_ns": self.min_ns, "max_ns": self.max_ns}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls()
+        for index, count in data.get("buckets", {}).items():
+            histogram._counts[int(index)] = count
+        histogram.count = data.get("count", 0)
+        histogram.total_ns = data.get("total_ns", 0)
+        histogram.min_ns = data.get("min_ns")
+        histogram.max_ns = data.get("max_ns", 0)
+        return histogram
+
+    def buckets(self) -> List[Tuple[int, int, int]]:
+        """Non-empty ``(lower_ns, upper_ns, count)`` buckets in ascending order"""
+        with self._lock:
+            counts = list(self._counts)
+        return [(*bucket_bounds(i), c) for i, c in enumerate(counts) if c]
+
+    def percentile(self, q: float) -> float:
+        """Approximate ``q``-th percentile in seconds (bucket midpoint, clamped to min/max)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(q / 100 * self.count)))
+        seen = 0
+        for lower, upper, count in self.buckets():
+            seen += count
+            if seen >= rank:
+                value = (lower + upper - 1) / 2
+                return min(max(value, self.min_ns or 0), self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def cumulative_counts(self, bounds_seconds) -> List[int]:
+        """Values at or below each bound, counting a bucket once its upper edge fits"""
+        buckets = self.buckets()
+        out, i, seen = [], 0, 0
+        for bound in bounds_seconds:
+            limit = bound * 1e9
+            while i < len(buckets) and buckets[i][1] - 1 <= limit:
+                seen += buckets[i][2]
+                i += 1
+            out.append(seen)
+        return out
+
+    def summary(self) -> Dict:
+        """Count plus mean / percentiles / max in milliseconds"""
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": self.total_ns / count / 1e6 if count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max_ns / 1e6,
+        }
+
+
+class LatencyRegistry:
+    """Named latency histograms, created on first use"""
+
+    def __init__(self, namespace: str = "nlu"):
+        self.namespace = namespace
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def record(self, stage: str, value_ns: int) -> None:
+        self.histogram(stage).record(value_ns)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the ``with`` block into ``stage``"""
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - started)
+
+    def stages(self) -> List[str]:
+        return sorted(self._histograms)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-stage summaries, for APIs and the UIs"""
+        return {stage: self._histograms[stage].summary() for stage in self.stages()}
+
+    def reset(self) -> None:
+        for histogram in list(self._histograms.values()):
+            histogram.reset()
+
+    def to_prometheus(self) -> str:
+        """All stages as one Prometheus histogram family in the text exposition format"""
+        name = f"{self.namespace}_stage_latency_seconds"
+        lines = [f"# HELP {name} Latency of NLU prediction stages.", f"# TYPE {name} histogram"]
+        for stage in self.stages():
+            histogram = self._histograms[stage]
+            cumulative = histogram.cumulative_counts(PROMETHEUS_BOUNDS)
+            for bound, count in zip(PROMETHEUS_BOUNDS, cumulative):
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {count}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total_ns / 1e9:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+LATENCY = LatencyRegistry()
@@ -0,0 +1,199 @@
+"""
+Cross-validation and hyperparameter sweeps
+==========================================
+
+``run_sweep`` scores every hyperparameter configuration with stratified
+k-fold cross-validation. Every (configuration, fold) pair is trained and
+evaluated as its own task on a ``ProcessPoolExecutor``::
+
+    configs = param_grid({"backend": ["rasa", "huggingface"], "alpha": [1e-4, 1e-3, 1e-2]})
+    for result in run_sweep(dataset, configs, folds=5):
+        ...
+    rows = leaderboard(results)
+
+The corpus is copied once into a ``multiprocessing.shared_memory`` block
+(``SharedCorpus``), together with each row's fold assignment. Workers
+attach to it when they start, so a task is pickled as just a config dict
+and a fold number, however large the corpus is. Each worker rebuilds its
+train / test split from the shared arrays with ``NLUDataset.take``.
+
+Fold splits are featurized through a ``FeatureCache``, so configurations
+that share a backend (and later sweeps over the same corpus) reuse the
+count matrices instead of re-tokenizing every fold.
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .dataset import NLUDataset
+from .engine import IntentEngine
+from .feature_cache import DEFAULT_FEATURE_CACHE_DIR, FeatureCache
+from .metrics import evaluate
+
+# Hyperparameters IntentEngine.train accepts, with their defaults
+DEFAULT_CONFIG = {"backend": "huggingface", "alpha": 1e-3, "max_iter": 200}
+
+_DATASET_ARRAYS = ("text_buffer", "text_offsets", "intent_codes", "entity_offsets", "entity_start",
+                   "entity_end", "entity_labels")
+
+
+def param_grid(space: Dict[str, List]) -> List[Dict]:
+    """Every combination of the values in ``space`` (missing keys take ``DEFAULT_CONFIG``)"""
+    keys = list(space)
+    return [{**DEFAULT_CONFIG, **dict(zip(keys, values))} for values in itertools.product(*space.values())]
+
+
+def random_configs(space: Dict[str, List], n: int, seed: int = 0) -> List[Dict]:
+    """``n`` distinct combinations drawn at random from the grid over ``space``"""
+    grid = param_grid(space)
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(grid), size=min(n, len(grid)), replace=False)
+    return [grid[i] for i in sorted(picks)]
+
+
+def stratified_folds(intent_codes: np.ndarray, folds: int, seed: int = 0) -> np.ndarray:
+    """Fold number per row, dealing each intent's rows round-robin in random order"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(intent_codes))
+    # Stable sort by intent keeps the shuffled order inside each intent
+    order = order[np.argsort(intent_codes[order], kind="stable")]
+    codes = intent_codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    # Offset each intent so small classes do not all land in fold 0
+    # Smallest dtype that holds every fold number (uint8 up to 256 folds)
+    assignment = np.empty(len(order), dtype=np.min_scalar_type(folds - 1))
+    assignment[order] = (rank + codes) % folds
+    return assignment
+
+
+class SharedCorpus:
+    """An ``NLUDataset`` plus fold assignments copied into one shared-memory block"""
+
+    def __init__(self, dataset: NLUDataset, folds: np.ndarray):
+        arrays = {name: np.ascontiguousarray(getattr(dataset, name)) for name in _DATASET_ARRAYS}
+        arrays["folds"] = np.ascontiguousarray(folds)
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = (offset, array.dtype.str, array.shape)
+            offset += (array.nbytes + 7) & ~7  # keep every array 8-byte aligned
+        self.shm = SharedMemory(create=True, size=max(offset, 1))
+        for name, array in arrays.items():
+            start = layout[name][0]
+            self.shm.buf[start:start + array.nbytes] = array.tobytes()
+        self.spec = {"name": self.shm.name, "layout": layout, "intent_vocab": list(dataset.intent_vocab),
+                     "entity_vocab": list(dataset.entity_vocab)}
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> "SharedCorpus":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_corpus(spec: Dict) -> Tuple[SharedMemory, NLUDataset, np.ndarray]:
+    """Map a ``SharedCorpus`` into this process without copying it"""
+    shm = SharedMemory(name=spec["name"])
+    arrays = {name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+              for name, (offset, dtype, shape) in spec["layout"].items()}
+    dataset = NLUDataset(
+        arrays["text_buffer"], arrays["text_offsets"], arrays["intent_codes"], spec["intent_vocab"],
+        arrays["entity_offsets"], arrays["entity_start"], arrays["entity_end"], arrays["entity_labels"],
+        spec["entity_vocab"],
+    )
+    return shm, dataset, arrays["folds"]
+
+
+# Per-worker attachment and feature cache, set up once by the pool initializer
+_WORKER_CORPUS: Optional[Tuple[SharedMemory, NLUDataset, np.ndarray]] = None
+_WORKER_FEATURE_CACHE: Optional[FeatureCache] = None
+
+
+def _init_worker(spec: Dict, feature_cache_root: Optional[str] = None) -> None:
+    global _WORKER_CORPUS, _WORKER_FEATURE_CACHE
+    _WORKER_CORPUS = attach_corpus(spec)
+    _WORKER_FEATURE_CACHE = FeatureCache(feature_cache_root) if feature_cache_root else None
+
+
+def _run_fold(config_id: int, config: Dict, fold: int) -> Dict:
+    _, dataset, folds = _WORKER_CORPUS
+    result = {"config_id": config_id, **config, "fold": fold}
+    train = dataset.take(np.flatnonzero(folds != fold))
+    test = dataset.take(np.flatnonzero(folds == fold))
+    if not len(test):
+        return {**result, "error": "empty test fold"}
+    started = time.perf_counter()
+    try:
+        engine = IntentEngine.train(train, **config, feature_cache=_WORKER_FEATURE_CACHE)
+    except ValueError as exc:
+        # e.g. a fold of a tiny corpus left only one intent to train on
+        return {**result, "error": str(exc)}
+    report = evaluate(engine, test, feature_cache=_WORKER_FEATURE_CACHE)
+    return {**result, "accuracy": report["accuracy"], "macro_f1": report["macro avg"]["f1-score"],
+            "train_seconds": time.perf_counter() - started, "iterations": engine.classifier.n_iter_}
+
+
+def run_sweep(dataset: NLUDataset, configs: List[Dict], folds: int = 5, seed: int = 0,
+              max_workers: Optional[int] = None,
+              feature_cache_root: Optional[str] = DEFAULT_FEATURE_CACHE_DIR) -> Iterator[Dict]:
+    """Cross-validate every config and yield per-fold results as they finish
+
+    ``feature_cache_root=None`` featurizes every fold from scratch.
+    """
+    if folds < 2:
+        raise ValueError("Cross-validation needs at least two folds")
+    if len(dataset) < folds:
+        raise ValueError(f"{len(dataset)} utterances cannot be split into {folds} folds")
+    tasks = [(config_id, {**DEFAULT_CONFIG, **config}, fold)
+             for config_id, config in enumerate(configs) for fold in range(folds)]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    with SharedCorpus(dataset, stratified_folds(dataset.intent_codes, folds, seed)) as corpus:
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"), initializer=_init_worker,
+                                 initargs=(corpus.spec, feature_cache_root)) as pool:
+            pending = {pool.submit(_run_fold, *task) for task in tasks}
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                # The caller may stop early; drop the tasks that have not started
+                for future in pending:
+                    future.cancel()
+
+
+def leaderboard(results: List[Dict]) -> List[Dict]:
+    """One row per config with mean / std fold scores, best macro F1 first"""
+    by_config: Dict[int, List[Dict]] = {}
+    for result in results:
+        by_config.setdefault(result["config_id"], []).append(result)
+    rows = []
+    for config_id, runs in by_config.items():
+        scored = [run for run in runs if "error" not in run]
+        accuracy = np.array([run["accuracy"] for run in scored])
+        f1 = np.array([run["macro_f1"] for run in scored])
+        rows.append({
+            "config_id": config_id,
+            **{key: runs[0][key] for key in DEFAULT_CONFIG},
+            "folds": len(scored),
+            "failed_folds": len(runs) - len(scored),
+            "mean_accuracy": float(accuracy.mean()) if len(scored) else 0.0,
+            "std_accuracy": float(accuracy.std()) if len(scored) else 0.0,
+            "mean_macro_f1": float(f1.mean()) if len(scored) else 0.0,
+            "std_macro_f1": float(f1.std()) if len(scored) else 0.0,
+            "mean_train_seconds": float(np.mean([run["train_seconds"] for run in scored])) if scored else 0.0,
+        })
+    # Ties go to the faster config
+    rows.sort(key=lambda row: (-row["mean_macro_f1"], -row["mean_accuracy"], row["mean_train_seconds"]))
+    return [{"rank": rank, **row} for rank, row in enumerate(rows, 1)]
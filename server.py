@@ -0,0 +1,267 @@
+"""
+🤖 Chatbot NLU Trainer & Evaluator - Inference Server
+=====================================================
+
+Headless asyncio HTTP service in front of the NLU engine, for chatbots and
+other programs that only need predictions::
+
+    python server.py --port 8000 --max-batch 64 --max-wait-ms 2
+
+Endpoints (JSON in, JSON out):
+
+- ``POST /predict``        ``{"text": "...", "backend": "huggingface", "workspace": "default"}``
+- ``POST /predict_batch``  ``{"texts": ["...", ...], "top_k": 3, "backend": ..., "workspace": ...}``
+- ``GET  /health``         liveness plus resident models and batching counters
+- ``GET  /metrics``        stage latency histograms in the Prometheus text format
+
+Concurrent ``/predict`` calls for the same model are merged into
+micro-batches (``nlu.batching.MicroBatcher``). Models come from the same
+``ModelStore`` / ``ModelRegistry`` the Gradio and Streamlit apps use, so a
+model trained in either UI is served here within a second of being saved
+(``ModelRegistry.refresh_seconds``).
+``"backend": "rasa-int8"`` serves the int8 export of a backend
+(``nlu.quantize``), for hosts where the full-precision weights do not fit.
+
+Only saved models are served: ``backend`` must be a preset or its int8
+variant, and ``workspace`` a plain directory name (400 otherwise), and a
+model that has never been saved is a 404. Nothing is trained on the serving
+path, so request contents cannot make the server build or keep models.
+
+Author: Amarjit Kumar
+Repository: https://github.com/Amarjit99/Chatbot-NLU-Trainer--Evaluator
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from nlu import BACKEND_PRESETS, DEFAULT_WORKSPACE, LATENCY, EventLog, ModelRegistry, ModelStore, check_name
+from nlu.batching import MicroBatcher
+from nlu.quantize import quantized_backend
+
+MAX_BODY_BYTES = 32 << 20
+SERVING_BACKENDS = sorted(BACKEND_PRESETS) + [quantized_backend(backend) for backend in sorted(BACKEND_PRESETS)]
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class InferenceServer:
+    """Routes HTTP requests to micro-batched engines from a shared model registry"""
+
+    def __init__(self, registry: ModelRegistry, event_log: Optional[EventLog] = None, max_batch: int = 64,
+                 max_wait_ms: float = 2.0, workers: int = 1):
+        self.registry = registry
+        self.event_log = event_log
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        # Scoring runs off the event loop; one thread keeps batches in arrival order
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="nlu-score")
+        self.batchers: Dict[Tuple[str, str], MicroBatcher] = {}
+
+    def route(self, body: Dict) -> Tuple[str, str]:
+        """Validated ``(backend, workspace)`` of a request that names a saved model"""
+        backend, workspace = body.get("backend", "huggingface"), body.get("workspace", DEFAULT_WORKSPACE)
+        if backend not in SERVING_BACKENDS:
+            raise HTTPError(400, f'"backend" must be one of {", ".join(SERVING_BACKENDS)}')
+        try:
+            check_name(workspace)
+        except ValueError as exc:
+            raise HTTPError(400, str(exc)) from None
+        # Checked before a batcher exists, so there is at most one per saved model
+        if (workspace, backend) not in self.batchers and not self.registry.store.versions(backend, workspace):
+            raise HTTPError(404, f"No saved {backend} model in workspace {workspace!r}")
+        return backend, workspace
+
+    def batcher(self, backend: str, workspace: str) -> MicroBatcher:
+        key = (workspace, backend)
+        if key not in self.batchers:
+            self.batchers[key] = MicroBatcher(lambda: self.registry.get(backend, workspace), self.max_batch,
+                                              self.max_wait_ms, self.executor)
+        return self.batchers[key]
+
+    # ------------------------------------------------------------------ endpoints
+
+    async def predict(self, body: Dict) -> Dict:
+        text = body.get("text")
+        if not isinstance(text, str):
+            raise HTTPError(400, '"text" must be a string')
+        backend, workspace = self.route(body)
+        started = time.perf_counter_ns()
+        try:
+            prediction = await self.batcher(backend, workspace).predict(text)
+        except KeyError as exc:
+            # The model was deleted after its batcher was created
+            raise HTTPError(404, exc.args[0]) from None
+        elapsed_ns = time.perf_counter_ns() - started
+        LATENCY.record("request", elapsed_ns)
+        if self.event_log is not None:
+            self.event_log.log_prediction(backend, prediction["intent"], prediction["confidence"], elapsed_ns / 1e6)
+        return {**prediction, "response_time_ms": elapsed_ns / 1e6}
+
+    async def predict_batch(self, body: Dict) -> Dict:
+        texts = body.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(400, '"texts" must be a list of strings')
+        top_k = body.get("top_k", 3)
+        if not isinstance(top_k, int) or top_k < 1:
+            raise HTTPError(400, '"top_k" must be a positive integer')
+        backend, workspace = self.route(body)
+        if not texts:
+            return {"predictions": [], "count": 0}
+
+        def run():
+            # Already one vectorized pass; micro-batching would only add the wait
+            return self.registry.get(backend, workspace).predict_batch(texts, top_k=top_k)
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, run)
+        except KeyError as exc:
+            raise HTTPError(404, exc.args[0]) from None
+        elapsed = time.perf_counter() - started
+        intents, confidences = result["intent"].tolist(), result["confidence"].tolist()
+        top_intents, top_confidences = result["top_intents"].tolist(), result["top_confidences"].tolist()
+        predictions = [
+            {"text": text, "intent": intents[i], "confidence": confidences[i],
+             "alternatives": [{"intent": intent, "confidence": confidence}
+                              for intent, confidence in zip(top_intents[i][1:], top_confidences[i][1:])]}
+            for i, text in enumerate(texts)
+        ]
+        if self.event_log is not None:
+            self.event_log.log_predictions(backend, intents, confidences, [elapsed * 1000 / len(texts)] * len(texts))
+        return {"predictions": predictions, "count": len(predictions), "response_time_ms": elapsed * 1000}
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "models": self.registry.resident(),
+            "registry": self.registry.stats(),
+            "batching": {f"{workspace}/{backend}": batcher.stats()
+                         for (workspace, backend), batcher in self.batchers.items()},
+        }
+
+    # ------------------------------------------------------------------ HTTP
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        path = path.split("?", 1)[0]
+        if path == "/metrics" and method == "GET":
+            return 200, "text/plain; version=0.0.4", LATENCY.to_prometheus().encode("utf-8")
+        if path == "/health" and method == "GET":
+            payload = self.health()
+        elif path in ("/predict", "/predict_batch"):
+            if method != "POST":
+                raise HTTPError(405, f"{path} only accepts POST")
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(400, "Request body is not valid JSON") from None
+            if not isinstance(request, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+            handler = self.predict if path == "/predict" else self.predict_batch
+            payload = await handler(request)
+        else:
+            raise HTTPError(404, f"No route for {method} {path}")
+        return 200, "application/json", json.dumps(payload).encode("utf-8")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection, keeping it alive between requests"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = request_line.split(" ", 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.strip().upper() == "HTTP/1.1")
+
+                try:
+                    try:
+                        length = int(headers.get("content-length", 0))
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        # The body cannot be framed, so the connection cannot be reused either
+                        keep_alive = False
+                        raise HTTPError(400, "Content-Length must be a non-negative integer")
+                    if length > MAX_BODY_BYTES:
+                        raise HTTPError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload = await self.dispatch(method, path, body)
+                except HTTPError as exc:
+                    status, content_type = exc.status, "application/json"
+                    payload = json.dumps({"error": str(exc)}).encode("utf-8")
+                    keep_alive = keep_alive and exc.status != 413
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except Exception as exc:
+                    status, content_type = 500, "application/json"
+                    payload = json.dumps({"error": f"{type(exc).__name__}: {exc}"}).encode("utf-8")
+
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=1 << 16)
+        print(f"🚀 NLU inference server listening on http://{host}:{port}")
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                for batcher in self.batchers.values():
+                    await batcher.close()
+                self.executor.shutdown(wait=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve NLU predictions over HTTP with micro-batching")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--model-dir", default=None, help="ModelStore root (default: $NLU_MODEL_DIR or nlu_models)")
+    parser.add_argument("--max-batch", type=int, default=64, help="largest micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="how long a batch waits to fill")
+    parser.add_argument("--workers", type=int, default=1, help="scoring threads")
+    parser.add_argument("--no-event-log", action="store_true", help="do not append predictions to the event log")
+    args = parser.parse_args()
+
+    store = ModelStore(args.model_dir) if args.model_dir else ModelStore()
+    registry = ModelRegistry(store)
+    server = InferenceServer(registry, None if args.no_event_log else EventLog(), args.max_batch,
+                             args.max_wait_ms, args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -10,14 +10,26 @@ Repository: https://github.com/Amarjit99/Chatbot-NLU-Trainer--Evaluator
 """
 
 import streamlit as st
-import pandas as pd
 import json
-import requests
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+import io
 import os
-from typing import Dict, List, Any
+import tempfile
+import time
+
+from nlu import (DEFAULT_WORKSPACE, LATENCY, EventLog, FeatureCache, IntentEngine, ModelRegistry, ModelStore,
+                 NLUDataset, PredictionCache, SearchIndexStore, batch_to_frame, evaluate)
+from nlu.registry import UNSAVED
+from nlu.ingest import IngestReport, detect_format, iter_examples, read_texts, sniff_format, split_lines
+from nlu.active_learning import UNCERTAINTY_METHODS, rank_uncertain, uncertainty_to_frame
+from nlu.benchmark import synthetic_examples
+from nlu.comparison import compare_backends, comparison_table, default_backends
+from nlu.dedup import DEFAULT_THRESHOLD, deduplicate, drop_leaked, find_duplicates, find_leakage
+from nlu.jobs import FULL_BATCH, OUT_OF_CORE, TrainingJobQueue
+from nlu.quantize import base_backend, compare_models, is_quantized, quantize_engine, quantized_backend
+from nlu.tuning import leaderboard, param_grid, random_configs, run_sweep
+
+# pandas and plotly are imported by the pages that draw tables and charts, so
+# a fresh server rendering the Home page does not wait for them
 
 # Page config
 st.set_page_config(
@@ -81,6 +93,8 @@ page = st.sidebar.selectbox(
     [
         "ðŸ  Home",
         "ðŸ¤– NLU Training Demo",
+        "ðŸ“¦ Batch Prediction",
+        "ðŸŽ¯ Active Learning",
         "ðŸ“Š Model Evaluation",
         "ðŸ·ï¸ Entity Annotation",
         "ðŸ“ˆ Analytics Dashboard",
@@ -106,42 +120,239 @@ def load_sample_data():
     }
     return sample_data
 
-# Simulated model training function
-def simulate_training(training_data, backend="huggingface"):
-    """Simulate model training with progress"""
-    import time
+@st.cache_data
+def load_sample_dataset():
+    """Sample training data as a columnar NLUDataset"""
+    return NLUDataset.from_examples(load_sample_data()["training_data"])
+
+MODEL_STORE = ModelStore()
+TRAINING_MODES = {FULL_BATCH: "Full batch (L-BFGS, corpus in memory)",
+                  OUT_OF_CORE: "Out-of-core (streamed chunks, mini-batch SGD)"}
+BACKENDS = ["huggingface", "rasa", "spacy"]
+# Prediction can also route to each backend's int8 export
+SERVING_BACKENDS = BACKENDS + [quantized_backend(backend) for backend in BACKENDS]
+
+@st.cache_resource
+def get_model_registry():
+    """Resident models per (workspace, backend, version), shared by all sessions"""
+    return ModelRegistry(MODEL_STORE, fallback=train_sample_engine)
+
+def train_sample_engine(backend):
+    """Fallback engine for a backend with no saved model yet"""
+    if is_quantized(backend):
+        # Nothing exported yet: quantize whatever the full-precision backend serves
+        return quantize_engine(get_model_registry().get(base_backend(backend)))
+    return IntentEngine.train(load_sample_dataset(), backend=backend)
+
+def get_engine(backend="huggingface", workspace=DEFAULT_WORKSPACE):
+    """Latest model for a backend, loaded on first use (sample-data model if none is saved)"""
+    return get_model_registry().get(backend, workspace)
+
+@st.cache_resource
+def get_prediction_cache():
+    """LRU of recent predictions shared by all sessions"""
+    return PredictionCache()
+
+@st.cache_resource
+def get_feature_cache():
+    """On-disk count matrices of evaluated corpora, keyed by content hash"""
+    return FeatureCache()
+
+@st.cache_resource
+def get_search_indexes():
+    """Similar-utterance indexes of each backend's training corpus, shared by all sessions"""
+    return SearchIndexStore()
+
+def get_search_index(backend="huggingface", workspace=DEFAULT_WORKSPACE):
+    """Similar-example index for a backend; built by training jobs, never by a query"""
+    return get_search_indexes().get(base_backend(backend), workspace)
+
+@st.cache_resource
+def get_event_log():
+    """Append-only prediction / training event log behind the analytics dashboard"""
+    return EventLog()
+
+def install_result(result):
+    """Route get_engine to the artifacts a training result saved"""
+    registry = get_model_registry()
+    registry.install(result["backend"], result["version"], result["workspace"])
+    get_prediction_cache().invalidate(result["backend"])
+    int8_backend = quantized_backend(result["backend"])
+    if result.get("quantized_version"):
+        registry.install(int8_backend, result["quantized_version"], result["workspace"])
+    else:
+        # An int8 fallback quantized from the previous model is stale now
+        registry.evict(int8_backend, result["workspace"])
+    get_prediction_cache().invalidate(int8_backend)
+
+def install_trained_model(job):
+    """Route get_engine to the artifact a finished job saved"""
+    install_result(job.result)
+    stats = job.result["training_stats"]
+    get_event_log().log_training(job.result["backend"], stats["samples"], job.result["accuracy"], stats["training_time"])
+
+@st.cache_resource
+def get_training_jobs():
+    """Background training job queue shared by all sessions"""
+    return TrainingJobQueue(MODEL_STORE.root, on_complete=install_trained_model, search_root=get_search_indexes().root)
+
+@st.cache_resource
+def get_trained_models():
+    """Finished training results per (dataset content hash, training config), shared by all sessions"""
+    return {}
+
+@st.cache_resource(max_entries=4)
+def load_uploaded_dataset(data, name):
+    """Parse an uploaded training file once per distinct content"""
+    report = IngestReport()
+    dataset = NLUDataset.from_examples(
+        iter_examples(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"), detect_format(name), report))
+    return dataset, report.summary(), bool(report.fatal or report.error_count)
+
+@st.cache_resource(max_entries=4)
+def load_pasted_dataset(text):
+    """Parse pasted labelled examples (JSON, JSON lines or CSV) once per distinct text"""
+    report = IngestReport()
+    dataset = NLUDataset.from_examples(iter_examples(io.StringIO(text), sniff_format(text), report))
+    return dataset, report.summary(), bool(report.fatal or report.error_count)
+
+@st.cache_data(max_entries=64, show_spinner="Evaluating model...")
+def evaluation_results(backend, workspace, version, dataset_hash, _dataset):
+    """Evaluation report and charts for one model version on one dataset, computed once
+
+    ``version`` and ``dataset_hash`` are the cache key; ``_dataset`` is not hashed.
+    """
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
     
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    engine = get_model_registry().get(backend, workspace, version)
+    report = evaluate(engine, _dataset, feature_cache=get_feature_cache())
     
-    steps = [
-        "Preprocessing training data...",
-        "Tokenizing text...",
-        "Extracting features...",
-        "Training classifier...",
-        "Validating model...",
-        "Computing metrics...",
-        "Model training complete!"
-    ]
+    # Metrics by intent
+    metrics_data = pd.DataFrame({
+        "Intent": list(report["labels"].keys()),
+        "Precision": [m["precision"] for m in report["labels"].values()],
+        "Recall": [m["recall"] for m in report["labels"].values()],
+        "F1-Score": [m["f1-score"] for m in report["labels"].values()],
+        "Support": [m["support"] for m in report["labels"].values()]
+    })
     
-    for i, step in enumerate(steps):
-        status_text.text(step)
-        time.sleep(0.5)
-        progress_bar.progress((i + 1) / len(steps))
+    # Confusion matrix heatmap
+    confusion_fig = px.imshow(
+        report["confusion_matrix"],
+        x=report["confusion_labels"],
+        y=report["confusion_labels"],
+        labels=dict(x="Predicted Intent", y="Actual Intent", color="Count"),
+        color_continuous_scale="Blues",
+        text_auto=True,
+        title="Confusion Matrix"
+    )
     
-    # Simulated results
+    # Performance comparison chart
+    metrics_fig = go.Figure()
+    for metric, color in (("Precision", "blue"), ("Recall", "red"), ("F1-Score", "green")):
+        metrics_fig.add_trace(go.Scatter(
+            x=metrics_data["Intent"],
+            y=metrics_data[metric],
+            mode='lines+markers',
+            name=metric,
+            line=dict(color=color, width=3)
+        ))
+    metrics_fig.update_layout(
+        title="Performance Metrics by Intent",
+        xaxis_title="Intent",
+        yaxis_title="Score",
+        yaxis=dict(range=[0.0, 1.05])
+    )
+    return report, metrics_data, confusion_fig, metrics_fig
+
+@st.cache_data(max_entries=16, show_spinner="Looking for near-duplicates...")
+def hygiene_results(dataset_hash, test_hash, threshold, _dataset, _test=None):
+    """Near-duplicate clusters of a training set and its leakage into a test set, computed once
+
+    The hashes and ``threshold`` are the cache key; the datasets are not hashed.
+    """
+    duplicates = find_duplicates(_dataset, threshold)
     results = {
-        "accuracy": 0.94,
-        "precision": 0.92,
-        "recall": 0.89,
-        "f1_score": 0.90,
-        "training_time": "2.3 seconds",
-        "backend": backend,
-        "model_size": "15.2 MB"
+        "duplicates": duplicates.summary(),
+        "duplicate_rows": duplicates.duplicate_rows,
+        "clusters": duplicates.to_frame(_dataset),
+        "deduplicated": json.dumps(deduplicate(_dataset, duplicates).to_records(), indent=2),
     }
-    
+    if _test is not None:
+        leakage = find_leakage(_dataset, _test, threshold)
+        results.update(leakage=leakage.summary(), leaked_rows=len(leakage.test_rows),
+                       leaks=leakage.to_frame(_dataset, _test),
+                       clean_test=json.dumps(drop_leaked(_test, leakage).to_records(), indent=2))
     return results
 
+def clear_cached_results():
+    """Explicitly drop memoized evaluations, trained-model lookups, parsed uploads and predictions"""
+    evaluation_results.clear()
+    hygiene_results.clear()
+    load_uploaded_dataset.clear()
+    get_trained_models().clear()
+    get_prediction_cache().invalidate()
+    st.session_state.pop("training_outcome", None)
+
+def predict_batch(texts, backend="huggingface", top_k=3):
+    """Classify a list of utterances in one vectorized pass"""
+    result = get_engine(backend).predict_batch(list(texts), top_k=top_k)
+    return batch_to_frame(texts, result)
+
+# Background model training
+def run_training(training_path, backend="huggingface", **options):
+    """Submit a background training job on a training file and follow its progress
+
+    ``options`` (``mode``, ``epochs``, ``batch_size``, ``quantize``) go to ``TrainingJobQueue.submit``.
+    """
+    jobs = get_training_jobs()
+    job_id = jobs.submit(backend, training_path=training_path, **options)
+    
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    for job in jobs.follow(job_id):
+        progress_bar.progress(job.progress)
+        status_text.text(job.progress_text())
+    
+    return job
+
+def train_or_reuse(training_file, dataset, dataset_hash, config):
+    """Train ``config`` on the uploaded file, or reuse the saved model already trained on identical data
+
+    The worker streams the upload from a temporary file, so the corpus is
+    never turned back into Python records here. Without an upload,
+    ``dataset`` (the sample data) is written out instead.
+    """
+    key = (dataset_hash, json.dumps(config, sort_keys=True))
+    trained = get_trained_models()
+    result = trained.get(key)
+    if result is not None and result["version"] in MODEL_STORE.versions(result["backend"], result["workspace"]):
+        install_result(result)
+        return {"result": result, "reused": True}
+    
+    with tempfile.TemporaryDirectory(prefix="nlu-upload-") as tmp:
+        if training_file is not None:
+            # Keep only the extension, which tells the worker the format
+            path = os.path.join(tmp, "training" + os.path.splitext(training_file.name)[1].lower())
+            with open(path, "wb") as f:
+                f.write(training_file.getbuffer())
+        else:
+            path = os.path.join(tmp, "training.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(dataset.to_records(), f)
+        job = run_training(path, **config)
+    if job.status != "completed":
+        return {"error": job.error}
+    trained[key] = job.result
+    return {"result": job.result, "reused": False}
+
+if st.sidebar.button("ðŸ§¹ Clear Cached Results"):
+    clear_cached_results()
+    st.sidebar.success("Cached evaluations, trained-model lookups and predictions cleared")
+
 # Page routing
 if page == "ðŸ  Home":
     # Project overview
@@ -227,19 +438,68 @@ if page == "ðŸ  Home":
         """)
 
 elif page == "ðŸ¤– NLU Training Demo":
-    st.header("ðŸ¤– NLU Model Training Demo")
+    import pandas as pd
+    import plotly.express as px
     
-    # Load sample data
-    sample_data = load_sample_data()
+    st.header("ðŸ¤– NLU Model Training Demo")
     
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.subheader("ðŸ“ Training Data")
         
-        # Display sample training data
-        training_df = pd.DataFrame(sample_data["training_data"])
-        st.dataframe(training_df, use_container_width=True)
+        training_file = st.file_uploader("Training data (JSON, JSON lines or CSV); leave empty for the sample data",
+                                         type=["json", "jsonl", "csv"], key="training_file")
+        if training_file is not None:
+            training_dataset, ingest_summary, ingest_failed = load_uploaded_dataset(training_file.getvalue(),
+                                                                                    training_file.name)
+            if ingest_failed:
+                st.error(f"Could not parse training data: {ingest_summary}")
+                st.stop()
+            st.caption(ingest_summary)
+        else:
+            training_dataset = load_sample_dataset()
+        
+        # Results shown for a previous dataset no longer describe this one
+        dataset_hash = training_dataset.content_hash()
+        if st.session_state.get("training_dataset_hash") != dataset_hash:
+            st.session_state.training_dataset_hash = dataset_hash
+            st.session_state.pop("training_outcome", None)
+            st.session_state.pop("hygiene_checked", None)
+        
+        # Display training data
+        st.dataframe(training_dataset[:1000].to_pandas(), use_container_width=True)
+        
+        with st.expander("ðŸ§¹ Data Hygiene: near-duplicates and train/test leakage"):
+            hygiene_test_file = st.file_uploader("Test set to check for leakage (optional)",
+                                                 type=["json", "jsonl", "csv"], key="hygiene_test_file")
+            hygiene_threshold = st.slider("Similarity threshold (Jaccard of character shingles)", 0.5, 1.0,
+                                          DEFAULT_THRESHOLD, 0.05)
+            if st.button("ðŸ” Check Duplicates & Leakage"):
+                st.session_state.hygiene_checked = True
+            
+            if st.session_state.get("hygiene_checked"):
+                hygiene_test, test_hash = None, None
+                if hygiene_test_file is not None:
+                    hygiene_test, test_summary, test_failed = load_uploaded_dataset(hygiene_test_file.getvalue(),
+                                                                                    hygiene_test_file.name)
+                    if test_failed:
+                        st.error(f"Could not parse test data: {test_summary}")
+                        st.stop()
+                    test_hash = hygiene_test.content_hash()
+                hygiene = hygiene_results(dataset_hash, test_hash, hygiene_threshold, training_dataset, hygiene_test)
+                
+                st.markdown(f"**ðŸ” Near-duplicates:** {hygiene['duplicates']}")
+                if hygiene["duplicate_rows"]:
+                    st.dataframe(hygiene["clusters"], use_container_width=True)
+                st.download_button("ðŸ“¥ Download Deduplicated Training Set", hygiene["deduplicated"],
+                                   file_name="train_deduplicated.json", mime="application/json")
+                if "leakage" in hygiene:
+                    st.markdown(f"**ðŸš° Train/test leakage:** {hygiene['leakage']}")
+                    if hygiene["leaked_rows"]:
+                        st.dataframe(hygiene["leaks"], use_container_width=True)
+                    st.download_button("ðŸ“¥ Download Leak-Free Test Set", hygiene["clean_test"],
+                                       file_name="test_without_leaks.json", mime="application/json")
         
         # Backend selection
         st.subheader("ðŸ”§ Training Configuration")
@@ -250,27 +510,58 @@ elif page == "ðŸ¤– NLU Training Demo":
         )
         
         # Training parameters
-        epochs = st.slider("Training Epochs", 1, 10, 5)
-        batch_size = st.selectbox("Batch Size", [8, 16, 32], index=1)
+        training_mode = st.radio("Training Mode", list(TRAINING_MODES), format_func=TRAINING_MODES.get,
+                                 help="Out-of-core training streams the corpus from disk in chunks, so memory "
+                                      "does not grow with the corpus")
+        out_of_core = training_mode == OUT_OF_CORE
+        epochs = st.slider("Training Epochs", 1, 10, 5, disabled=not out_of_core)
+        batch_size = st.selectbox("Batch Size", [16, 32, 64, 128, 256], index=2, disabled=not out_of_core)
+        quantize = st.checkbox("ðŸ—œï¸ Also export an int8 model", value=True,
+                               help="Saves a serving-only copy as <backend>-int8, about 8x smaller in memory")
+        
+        # Only settings that change the trained model belong here; other widgets reuse it
+        training_config = {"backend": backend, "mode": training_mode, "quantize": quantize}
+        if out_of_core:
+            training_config.update(epochs=epochs, batch_size=batch_size)
         
         # Train button
         if st.button("ðŸš€ Start Training"):
             st.subheader("ðŸ“ˆ Training Progress")
-            results = simulate_training(sample_data["training_data"], backend)
-            
+            st.session_state.training_outcome = train_or_reuse(training_file, training_dataset, dataset_hash,
+                                                           training_config)
+        
+        # Kept in the session so the results survive reruns from other widgets
+        outcome = st.session_state.get("training_outcome")
+        if outcome is not None and "error" in outcome:
+            st.error(f"âŒ Training failed: {outcome['error']}")
+        elif outcome is not None:
             # Display results
-            st.success("âœ… Training completed successfully!")
+            results = outcome["result"]
+            if outcome["reused"]:
+                st.info(f"â™»ï¸ Reused {results['backend']}/{results['version']}, already trained on this data "
+                        "with these settings")
+            else:
+                st.success(f"âœ… Training completed successfully! Saved {results['backend']}/{results['version']}")
+            
+            stats = results["training_stats"]
+            if "epochs" in stats:
+                st.caption(f"Out-of-core training: {stats['epochs']} epochs of {stats['batch_size']}-example "
+                           f"mini-batches over {stats['chunks']} chunk(s) streamed from disk")
+            if results.get("quantized_version"):
+                st.caption(f"ðŸ—œï¸ Int8 export: {quantized_backend(results['backend'])}/{results['quantized_version']}")
+            if results.get("quantization"):
+                st.caption(f"ðŸ“‰ Int8 vs full precision: {results['quantization']['summary']}")
             
-            # Metrics display
+            # Metrics display (training set)
             metrics_cols = st.columns(4)
             with metrics_cols[0]:
                 st.metric("Accuracy", f"{results['accuracy']:.2%}")
             with metrics_cols[1]:
-                st.metric("Precision", f"{results['precision']:.2%}")
+                st.metric("Precision", f"{results['macro_avg']['precision']:.2%}")
             with metrics_cols[2]:
-                st.metric("Recall", f"{results['recall']:.2%}")
+                st.metric("Recall", f"{results['macro_avg']['recall']:.2%}")
             with metrics_cols[3]:
-                st.metric("F1 Score", f"{results['f1_score']:.2%}")
+                st.metric("F1 Score", f"{results['macro_avg']['f1-score']:.2%}")
     
     with col2:
         st.subheader("ðŸŽ¯ Model Testing")
@@ -283,126 +574,323 @@ elif page == "ðŸ¤– NLU Training Demo":
         )
         
         if st.button("ðŸ” Predict Intent"):
-            # Simulated prediction
-            predictions = {
-                "intent": "book_flight",
-                "confidence": 0.95,
-                "entities": [
-                    {"entity": "destination", "value": "London", "confidence": 0.92},
-                    {"entity": "time", "value": "tomorrow", "confidence": 0.88}
-                ]
-            }
+            engine = get_engine(backend)
+            started = time.perf_counter_ns()
+            predictions = get_prediction_cache().predict(engine, test_text)
+            elapsed_ns = time.perf_counter_ns() - started
+            LATENCY.record("request", elapsed_ns)
+            get_event_log().log_prediction(backend, predictions["intent"], predictions["confidence"],
+                                           elapsed_ns / 1e6, predictions["cached"])
             
             st.subheader("ðŸ“Š Prediction Results")
             
             # Intent prediction
             st.markdown(f"**Predicted Intent:** `{predictions['intent']}`")
             st.markdown(f"**Confidence:** {predictions['confidence']:.2%}")
+            cache = get_prediction_cache().stats()
+            st.caption(f"{'Cache hit' if predictions['cached'] else 'Cache miss'} - "
+                       f"{cache['hit_rate']:.0%} hit rate over {cache['hits'] + cache['misses']} lookups")
             
             # Entities
             st.markdown("**Detected Entities:**")
             for entity in predictions["entities"]:
-                st.markdown(f"- `{entity['entity']}`: {entity['value']} ({entity['confidence']:.2%})")
+                st.markdown(f"- `{entity['entity']}`: {entity['value']} (Position: {entity['start']}-{entity['end']})")
         
         st.subheader("ðŸ“ˆ Intent Distribution")
         
-        # Simulated intent distribution chart
+        # Intent distribution of the training data
+        intent_counts = training_dataset.intent_counts()
         intent_data = pd.DataFrame({
-            "Intent": sample_data["intents"],
-            "Count": [25, 18, 22, 15, 20]
+            "Intent": list(intent_counts.keys()),
+            "Count": list(intent_counts.values())
         })
         
         fig = px.pie(intent_data, values="Count", names="Intent", 
                     title="Training Data Intent Distribution")
         st.plotly_chart(fig, use_container_width=True)
 
+elif page == "ðŸ“¦ Batch Prediction":
+    st.header("ðŸ“¦ Batch Intent Prediction")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.subheader("ðŸ“ Input Utterances")
+        batch_text = st.text_area(
+            "Utterances (one per line):",
+            "I want to book a flight to London\nCancel my reservation\nWhat's the weather like today?",
+            height=200
+        )
+        batch_file = st.file_uploader(
+            "...or upload a JSONL / JSON / CSV / TXT file",
+            type=["jsonl", "json", "csv", "txt"]
+        )
+    
+    with col2:
+        st.subheader("ðŸ”§ Configuration")
+        backend = st.selectbox(
+            "Model Backend:",
+            SERVING_BACKENDS
+        )
+        top_k = st.slider("Top-k Intents", 1, 5, 3)
+    
+    if st.button("ðŸ“¦ Run Batch Prediction"):
+        texts = read_texts(batch_file) if batch_file is not None else split_lines(batch_text)
+        
+        if not texts:
+            st.warning("Please paste some utterances or upload a file.")
+        else:
+            started = time.perf_counter()
+            results_df = predict_batch(texts, backend, top_k=top_k)
+            elapsed = time.perf_counter() - started
+            get_event_log().log_predictions(backend, results_df["intent"], results_df["confidence"],
+                                            [elapsed * 1000 / len(results_df)] * len(results_df))
+            
+            metric_cols = st.columns(3)
+            with metric_cols[0]:
+                st.metric("Utterances Scored", f"{len(results_df):,}")
+            with metric_cols[1]:
+                st.metric("Total Time", f"{elapsed:.3f}s")
+            with metric_cols[2]:
+                st.metric("Mean Confidence", f"{results_df['confidence'].mean():.2%}")
+            
+            st.dataframe(results_df.head(1000), use_container_width=True)
+            st.download_button(
+                "ðŸ’¾ Download Predictions (CSV)",
+                results_df.to_csv(index=False),
+                file_name="batch_predictions.csv",
+                mime="text/csv"
+            )
+
+elif page == "ðŸŽ¯ Active Learning":
+    import pandas as pd
+    import plotly.express as px
+    
+    st.header("ðŸŽ¯ Active Learning: Uncertainty Sampling")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.subheader("ðŸ“ Unlabeled Utterances")
+        al_text = st.text_area(
+            "Utterances (one per line):",
+            "book something for tomorrow\nwhat about my account\nis it going to be sunny in Paris\ncancel the table",
+            height=200
+        )
+        al_file = st.file_uploader(
+            "...or upload a JSONL / JSON / CSV / TXT file",
+            type=["jsonl", "json", "csv", "txt"],
+            key="active_learning_file"
+        )
+    
+    with col2:
+        st.subheader("ðŸ”§ Configuration")
+        backend = st.selectbox(
+            "Model Backend:",
+            ["huggingface", "rasa", "spacy"]
+        )
+        method = st.selectbox("Uncertainty Method:", list(UNCERTAINTY_METHODS))
+        top_k = st.slider("Samples to Select", 5, 500, 50, step=5)
+        confidence_threshold = st.slider("Confidence Threshold", 0.1, 0.95, 0.7, step=0.05)
+    
+    if st.button("ðŸŽ¯ Rank by Uncertainty"):
+        texts = read_texts(al_file) if al_file is not None else split_lines(al_text)
+        
+        if not texts:
+            st.warning("Please paste some unlabeled utterances or upload a file.")
+        else:
+            started = time.perf_counter()
+            ranking = rank_uncertain(get_engine(backend), texts, method=method, top_k=top_k,
+                                     confidence_threshold=confidence_threshold)
+            elapsed = time.perf_counter() - started
+            summary = ranking["summary"]
+            
+            metric_cols = st.columns(4)
+            with metric_cols[0]:
+                st.metric("Utterances Scored", f"{summary['total']:,}")
+            with metric_cols[1]:
+                st.metric("Flagged Uncertain", f"{summary['flagged']:,}")
+            with metric_cols[2]:
+                st.metric("Average Confidence", f"{summary['average_confidence']:.2%}")
+            with metric_cols[3]:
+                st.metric("Ranking Time", f"{elapsed:.3f}s")
+            
+            histogram = pd.DataFrame({
+                "Uncertainty": [f"{i / 10:.1f}-{(i + 1) / 10:.1f}" for i in range(10)],
+                "Utterances": summary["score_histogram"]
+            })
+            fig = px.bar(histogram, x="Uncertainty", y="Utterances", title="Uncertainty Distribution")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.subheader("ðŸš© Most Uncertain Utterances")
+            st.dataframe(uncertainty_to_frame(ranking), use_container_width=True)
+
 elif page == "ðŸ“Š Model Evaluation":
+    import pandas as pd
+    
     st.header("ðŸ“Š Model Performance Evaluation")
     
-    # Simulated evaluation data
+    eval_backend = st.selectbox(
+        "Model Backend:",
+        SERVING_BACKENDS
+    )
+    engine = get_engine(eval_backend)
+    
+    eval_file = st.file_uploader("Test set (JSON, JSON lines or CSV)", type=["json", "jsonl", "csv"],
+                                 key="eval_file")
+    eval_text = st.text_area("...or paste labelled test examples", height=120, key="eval_text")
+    if eval_file is not None:
+        eval_dataset, eval_summary, eval_failed = load_uploaded_dataset(eval_file.getvalue(), eval_file.name)
+    elif eval_text.strip():
+        eval_dataset, eval_summary, eval_failed = load_pasted_dataset(eval_text)
+    else:
+        eval_dataset, eval_summary, eval_failed = load_sample_dataset(), None, False
+        st.info("No test set given: scoring the sample training data, so these are training-set scores.")
+    if eval_failed:
+        st.error(f"Could not parse test data: {eval_summary}")
+        st.stop()
+    if not len(eval_dataset):
+        st.error("The test set is empty.")
+        st.stop()
+    if eval_summary:
+        st.caption(eval_summary)
+    # Memoized per model version and dataset, so other widgets on this page do not re-evaluate
+    report, metrics_data, confusion_fig, metrics_fig = evaluation_results(
+        eval_backend, DEFAULT_WORKSPACE, engine.version or UNSAVED, eval_dataset.content_hash(), eval_dataset)
+    
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.subheader("ðŸŽ¯ Classification Metrics")
         
-        # Create confusion matrix data
-        confusion_data = {
-            "Predicted": ["book_flight", "book_flight", "cancel_booking", "weather_query", "help_request"],
-            "Actual": ["book_flight", "cancel_booking", "cancel_booking", "weather_query", "help_request"],
-            "Count": [45, 3, 22, 38, 17]
-        }
-        
-        # Metrics by intent
-        metrics_data = pd.DataFrame({
-            "Intent": ["book_flight", "cancel_booking", "weather_query", "help_request"],
-            "Precision": [0.94, 0.88, 0.95, 0.92],
-            "Recall": [0.91, 0.89, 0.93, 0.94],
-            "F1-Score": [0.92, 0.88, 0.94, 0.93]
-        })
-        
         st.dataframe(metrics_data, use_container_width=True)
         
         # Overall metrics
         st.markdown("### ðŸ“ˆ Overall Performance")
         overall_cols = st.columns(3)
         with overall_cols[0]:
-            st.metric("Overall Accuracy", "92.4%", "2.1%")
+            st.metric("Overall Accuracy", f"{report['accuracy']:.1%}")
         with overall_cols[1]:
-            st.metric("Macro F1-Score", "91.8%", "1.8%")
+            st.metric("Macro F1-Score", f"{report['macro avg']['f1-score']:.1%}")
         with overall_cols[2]:
-            st.metric("Training Time", "2.3s", "-0.5s")
+            st.metric("Training Time", f"{engine.training_stats['training_time']:.2f}s")
+        if is_quantized(eval_backend):
+            delta = compare_models(get_engine(base_backend(eval_backend)), engine, eval_dataset,
+                                   feature_cache=get_feature_cache())
+            st.markdown("### ðŸ—œï¸ Int8 vs Full Precision")
+            st.caption(delta.summary())
+            st.dataframe(delta.to_frame(), use_container_width=True)
+        
+        st.plotly_chart(confusion_fig, use_container_width=True)
     
     with col2:
         st.subheader("ðŸ“ˆ Performance Visualization")
         
-        # Performance comparison chart
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=metrics_data["Intent"],
-            y=metrics_data["Precision"],
-            mode='lines+markers',
-            name='Precision',
-            line=dict(color='blue', width=3)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=metrics_data["Intent"],
-            y=metrics_data["Recall"],
-            mode='lines+markers',
-            name='Recall',
-            line=dict(color='red', width=3)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=metrics_data["Intent"],
-            y=metrics_data["F1-Score"],
-            mode='lines+markers',
-            name='F1-Score',
-            line=dict(color='green', width=3)
-        ))
-        
-        fig.update_layout(
-            title="Performance Metrics by Intent",
-            xaxis_title="Intent",
-            yaxis_title="Score",
-            yaxis=dict(range=[0.8, 1.0])
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(metrics_fig, use_container_width=True)
         
         # Model comparison
         st.subheader("ðŸ”„ Backend Comparison")
-        comparison_data = pd.DataFrame({
-            "Backend": ["HuggingFace", "Rasa", "spaCy"],
-            "Accuracy": [94.2, 91.8, 89.5],
-            "Training Time (s)": [2.3, 5.1, 1.8],
-            "Model Size (MB)": [15.2, 25.8, 8.4]
-        })
+        st.caption("Every backend trained and evaluated on the same stratified 80/20 split, each in its own "
+                   "worker process. Wall time and latency are only comparable when workers do not outnumber cores.")
+        cmp_size = st.slider("Comparison Corpus Size", 500, 50000, 10000, step=500)
+        cmp_slo = st.number_input("p95 Latency SLO (ms)", 0.05, 1000.0, 5.0, step=0.5)
+        cmp_int8 = st.checkbox("Include int8 variants", value=True)
+        cmp_workers = st.slider("Comparison Workers", 1, max(os.cpu_count() or 1, 8), os.cpu_count() or 1)
+        
+        if st.button("ðŸ”„ Run Comparison"):
+            backends = default_backends(quantized=cmp_int8)
+            cmp_dataset = NLUDataset.from_examples(synthetic_examples(cmp_size))
+            cmp_status = st.empty()
+            results = []
+            started = time.perf_counter()
+            for result in compare_backends(cmp_dataset, backends, max_workers=cmp_workers):
+                results.append(result)
+                cmp_status.text(f"{len(results)}/{len(backends)} backends measured, "
+                                f"{time.perf_counter() - started:.1f}s elapsed")
+            cmp_status.text(f"{len(backends)} backends on {len(cmp_dataset)} utterances measured in "
+                            f"{time.perf_counter() - started:.1f}s")
+            st.session_state.backend_comparison = results
         
-        st.dataframe(comparison_data, use_container_width=True)
+        if st.session_state.get("backend_comparison"):
+            rows = comparison_table(st.session_state.backend_comparison, cmp_slo)
+            passing = [row["backend"] for row in rows if row.get("meets_slo")]
+            if passing:
+                st.success(f"âœ… Within the {cmp_slo:g} ms p95 SLO: {', '.join(passing)}")
+            else:
+                st.warning(f"No backend meets the {cmp_slo:g} ms p95 SLO")
+            comparison_data = pd.DataFrame(rows).rename(columns={
+                "backend": "Backend", "train_utterances": "Train Rows", "test_utterances": "Test Rows",
+                "accuracy": "Accuracy", "macro_f1": "Macro F1", "evaluate_seconds": "Evaluation (s)",
+                "train_seconds": "Training Wall (s)", "train_cpu_seconds": "Training CPU (s)",
+                "peak_rss_mb": "Peak Memory (MB)", "model_disk_mb": "Model Size (MB)",
+                "predict_p50_ms": "p50 Latency (ms)", "predict_p95_ms": "p95 Latency (ms)", "meets_slo": "Meets SLO"})
+            st.dataframe(comparison_data.round(4), use_container_width=True)
+        else:
+            st.info("Run the comparison to measure every backend on this machine.")
+    
+    # K-fold hyperparameter sweep
+    st.subheader("ðŸ§ª Cross-Validation Leaderboard")
+    st.markdown("Stratified k-fold over every configuration, with fold models trained in parallel worker processes.")
+    
+    cv_col1, cv_col2, cv_col3 = st.columns(3)
+    with cv_col1:
+        cv_backends = st.multiselect("Backends:", ["huggingface", "rasa", "spacy"], default=["huggingface", "rasa", "spacy"])
+        cv_alphas = st.multiselect("L2 Alphas:", [1e-5, 1e-4, 1e-3, 1e-2, 1e-1], default=[1e-4, 1e-3, 1e-2])
+    with cv_col2:
+        cv_max_iters = st.multiselect("Max Iterations:", [50, 100, 200, 400], default=[100, 200])
+        cv_folds = st.slider("Folds", 2, 10, 5)
+    with cv_col3:
+        cv_search = st.radio("Search:", ["Grid", "Random"], horizontal=True)
+        cv_n_configs = st.slider("Random Configurations", 1, 50, 10)
+        cv_workers = st.slider("Worker Processes", 1, max(os.cpu_count() or 1, 16), os.cpu_count() or 1)
+    
+    cv_file = st.file_uploader("Training data (JSON, JSON lines or CSV); leave empty for a synthetic corpus",
+                               type=["json", "jsonl", "csv"], key="cv_file")
+    cv_size = st.slider("Synthetic Corpus Size", 500, 50000, 5000, step=500)
+    
+    if st.button("ðŸ§ª Run Sweep"):
+        if cv_file is not None:
+            cv_report = IngestReport()
+            cv_dataset = NLUDataset.from_examples(
+                iter_examples(io.TextIOWrapper(cv_file, encoding="utf-8"), detect_format(cv_file.name), cv_report))
+            if cv_report.fatal or cv_report.error_count:
+                st.error(f"Could not parse training data: {cv_report.summary()}")
+                st.stop()
+        else:
+            cv_dataset = NLUDataset.from_examples(synthetic_examples(cv_size))
+        space = {"backend": cv_backends or ["huggingface"], "alpha": cv_alphas or [1e-3],
+                 "max_iter": cv_max_iters or [200]}
+        configs = param_grid(space) if cv_search == "Grid" else random_configs(space, cv_n_configs)
+        total = len(configs) * cv_folds
+        
+        progress_bar = st.progress(0.0)
+        status_text = st.empty()
+        table = st.empty()
+        results = []
+        started = time.perf_counter()
+        try:
+            for result in run_sweep(cv_dataset, configs, folds=cv_folds, max_workers=cv_workers):
+                results.append(result)
+                progress_bar.progress(len(results) / total)
+                status_text.text(f"{len(results)}/{total} fold runs finished, {time.perf_counter() - started:.1f}s elapsed")
+                table.dataframe(pd.DataFrame(leaderboard(results)).round(4), use_container_width=True)
+        except ValueError as exc:
+            st.error(str(exc))
+        else:
+            st.session_state.cv_leaderboard = leaderboard(results)
+            status_text.text(f"Sweep of {len(configs)} configurations x {cv_folds} folds on {len(cv_dataset)} utterances "
+                             f"finished in {time.perf_counter() - started:.1f}s")
+    
+    if st.session_state.get("cv_leaderboard"):
+        best = st.session_state.cv_leaderboard[0]
+        st.success(f"ðŸ¥‡ Best: {best['backend']} (alpha {best['alpha']:g}, max_iter {best['max_iter']}) "
+                   f"with macro F1 {best['mean_macro_f1']:.1%} Â± {best['std_macro_f1']:.1%}")
+        st.dataframe(pd.DataFrame(st.session_state.cv_leaderboard).round(4), use_container_width=True)
 
 elif page == "ðŸ·ï¸ Entity Annotation":
+    import pandas as pd
+    import plotly.express as px
+    
     st.header("ðŸ·ï¸ Entity Annotation Interface")
     
     st.markdown("""
@@ -427,24 +915,44 @@ elif page == "ðŸ·ï¸ Entity Annotation":
         # Manual text input
         text_input = st.text_area("Or enter custom text:", selected_text, height=100)
         
-        # Entity types
+        # Entity types annotated in the training data
+        engine = get_engine()
+        known_types = sorted(set(engine.entity_lexicon.values()))
         entity_types = st.multiselect(
             "Available Entity Types:",
-            ["PERSON", "LOCATION", "TIME", "NUMBER", "ORGANIZATION"],
-            default=["PERSON", "LOCATION", "TIME", "NUMBER"]
+            known_types,
+            default=known_types
         )
         
         if st.button("ðŸ” Auto-Detect Entities"):
-            # Simulated entity detection
-            entities = [
-                {"text": "New York", "label": "LOCATION", "start": 26, "end": 34},
-                {"text": "tomorrow", "label": "TIME", "start": 35, "end": 43},
-                {"text": "3 PM", "label": "TIME", "start": 47, "end": 51}
-            ]
+            # One pass of the compiled entity automaton over the text
+            entities = [e for e in engine.extract_entities(text_input) if e["entity"] in entity_types]
             
             st.subheader("ðŸŽ¯ Detected Entities")
+            if not entities:
+                st.info("No known entity values found in this text.")
             for entity in entities:
-                st.markdown(f"- **{entity['text']}** â†’ `{entity['label']}` (Position: {entity['start']}-{entity['end']})")
+                st.markdown(f"- **{entity['value']}** â†’ `{entity['entity']}` (Position: {entity['start']}-{entity['end']})")
+        
+        st.subheader("ðŸ”Ž Similar Training Examples")
+        search_col1, search_col2 = st.columns([2, 1])
+        with search_col1:
+            search_backend = st.selectbox("Search the training corpus of:", ["huggingface", "rasa", "spacy"])
+        with search_col2:
+            top_k = st.slider("Examples to show:", 1, 20, 5)
+        
+        index = get_search_index(search_backend)
+        started = time.perf_counter()
+        matches = index.search(text_input, k=top_k)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if not len(index):
+            st.info("No training examples indexed for this backend yet. Train a model to build the index.")
+        elif not matches:
+            st.info(f"No training example shares a word with this text ({len(index):,} searched).")
+        else:
+            st.caption(f"{len(matches)} most similar of {len(index):,} training examples ({elapsed_ms:.1f}ms)")
+            similar_df = pd.DataFrame(matches, columns=["similarity", "intent", "text"]).round({"similarity": 3})
+            st.dataframe(similar_df, use_container_width=True)
     
     with col2:
         st.subheader("ðŸ“Š Annotation Statistics")
@@ -464,43 +972,61 @@ elif page == "ðŸ·ï¸ Entity Annotation":
         st.plotly_chart(fig, use_container_width=True)
 
 elif page == "ðŸ“ˆ Analytics Dashboard":
+    import pandas as pd
+    import plotly.express as px
+    
     st.header("ðŸ“ˆ Analytics Dashboard")
     
+    # Fold in events logged since the last render, then draw from the running aggregates
+    aggregates = get_event_log().refresh()
+    latency = aggregates.latency.summary()
+    
     # Dashboard metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
-            <h3>125</h3>
-            <p>Total Models</p>
+            <h3>{aggregates.trainings:,}</h3>
+            <p>Models Trained</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
-            <h3>4,892</h3>
+            <h3>{aggregates.samples_trained:,}</h3>
             <p>Training Samples</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col3:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
-            <h3>94.2%</h3>
-            <p>Avg Accuracy</p>
+            <h3>{aggregates.average_accuracy:.1%}</h3>
+            <p>Avg Training Accuracy</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col4:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
-            <h3>32</h3>
-            <p>Active Users</p>
+            <h3>{aggregates.predictions:,}</h3>
+            <p>Predictions Served</p>
         </div>
         """, unsafe_allow_html=True)
     
+    latency_cols = st.columns(4)
+    with latency_cols[0]:
+        st.metric("Latency p50", f"{latency['p50_ms']:.2f}ms")
+    with latency_cols[1]:
+        st.metric("Latency p95", f"{latency['p95_ms']:.2f}ms")
+    with latency_cols[2]:
+        st.metric("Latency p99", f"{latency['p99_ms']:.2f}ms")
+    with latency_cols[3]:
+        cache_rate = aggregates.cached_predictions / aggregates.predictions if aggregates.predictions else 0.0
+        st.metric("Cache Hit Rate", f"{cache_rate:.1%}")
+    
     st.markdown("---")
     
     # Charts
@@ -509,33 +1035,54 @@ elif page == "ðŸ“ˆ Analytics Dashboard":
     with col1:
         st.subheader("ðŸ“Š Training Activity")
         
-        # Training activity over time
-        dates = pd.date_range(start="2024-01-01", end="2024-12-31", freq="M")
+        # Models trained per day
         activity_data = pd.DataFrame({
-            "Date": dates,
-            "Models Trained": [12, 15, 18, 22, 25, 28, 32, 35, 38, 42, 45, 48]
-        })
+            "Date": pd.to_datetime(list(aggregates.trainings_per_day.keys())),
+            "Models Trained": list(aggregates.trainings_per_day.values())
+        }).sort_values("Date")
         
-        fig = px.line(activity_data, x="Date", y="Models Trained", 
-                     title="Monthly Training Activity")
+        fig = px.bar(activity_data, x="Date", y="Models Trained", 
+                     title="Models Trained per Day")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.subheader("ðŸ·ï¸ Intent Volume")
+        intent_data = pd.DataFrame({
+            "Intent": list(aggregates.intent_counts.keys()),
+            "Predictions": list(aggregates.intent_counts.values())
+        }).sort_values("Predictions", ascending=False)
+        
+        fig = px.bar(intent_data, x="Intent", y="Predictions", title="Predictions per Intent")
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("ðŸŽ¯ Model Performance Distribution")
         
-        # Performance distribution
-        import numpy as np
-        np.random.seed(42)
-        accuracy_scores = np.random.normal(0.92, 0.05, 100)
-        accuracy_scores = np.clip(accuracy_scores, 0.8, 1.0)
+        # Training accuracy histogram (5-point bins)
+        bins = [f"{i * 5}-{(i + 1) * 5}%" for i in range(len(aggregates.accuracy_histogram))]
+        fig = px.bar(x=bins, y=aggregates.accuracy_histogram, 
+                     title="Model Accuracy Distribution")
+        fig.update_xaxes(title="Training Accuracy")
+        fig.update_yaxes(title="Number of Models")
+        st.plotly_chart(fig, use_container_width=True)
         
-        fig = px.histogram(x=accuracy_scores, nbins=20, 
-                          title="Model Accuracy Distribution")
-        fig.update_xaxis(title="Accuracy Score")
-        fig.update_yaxis(title="Number of Models")
+        st.subheader("ðŸ“ˆ Prediction Confidence")
+        bins = [f"{i * 5}-{(i + 1) * 5}%" for i in range(len(aggregates.confidence_histogram))]
+        fig = px.bar(x=bins, y=aggregates.confidence_histogram, title="Confidence Distribution")
+        fig.update_xaxes(title="Confidence")
+        fig.update_yaxes(title="Predictions")
         st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("ðŸ“… Daily Prediction Volume")
+    volume_data = pd.DataFrame({
+        "Date": pd.to_datetime(list(aggregates.predictions_per_day.keys())),
+        "Predictions": list(aggregates.predictions_per_day.values())
+    }).sort_values("Date")
+    fig = px.line(volume_data, x="Date", y="Predictions", markers=True, title="Predictions per Day")
+    st.plotly_chart(fig, use_container_width=True)
 
 elif page == "ðŸ”§ API Testing":
+    import pandas as pd
+    
     st.header("ðŸ”§ API Testing Interface")
     
     st.markdown("""
@@ -588,15 +1135,32 @@ elif page == "ðŸ”§ API Testing":
         api_key = st.text_input("API Key (if required):", type="password")
         
         if st.button("ðŸš€ Send Request"):
-            # Simulated API response
             if "predict" in url:
+                # Served in-process by the intent engine, with measured stage timings
+                try:
+                    body = json.loads(request_body)
+                    text = body.get("text", "")
+                except (json.JSONDecodeError, AttributeError):
+                    body, text = {}, ""
+                # Optional "backend" / "workspace" fields route to that workspace's model
+                try:
+                    engine = get_engine(body.get("backend", "huggingface"), body.get("workspace", DEFAULT_WORKSPACE))
+                except (KeyError, ValueError):
+                    st.error("âŒ Unknown workspace or backend in the request body")
+                    st.stop()
+                started = time.perf_counter_ns()
+                prediction = get_prediction_cache().predict(engine, text)
+                elapsed_ns = time.perf_counter_ns() - started
+                LATENCY.record("request", elapsed_ns)
+                get_event_log().log_prediction(engine.backend, prediction["intent"], prediction["confidence"],
+                                               elapsed_ns / 1e6, prediction["cached"])
                 response = {
-                    "intent": "book_flight",
-                    "confidence": 0.95,
-                    "entities": [
-                        {"entity": "destination", "value": "Paris", "confidence": 0.92}
-                    ],
-                    "response_time": "45ms"
+                    "intent": prediction["intent"],
+                    "confidence": round(prediction["confidence"], 4),
+                    "entities": prediction["entities"],
+                    "cached": prediction["cached"],
+                    "response_time": f"{elapsed_ns / 1e6:.3f}ms",
+                    "timings_ms": {stage: round(ms, 4) for stage, ms in prediction["timings_ms"].items()}
                 }
             else:
                 response = {
@@ -642,6 +1206,22 @@ elif page == "ðŸ”§ API Testing":
         ```
         """)
         
+        st.subheader("âš¡ Measured Latency")
+        latency = pd.DataFrame([{"stage": stage, **summary} for stage, summary in LATENCY.snapshot().items()])
+        if latency.empty:
+            st.info("Send a predict request to start collecting latency histograms.")
+        else:
+            st.dataframe(latency.round(4), use_container_width=True)
+        with st.expander("Prometheus exposition"):
+            st.code(LATENCY.to_prometheus())
+        
+        st.subheader("ðŸ—‚ï¸ Resident Models")
+        registry = get_model_registry()
+        stats = registry.stats()
+        st.caption(f"{stats['bytes'] / (1 << 20):.1f} of {stats['max_bytes'] / (1 << 20):.0f} MB budget, "
+                   f"{stats['hit_rate']:.0%} hit rate, {stats['evictions']} evicted")
+        st.dataframe(pd.DataFrame(registry.resident()), use_container_width=True)
+        
         st.subheader("ðŸ”— Full API Documentation")
         st.markdown("[View Complete API Docs](https://github.com/Amarjit99/Chatbot-NLU-Trainer--Evaluator)")
 
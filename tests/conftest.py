@@ -0,0 +1,15 @@
+import pytest
+
+from nlu.benchmark import synthetic_examples
+from nlu.engine import IntentEngine
+
+
+@pytest.fixture(scope="session")
+def examples():
+    return list(synthetic_examples(600, label_noise=0))
+
+
+@pytest.fixture
+def engine(examples):
+    # Per test: saving an engine stamps its workspace and version
+    return IntentEngine.train(examples, backend="rasa", max_iter=50)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from nlu.active_learning import UNCERTAINTY_METHODS, rank_uncertain, top_k_indices
+from nlu.engine import UNKNOWN_INTENT
+
+PROBS = np.array([[1.0, 0.0, 0.0], [0.5, 0.5, 0.0], [1 / 3, 1 / 3, 1 / 3], [0.7, 0.2, 0.1]])
+
+
+@pytest.mark.parametrize("method", sorted(UNCERTAINTY_METHODS))
+def test_scores_order_certain_to_uniform(method):
+    scores = UNCERTAINTY_METHODS[method](PROBS)
+    assert scores.dtype == np.float32 and scores[0] == pytest.approx(0.0, abs=1e-6)
+    assert scores[0] < scores[3] < scores[2] and 0 <= scores.min() and scores.max() <= 1
+
+
+def test_scorer_values():
+    np.testing.assert_allclose(UNCERTAINTY_METHODS["entropy"](PROBS)[[1, 2]], [np.log(2) / np.log(3), 1.0], rtol=1e-5)
+    np.testing.assert_allclose(UNCERTAINTY_METHODS["margin"](PROBS), [0.0, 1.0, 1.0, 0.5], rtol=1e-5)
+    np.testing.assert_allclose(UNCERTAINTY_METHODS["least_confidence"](PROBS), [0.0, 0.5, 2 / 3, 0.3], rtol=1e-5)
+
+
+def test_top_k_is_sorted_and_bounded():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 4, 0]
+    assert len(top_k_indices(scores, 0)) == 0
+
+
+def test_batched_ranking_matches_one_batch(engine, examples):
+    texts = [example["text"] for example in examples[:300]] + ["!!!"]
+    whole = rank_uncertain(engine, texts, method="margin", top_k=20)
+    batched = rank_uncertain(engine, texts, method="margin", top_k=20, batch_size=37)
+    # Tied scores may be picked in either order, so compare scores rather than rows
+    np.testing.assert_allclose(whole["score"], batched["score"])
+    assert whole["index"][0] == batched["index"][0]
+    assert whole["summary"]["total"] == 301
+    # Text with no known features is the most uncertain of all
+    assert whole["index"][0] == 300 and whole["intent"][0] == UNKNOWN_INTENT
+    assert whole["reason"][0] == "No known vocabulary" and whole["score"][0] == 1.0
+    assert np.all(np.diff(whole["score"]) <= 0)
+
+
+def test_unknown_method_and_empty_input(engine):
+    with pytest.raises(ValueError):
+        rank_uncertain(engine, ["hello"], method="random")
+    empty = rank_uncertain(engine, [])
+    assert len(empty["index"]) == 0 and empty["summary"]["average_confidence"] == 0.0
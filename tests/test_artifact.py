@@ -0,0 +1,56 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from nlu.artifact import ModelStore, check_name, load_engine, save_engine
+
+
+def test_saved_engine_predicts_the_same(tmp_path, engine, examples):
+    path = save_engine(engine, str(tmp_path / "model"))
+    loaded = load_engine(path)
+    assert isinstance(loaded.classifier.coef_, np.memmap)
+    assert loaded.intents == engine.intents and loaded.backend == engine.backend
+    texts = [example["text"] for example in examples[:100]]
+    expected, actual = engine.predict_batch(texts), loaded.predict_batch(texts)
+    assert list(actual["intent"]) == list(expected["intent"])
+    np.testing.assert_allclose(actual["confidence"], expected["confidence"], rtol=1e-6)
+    assert loaded.predict("I want to book a flight to London")["entities"] == \
+        engine.predict("I want to book a flight to London")["entities"]
+
+
+def test_store_numbers_versions_and_loads_the_latest(tmp_path, engine):
+    store = ModelStore(str(tmp_path))
+    assert store.load("rasa") is None and store.versions("rasa") == []
+    assert [store.save(engine) for _ in range(2)] == ["v1", "v2"]
+    assert store.save(engine, workspace="team-a") == "v1"
+    assert store.versions("rasa") == ["v1", "v2"]
+    latest = store.load("rasa")
+    assert latest.version == "v2" and latest.workspace == "default"
+    assert store.manifest("rasa", "v1")["intents"] == engine.intents
+    assert not isinstance(store.load("rasa", "v1", mmap=False).classifier.coef_, np.memmap)
+
+
+def test_unsafe_names_and_versions_are_rejected(tmp_path, engine):
+    store = ModelStore(str(tmp_path))
+    for name in ("../x", "a/b", "", ".", "x.y"):
+        with pytest.raises(ValueError):
+            check_name(name)
+    with pytest.raises(ValueError):
+        store.save(engine, workspace="../outside")
+    with pytest.raises(ValueError):
+        store.load("rasa", "../v1")
+    assert os.listdir(tmp_path) == []
+
+
+def test_unknown_artifact_format_is_refused(tmp_path, engine):
+    path = save_engine(engine, str(tmp_path / "model"))
+    manifest_path = os.path.join(path, "manifest.json")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["format"] = 999
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError):
+        load_engine(path)
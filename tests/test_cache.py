@@ -0,0 +1,60 @@
+import gc
+
+from nlu.cache import PredictionCache, model_key, normalize_text
+from nlu.engine import IntentEngine
+from nlu.telemetry import LATENCY
+
+
+def test_normalize_text():
+    assert normalize_text("  Cancel\tMY   reservation\n") == "cancel my reservation"
+    assert normalize_text("ｃａｎｃｅｌ") == "cancel"
+
+
+def test_unsaved_engines_never_share_a_key(examples):
+    keys = set()
+    for _ in range(3):
+        engine = IntentEngine.train(examples[:50], max_iter=5)
+        keys.add(model_key(engine))
+        # A collected engine's id() is free for the next one
+        del engine
+        gc.collect()
+    assert len(keys) == 3
+
+
+def test_saved_versions_share_a_key(engine):
+    engine.workspace, engine.version = "default", "v0001"
+    try:
+        assert model_key(engine) == ("rasa", "default/v0001")
+    finally:
+        engine.workspace = engine.version = None
+
+
+def test_hits_on_normalized_text(engine):
+    cache = PredictionCache()
+    miss = cache.predict(engine, "Cancel my reservation")
+    hit = cache.predict(engine, "  cancel MY reservation ")
+    assert not miss["cached"] and hit["cached"]
+    assert (hit["intent"], hit["confidence"]) == (miss["intent"], miss["confidence"])
+    assert hit["text"] == "  cancel MY reservation "
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_bounded_by_entries_and_invalidated_by_backend(engine):
+    cache = PredictionCache(max_entries=2)
+    for text in ["a", "b", "c"]:
+        cache.put(engine, text, {"intent": "x", "confidence": 1.0, "ranking": []})
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.get(engine, "a") is None and cache.get(engine, "c") is not None
+    assert cache.invalidate("spacy") == 0
+    assert cache.invalidate("rasa") == 2 and cache.nbytes == 0
+
+
+def test_a_miss_extracts_entities_once_from_the_original_text(engine):
+    cache = PredictionCache()
+    before = LATENCY.histogram("entities").count
+    miss = cache.predict(engine, "Fly me to   PARIS tomorrow")
+    assert LATENCY.histogram("entities").count == before + 1
+    assert miss["intent"] == engine.predict("fly me to paris tomorrow")["intent"]
+    # Offsets point into the caller's text, not the normalized one
+    assert [(e["value"], e["start"]) for e in miss["entities"]] == [("PARIS", 12), ("tomorrow", 18)]
+    assert set(miss["timings_ms"]) == {"featurize", "score", "format", "entities"}
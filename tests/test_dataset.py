@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+
+from nlu.dataset import NLUDataset
+
+RECORDS = [
+    {"text": "fly to Zürich", "intent": "book_flight",
+     "entities": [{"entity": "destination", "value": "Zürich", "start": 7, "end": 13}]},
+    {"text": "weather in Paris", "intent": "get_weather",
+     "entities": [{"entity": "city", "value": "Paris"}]},
+    {"text": "hello", "intent": "greet", "entities": []},
+    {"text": "fly to Rome", "intent": "book_flight",
+     "entities": [{"entity": "destination", "value": "Rome", "start": 0, "end": 4}]},
+]
+
+
+def test_round_trips_records_and_fixes_entity_offsets():
+    records = NLUDataset.from_examples(RECORDS).to_records()
+    assert [r["text"] for r in records] == [r["text"] for r in RECORDS]
+    assert records[1]["entities"] == [{"entity": "city", "value": "Paris", "start": 11, "end": 16}]
+    # Stale offsets are re-anchored on the value
+    assert records[3]["entities"] == [{"entity": "destination", "value": "Rome", "start": 7, "end": 11}]
+    assert records[0] == RECORDS[0]
+
+
+def test_slices_are_views_and_take_copies():
+    dataset = NLUDataset.from_examples(RECORDS)
+    view = dataset[1:3]
+    assert view.text_buffer is dataset.text_buffer
+    assert view.to_records() == dataset.to_records()[1:3]
+    taken = dataset.take(np.array([3, 0]))
+    assert taken.to_records() == [dataset[3], dataset[0]]
+    assert dataset[::2].texts() == ["fly to Zürich", "hello"]
+    assert dataset[-1]["text"] == "fly to Rome"
+    with pytest.raises(IndexError):
+        dataset[4]
+
+
+def test_content_hash_ignores_how_the_rows_were_built():
+    dataset = NLUDataset.from_examples(RECORDS)
+    assert dataset[1:3].content_hash() == dataset.take(np.array([1, 2])).content_hash()
+    assert dataset.take(np.arange(4)).content_hash() == dataset.content_hash()
+    assert NLUDataset.from_examples(RECORDS[:3]).content_hash() != dataset.content_hash()
+
+
+def test_vocab_recoding_and_counts():
+    dataset = NLUDataset.from_examples(RECORDS)
+    recoded = dataset.with_vocab(["greet", "cancel"])
+    assert recoded.intent_vocab == ["greet", "cancel", "book_flight", "get_weather"]
+    assert list(recoded.intents()) == list(dataset.intents())
+    assert dataset.intent_counts() == {"book_flight": 2, "get_weather": 1, "greet": 1}
+    assert dataset.entity_lexicon() == {"zürich": "destination", "paris": "city", "rome": "destination"}
+
+
+def test_pandas_round_trip_parses_json_entities():
+    frame = NLUDataset.from_examples(RECORDS).to_pandas()
+    frame["entities"] = frame["entities"].map(json.dumps)
+    assert NLUDataset.from_pandas(frame).to_records() == NLUDataset.from_examples(RECORDS).to_records()
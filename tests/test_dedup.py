@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from nlu.dataset import NLUDataset
+from nlu.dedup import MinHashLSH, deduplicate, drop_leaked, find_duplicates, find_leakage
+
+TRAIN = [
+    {"text": "Book a table for 4 people", "intent": "book_restaurant"},
+    {"text": "book a table for 4 people!", "intent": "book_restaurant"},
+    {"text": "what is the weather in paris", "intent": "get_weather"},
+    {"text": "play some jazz music", "intent": "play_music"},
+    {"text": "BOOK A TABLE FOR 4 PEOPLE", "intent": "cancel_booking"},
+    {"text": "set an alarm for seven", "intent": "set_alarm"},
+]
+TEST = [
+    {"text": "what is the weather in Paris?", "intent": "get_weather"},
+    {"text": "turn off the lights", "intent": "smart_home"},
+]
+
+
+def test_signatures_estimate_jaccard_similarity():
+    index = MinHashLSH(seed=1)
+    rows = index.add(["book a table for four", "Book a table for four!", "play some jazz"])
+    assert rows == range(3) and len(index) == 3
+    similarity = index.similarity(np.array([0, 0]), np.array([1, 2]))
+    assert similarity[0] == 1.0 and similarity[1] < 0.3
+    np.testing.assert_array_equal(index.signatures(["book a table for four"])[0], index.signature_matrix[0])
+
+
+def test_index_options_are_checked():
+    with pytest.raises(ValueError):
+        MinHashLSH(num_perm=100, bands=32)
+    with pytest.raises(ValueError):
+        MinHashLSH(shingle_size=8)
+
+
+def test_duplicates_cluster_and_flag_conflicting_intents():
+    dataset = NLUDataset.from_examples(TRAIN)
+    report = find_duplicates(dataset)
+    assert [cluster.tolist() for cluster in report.clusters] == [[0, 1, 4]]
+    assert report.duplicate_rows == 2 and report.conflicts == 1
+    assert deduplicate(dataset, report).texts() == [TRAIN[i]["text"] for i in (0, 2, 3, 5)]
+
+
+def test_leakage_finds_test_rows_seen_in_training():
+    train, test = NLUDataset.from_examples(TRAIN), NLUDataset.from_examples(TEST)
+    report = find_leakage(train, test)
+    assert report.test_rows.tolist() == [0] and report.train_rows.tolist() == [2]
+    assert report.similarity[0] >= report.threshold and report.leak_rate == 0.5
+    assert drop_leaked(test, report).texts() == ["turn off the lights"]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from nlu.engine import UNKNOWN_INTENT, IntentEngine
+from nlu.featurizer import FeaturizerConfig, HashingTfidfFeaturizer, tokenize
+from nlu.quantize import quantize_engine
+
+
+def test_featurizer_is_deterministic_and_sparse():
+    featurizer = HashingTfidfFeaturizer(FeaturizerConfig(word_ngrams=(1, 2)))
+    X = featurizer.fit_transform(["book a flight", "book a table", "book a flight"])
+    assert X.shape[0] == 3 and X.nnz
+    np.testing.assert_array_equal(X[0].toarray(), X[2].toarray())
+    assert tokenize("Book a FLIGHT!") == ["book", "a", "flight"]
+
+
+def test_learns_the_training_intents(engine, examples):
+    assert engine.training_stats["training_accuracy"] > 0.95
+    prediction = engine.predict("I want to book a flight to London")
+    assert prediction["intent"] == "book_flight"
+    assert prediction["ranking"][0]["intent"] == "book_flight"
+    assert sum(item["confidence"] for item in prediction["ranking"]) == pytest.approx(1.0)
+    assert {entity["entity"] for entity in prediction["entities"]} == {"destination"}
+
+
+def test_batch_matches_single_predictions(engine, examples):
+    texts = [example["text"] for example in examples[:50]] + ["", "zzzz qqqq"]
+    batch = engine.predict_batch(texts, top_k=2)
+    assert batch["top_intents"].shape == (len(texts), 2)
+    for i, text in enumerate(texts):
+        single = engine.predict(text)
+        assert batch["intent"][i] == single["intent"]
+        assert batch["confidence"][i] == pytest.approx(single["confidence"])
+
+
+def test_text_with_no_known_features_is_unknown(engine):
+    assert engine.predict("")["intent"] == UNKNOWN_INTENT
+
+
+def test_training_needs_two_intents(examples):
+    with pytest.raises(ValueError):
+        IntentEngine.train([])
+    with pytest.raises(ValueError):
+        IntentEngine.train([example for example in examples if example["intent"] == "book_flight"])
+
+
+def test_update_adds_a_new_intent_and_leaves_the_base_alone(engine, examples):
+    coef = engine.classifier.coef_.copy()
+    new = [{"text": text, "intent": "order_pizza"} for text in
+           ["order a pizza", "i want a large pizza", "get me a pepperoni pizza", "pizza delivery please"]]
+    updated = engine.update(new + examples[:20])
+    assert updated.intents == engine.intents + ["order_pizza"]
+    assert updated.predict("can I order a pizza")["intent"] == "order_pizza"
+    assert updated.predict("I want to book a flight to London")["intent"] == "book_flight"
+    assert updated.featurizer.n_docs == engine.featurizer.n_docs + 24
+    assert updated.training_stats["total_samples"] == engine.featurizer.n_docs + 24
+    np.testing.assert_array_equal(engine.classifier.coef_, coef)
+    assert "order_pizza" not in engine.intents
+
+
+def test_update_checks_its_input(engine):
+    with pytest.raises(ValueError):
+        engine.update([])
+    with pytest.raises(ValueError):
+        quantize_engine(engine).update([{"text": "order a pizza", "intent": "order_pizza"}])
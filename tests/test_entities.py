@@ -0,0 +1,38 @@
+from nlu.entities import EntityExtractor
+
+LEXICON = {"new york": "city", "york": "city", "paris": "city", "4": "party_size", "he": "pronoun",
+           "hers": "pronoun", "New York Times": "newspaper"}
+
+
+def test_leftmost_longest_with_original_offsets():
+    text = "Fly from New York to PARIS, reading the new york times"
+    entities = EntityExtractor(LEXICON).extract(text)
+    assert [(e["entity"], e["value"]) for e in entities] == [
+        ("city", "New York"), ("city", "PARIS"), ("newspaper", "new york times")]
+    assert all(text[e["start"]:e["end"]] == e["value"] for e in entities)
+
+
+def test_overlapping_matches_are_all_reported():
+    matches = EntityExtractor(LEXICON).matches("new york")
+    assert sorted(matches) == [(0, 8, "city"), (4, 8, "city")]
+
+
+def test_matches_stop_at_word_boundaries():
+    extractor = EntityExtractor(LEXICON)
+    assert extractor.extract("table for 14 in yorkshire, then hers") == [
+        {"entity": "pronoun", "value": "hers", "start": 32, "end": 36}]
+    assert extractor.extract("a table for 4!")[0]["value"] == "4"
+
+
+def test_case_folding_keeps_offsets_for_expanding_characters():
+    text = "İstanbul to paris"
+    entities = EntityExtractor({"paris": "city"}).extract(text)
+    assert entities == [{"entity": "city", "value": "paris", "start": 12, "end": 17}]
+
+
+def test_empty_lexicon_and_blank_values_match_nothing():
+    assert EntityExtractor({}).extract("new york") == []
+    extractor = EntityExtractor({"  ": "blank", "paris": "city"})
+    assert extractor.n_patterns == 1
+    assert EntityExtractor({"paris": "city", "Paris ": "capital"}).extract("paris") == [
+        {"entity": "capital", "value": "paris", "start": 0, "end": 5}]
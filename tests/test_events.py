@@ -0,0 +1,65 @@
+import multiprocessing as mp
+import os
+
+import pytest
+
+from nlu.events import EventLog
+
+WRITERS, BATCHES, BATCH = 4, 25, 8
+
+
+def _write_in_pieces(root, writer):
+    # Every os.write is cut short, so each record takes several writes
+    real_write = os.write
+    os.write = lambda fd, data: real_write(fd, bytes(data[:7]))
+    log = EventLog(root)
+    for _ in range(BATCHES):
+        log.log_predictions(f"backend-{writer}", [f"intent-{writer}"] * BATCH, [0.5] * BATCH, [1.0] * BATCH)
+
+
+def test_directory_is_created_by_the_first_write(tmp_path):
+    root = tmp_path / "events"
+    log = EventLog(str(root))
+    assert not root.exists() and len(log) == 0
+    assert log.refresh().predictions == 0
+    log.log_training("rasa", samples=100, accuracy=0.9, training_seconds=1.5)
+    assert root.is_dir() and len(log) == 1
+
+
+def test_refresh_folds_only_new_events(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.log_predictions("rasa", ["greet", "greet", "bye"], [0.9, 0.8, 0.3], [1.0, 2.0, 3.0], cached=[1, 0, 0])
+    totals = log.refresh()
+    assert (totals.predictions, totals.cached_predictions) == (3, 1)
+    assert totals.intent_counts == {"greet": 2, "bye": 1}
+    log.log_prediction("spacy", "bye", 0.7, 1.0)
+    log.log_training("rasa", 50, 0.8, 2.0)
+    totals = log.refresh()
+    assert totals.intent_counts == {"greet": 2, "bye": 2}
+    assert totals.backend_predictions == {"rasa": 3, "spacy": 1}
+    assert totals.trainings == 1 and totals.average_accuracy == pytest.approx(0.8)
+
+
+def test_checkpoint_survives_a_restart(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.log_predictions("rasa", ["greet"] * 5, [0.9] * 5, [1.0] * 5)
+    log.checkpoint()
+    log.log_prediction("rasa", "bye", 0.4, 1.0)
+    restarted = EventLog(str(tmp_path))
+    assert restarted.refresh().intent_counts == {"greet": 5, "bye": 1}
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+def test_concurrent_short_writes_keep_records_whole(tmp_path):
+    ctx = mp.get_context("fork")
+    workers = [ctx.Process(target=_write_in_pieces, args=(str(tmp_path), i)) for i in range(WRITERS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    totals = EventLog(str(tmp_path)).refresh()
+    # A split record would decode to codes with no name and garbage confidences
+    assert totals.intent_counts == {f"intent-{i}": BATCHES * BATCH for i in range(WRITERS)}
+    assert totals.backend_predictions == {f"backend-{i}": BATCHES * BATCH for i in range(WRITERS)}
+    assert totals.confidence_histogram.sum() == totals.confidence_histogram[10] == WRITERS * BATCHES * BATCH
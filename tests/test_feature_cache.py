@@ -0,0 +1,61 @@
+import os
+import time
+
+from nlu.dataset import NLUDataset
+from nlu.engine import BACKEND_PRESETS
+from nlu.feature_cache import FeatureCache, dataset_key
+from nlu.featurizer import FeaturizerConfig, HashingTfidfFeaturizer
+
+
+def test_second_lookup_is_a_hit(tmp_path, examples):
+    cache = FeatureCache(str(tmp_path))
+    dataset = NLUDataset.from_examples(examples)
+    featurizer = HashingTfidfFeaturizer(BACKEND_PRESETS["rasa"])
+    first, cached = cache.count_matrix(dataset, featurizer)
+    assert not cached
+    second, cached = cache.count_matrix(NLUDataset.from_examples(examples), featurizer)
+    assert cached
+    assert (first != second).nnz == 0
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1 and cache.stats()["entries"] == 1
+
+
+def test_key_changes_with_texts_and_config(examples):
+    dataset = NLUDataset.from_examples(examples)
+    featurizer = HashingTfidfFeaturizer(BACKEND_PRESETS["rasa"])
+    key = dataset_key(dataset, featurizer)
+    assert dataset_key(NLUDataset.from_examples(examples[:-1]), featurizer) != key
+    assert dataset_key(dataset, HashingTfidfFeaturizer(FeaturizerConfig(n_features=1 << 12))) != key
+
+
+def test_an_entry_vanishing_mid_read_is_a_miss(tmp_path, examples):
+    cache = FeatureCache(str(tmp_path))
+    dataset = NLUDataset.from_examples(examples[:50])
+    featurizer = HashingTfidfFeaturizer(BACKEND_PRESETS["rasa"])
+    cache.count_matrix(dataset, featurizer)
+    key = dataset_key(dataset, featurizer)
+    os.remove(os.path.join(str(tmp_path), key, "indptr.npy"))
+    assert cache.get(key) is None
+    assert cache.get("missing") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, examples):
+    featurizer = HashingTfidfFeaturizer(BACKEND_PRESETS["rasa"])
+    cache = FeatureCache(str(tmp_path), max_bytes=1 << 40)
+    datasets = [NLUDataset.from_examples(examples[i * 100:(i + 1) * 100]) for i in range(3)]
+    keys = [dataset_key(dataset, featurizer) for dataset in datasets]
+    for dataset in datasets:
+        cache.count_matrix(dataset, featurizer)
+        time.sleep(0.01)
+    cache.get(keys[0])
+    cache.max_bytes = sum(row["bytes"] for row in cache.entries()) - 1
+    assert cache.evict() == 1 and cache.evictions == 1
+    assert sorted(row["key"] for row in cache.entries()) == sorted([keys[0], keys[2]])
+
+
+def test_unwritable_root_only_skips_caching(tmp_path, examples):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = FeatureCache(str(blocker / "cache"))
+    counts, cached = cache.count_matrix(NLUDataset.from_examples(examples[:20]), HashingTfidfFeaturizer())
+    assert not cached and counts.shape[0] == 20
+    assert cache.entries() == []
@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+from nlu.ingest import IngestError, IngestReport, _iter_json_array, iter_examples, iter_records
+
+RECORDS = [
+    {"text": "book a flight to Paris", "intent": "book_flight",
+     "entities": [{"entity": "destination", "value": "Paris"}]},
+    {"text": "cancel my reservation", "intent": "cancel_booking"},
+    {"text": "weather in\nLondon", "intent": "weather_query"},
+]
+
+
+def parse(text, chunk_size=1 << 16):
+    return list(_iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 16])
+def test_json_array_across_chunk_boundaries(chunk_size):
+    text = "[\n" + ",\n".join(json.dumps(record) for record in RECORDS) + "\n]\n"
+    assert parse(text, chunk_size) == [(2, RECORDS[0]), (3, RECORDS[1]), (4, RECORDS[2])]
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ \n ]  "])
+def test_empty_json_array(text):
+    assert parse(text) == []
+
+
+@pytest.mark.parametrize("text", ["[1,]", '[{"a": 1},\n]', "[,1]", "[1 2]", "{}", "[1,"])
+def test_malformed_json_array_raises(text):
+    with pytest.raises(IngestError):
+        parse(text)
+
+
+def test_trailing_comma_message():
+    with pytest.raises(IngestError, match="trailing ','"):
+        parse('[{"a": 1},\n]')
+
+
+@pytest.mark.parametrize("chunk_size", [2, 5, 1 << 16])
+def test_json_error_line_is_where_the_element_breaks(chunk_size):
+    text = '[\n{"a": 1},\n{"b":\n  nope}\n\n\n]\n'
+    with pytest.raises(IngestError) as info:
+        parse(text, chunk_size)
+    assert info.value.line == 4
+
+
+def test_jsonl_bad_lines_are_reported_and_skipped():
+    text = "\n".join([json.dumps(RECORDS[0]), "{not json", "", json.dumps({"text": "hi"}), json.dumps(RECORDS[1])])
+    report = IngestReport()
+    examples = list(iter_examples(io.StringIO(text), "jsonl", report))
+    assert [example["intent"] for example in examples] == ["book_flight", "cancel_booking"]
+    assert (report.rows_read, report.rows_valid, report.error_count) == (4, 2, 2)
+    assert [error.line for error in report.errors] == [2, 4]
+    assert examples[0]["entities"] == [{"entity": "destination", "value": "Paris", "start": 17, "end": 22}]
+
+
+def test_broken_json_array_is_fatal():
+    report = IngestReport()
+    examples = list(iter_examples(io.StringIO(json.dumps(RECORDS)[:-1] + ",]"), "json", report))
+    assert len(examples) == 3
+    assert report.fatal is not None
+
+
+def test_csv_line_numbers_count_quoted_newlines():
+    text = 'text,intent\n"two\nlines",greet\nbye,goodbye\n'
+    assert [line for line, _ in iter_records(io.StringIO(text), "csv")] == [2, 4]
@@ -0,0 +1,63 @@
+import json
+import os
+import signal
+import time
+
+import pytest
+
+from nlu.benchmark import synthetic_examples
+from nlu.jobs import CANCELLED, COMPLETED, FAILED, RUNNING, TrainingJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = TrainingJobQueue(str(tmp_path / "models"), max_workers=1, search_root=None)
+    yield queue
+    queue.shutdown()
+
+
+def wait_for(queue, job_id, statuses, timeout=120):
+    deadline = time.monotonic() + timeout
+    for job in queue.follow(job_id, timeout=0.2):
+        if job.status in statuses or time.monotonic() > deadline:
+            return job
+
+
+def corpus(n):
+    return json.dumps(list(synthetic_examples(n, label_noise=0)))
+
+
+def test_job_trains_and_saves_a_model(queue):
+    installed = []
+    queue.on_complete = installed.append
+    job = wait_for(queue, queue.submit("rasa", training_text=corpus(300)), {COMPLETED, FAILED})
+    assert job.status == COMPLETED, job.error
+    assert job.result["version"] == "v1" and installed == [job]
+    assert job.progress == 1.0 and "completed" in job.progress_text()
+
+
+def test_bad_names_are_rejected_before_queueing(queue):
+    with pytest.raises(ValueError):
+        queue.submit("rasa", training_text="[]", workspace="../x")
+    assert queue.jobs() == []
+
+
+def test_a_killed_worker_does_not_break_later_jobs(queue):
+    big = queue.submit("huggingface", training_text=corpus(100_000), max_iter=500)
+    wait_for(queue, big, {RUNNING, COMPLETED, FAILED})
+    for pid in list(queue._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    job = wait_for(queue, big, {COMPLETED, FAILED})
+    assert job.status == FAILED and "worker process died" in job.error
+
+    job = wait_for(queue, queue.submit("rasa", training_text=corpus(300)), {COMPLETED, FAILED})
+    assert job.status == COMPLETED, job.error
+
+
+def test_jobs_dropped_at_shutdown_are_cancelled(queue):
+    # The pool hands a job or two to its call queue ahead of time; the last one is still waiting
+    jobs = [queue.submit("rasa", training_text=corpus(300)) for _ in range(4)]
+    queue.shutdown()
+    job = wait_for(queue, jobs[-1], {CANCELLED, COMPLETED, FAILED}, timeout=30)
+    assert job.status == CANCELLED and job.done
+    assert "cancelled" in job.progress_text()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from nlu.benchmark import synthetic_examples
+from nlu.feature_cache import FeatureCache
+from nlu.metrics import classification_report, confusion_matrix, evaluate
+
+
+def test_report_from_a_confusion_matrix():
+    cm = confusion_matrix([0, 0, 1, 1, 1, 2], [0, 1, 1, 1, 0, 2], 3)
+    np.testing.assert_array_equal(cm, [[1, 1, 0], [1, 2, 0], [0, 0, 1]])
+    report = classification_report(cm, ["a", "b", "c"])
+    assert report["accuracy"] == pytest.approx(4 / 6)
+    assert report["labels"]["b"] == {"precision": pytest.approx(2 / 3), "recall": pytest.approx(2 / 3),
+                                     "f1-score": pytest.approx(2 / 3), "support": 3}
+    assert report["macro avg"]["recall"] == pytest.approx((1 / 2 + 2 / 3 + 1) / 3)
+    assert report["weighted avg"]["support"] == 6
+
+
+def test_evaluates_the_given_test_set(engine):
+    test = list(synthetic_examples(300, seed=5, label_noise=0))
+    report = evaluate(engine, test)
+    assert report["macro avg"]["support"] == 300
+    assert report["accuracy"] < 1.0 and report["accuracy"] > 0.6
+    assert report["confusion_matrix"].sum() == 300
+
+
+def test_unseen_intents_and_unknown_text_get_their_own_rows(engine):
+    # "!!!" has no tokens, so the model can only answer unknown
+    report = evaluate(engine, [{"text": "play some jazz", "intent": "play_music"},
+                               {"text": "!!!", "intent": "book_flight"},
+                               {"text": "cancel my reservation", "intent": "cancel_booking"}])
+    assert "play_music" in report["confusion_labels"] and "unknown" in report["confusion_labels"]
+    assert report["labels"]["play_music"]["recall"] == 0.0
+
+
+def test_feature_cache_gives_the_same_report(tmp_path, engine):
+    test = list(synthetic_examples(200, seed=6))
+    cache = FeatureCache(str(tmp_path))
+    expected = evaluate(engine, test)
+    for _ in range(2):
+        report = evaluate(engine, test, feature_cache=cache)
+        assert report["accuracy"] == expected["accuracy"]
+        np.testing.assert_array_equal(report["confusion_matrix"], expected["confusion_matrix"])
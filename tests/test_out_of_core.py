@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+from nlu.benchmark import synthetic_examples
+from nlu.engine import IntentEngine
+from nlu.metrics import evaluate
+from nlu.out_of_core import ChunkedCorpus, evaluate_corpus, train_sgd
+
+
+def test_chunks_match_the_in_memory_featurizer(examples):
+    with ChunkedCorpus.from_examples(examples, chunk_size=250) as corpus:
+        assert corpus.chunk_rows == [250, 250, 100] and len(corpus) == 600
+        full = IntentEngine.train(examples, backend="rasa", max_iter=1)
+        np.testing.assert_array_equal(corpus.featurizer.doc_freq, full.featurizer.doc_freq)
+        counts, labels = corpus.chunk(2)
+        expected = full.featurizer.count_matrix(example["text"] for example in examples[500:])
+        assert (counts != expected).nnz == 0
+        assert [corpus.intent_vocab[code] for code in labels] == [example["intent"] for example in examples[500:]]
+        root = corpus.root
+    assert not os.path.exists(root)
+
+
+def test_sgd_learns_the_corpus(examples):
+    losses = []
+    with ChunkedCorpus.from_examples(examples, chunk_size=200) as corpus:
+        engine = train_sgd(corpus, epochs=5, callback=lambda epoch, loss: losses.append(loss))
+        report = evaluate_corpus(engine, corpus)
+    assert engine.intents == sorted({example["intent"] for example in examples})
+    assert len(losses) == 5 and losses[-1] < losses[0]
+    assert report["accuracy"] > 0.8
+    assert engine.training_stats["training_accuracy"] == report["accuracy"]
+    assert engine.training_stats["chunks"] == 3
+    held_out = list(synthetic_examples(300, seed=7, label_noise=0))
+    assert evaluate(engine, held_out)["accuracy"] > 0.8
+
+
+def test_training_checks_its_input(examples):
+    with ChunkedCorpus.from_examples([]) as corpus:
+        with pytest.raises(ValueError):
+            train_sgd(corpus)
+    single = [example for example in examples if example["intent"] == examples[0]["intent"]]
+    with ChunkedCorpus.from_examples(single) as corpus:
+        with pytest.raises(ValueError):
+            train_sgd(corpus)
+    with ChunkedCorpus.from_examples(examples) as corpus:
+        with pytest.raises(ValueError):
+            train_sgd(corpus, epochs=0)
+
+
+def test_a_given_root_is_kept(tmp_path, examples):
+    with ChunkedCorpus.from_examples(examples[:100], chunk_size=40, root=str(tmp_path)) as corpus:
+        assert corpus.n_chunks == 3
+    assert sorted(os.listdir(tmp_path)) == ["chunk-000000", "chunk-000001", "chunk-000002"]
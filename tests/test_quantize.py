@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pytest
+
+from nlu.artifact import ModelStore
+from nlu.benchmark import synthetic_examples
+from nlu.quantize import base_backend, compare_models, is_quantized, quantize_engine, quantized_backend
+
+
+def test_backend_names():
+    assert quantized_backend("rasa") == "rasa-int8"
+    assert is_quantized("rasa-int8") and not is_quantized("rasa")
+    assert base_backend("rasa-int8") == "rasa" == base_backend("rasa")
+
+
+def test_int8_model_agrees_with_full_precision(engine):
+    quantized = quantize_engine(engine)
+    assert quantized.backend == "rasa-int8" and quantize_engine(quantized) is quantized
+    report = compare_models(engine, quantized, list(synthetic_examples(500, seed=1, label_noise=0)))
+    assert report.agreement >= 0.99
+    assert abs(report.accuracy_delta) <= 0.01
+    assert report.max_confidence_shift < 0.05
+    assert report.compression > 1.5
+
+
+def test_int8_model_round_trips_through_the_store(tmp_path, engine, examples):
+    store = ModelStore(str(tmp_path))
+    quantized = quantize_engine(engine)
+    version = store.save(quantized)
+    saved = os.listdir(os.path.join(str(tmp_path), "default", "rasa-int8", version))
+    assert "doc_freq.npy" not in saved and "coef_q.npy" in saved
+    loaded = store.load("rasa-int8", version)
+    assert loaded.featurizer.doc_freq is None
+    texts = [example["text"] for example in examples[:200]]
+    expected, actual = quantized.predict_batch(texts), loaded.predict_batch(texts)
+    assert list(actual["intent"]) == list(expected["intent"])
+    np.testing.assert_allclose(actual["confidence"], expected["confidence"], rtol=1e-6)
+
+
+def test_compare_rejects_an_unrelated_model(engine, examples):
+    other = quantize_engine(type(engine).train(examples, backend="spacy", max_iter=5))
+    with pytest.raises(ValueError):
+        compare_models(engine, other, examples)
@@ -0,0 +1,52 @@
+import pytest
+
+from nlu.artifact import ModelStore
+from nlu.registry import UNSAVED, ModelRegistry
+
+
+def test_picks_up_a_version_saved_by_another_store(tmp_path, engine):
+    ModelStore(str(tmp_path)).save(engine)
+    registry = ModelRegistry(ModelStore(str(tmp_path)), refresh_seconds=0)
+    assert registry.get("rasa").version == "v1"
+    # e.g. a training worker or the other UI saving into the same root
+    ModelStore(str(tmp_path)).save(engine)
+    assert registry.get("rasa").version == "v2"
+
+
+def test_store_is_listed_at_most_every_refresh_seconds(tmp_path, engine):
+    ModelStore(str(tmp_path)).save(engine)
+    registry = ModelRegistry(ModelStore(str(tmp_path)), refresh_seconds=3600)
+    assert registry.get("rasa").version == "v1"
+    ModelStore(str(tmp_path)).save(engine)
+    assert registry.get("rasa").version == "v1"
+    registry.install("rasa", "v2")
+    assert registry.get("rasa").version == "v2"
+
+
+def test_fallback_only_for_the_default_workspace(tmp_path, engine):
+    built = []
+    registry = ModelRegistry(ModelStore(str(tmp_path)), fallback=lambda backend: built.append(backend) or engine,
+                             refresh_seconds=0)
+    assert registry.get("rasa") is engine and ("default", "rasa", UNSAVED) in registry
+    with pytest.raises(KeyError):
+        registry.get("rasa", "team")
+    with pytest.raises(ValueError):
+        registry.get("rasa", "../team")
+    assert built == ["rasa"]
+    # A saved model replaces the resident fallback
+    ModelStore(str(tmp_path)).save(engine)
+    assert registry.get("rasa").version == "v1"
+    assert ("default", "rasa", UNSAVED) not in registry
+
+
+def test_least_recently_used_models_are_evicted(tmp_path, engine):
+    store = ModelStore(str(tmp_path))
+    for workspace in ("a", "b", "c"):
+        store.save(engine, workspace)
+    registry = ModelRegistry(store, max_models=2)
+    registry.get("rasa", "a")
+    registry.get("rasa", "b")
+    registry.get("rasa", "a")
+    registry.get("rasa", "c")
+    assert [(m["workspace"], m["version"]) for m in registry.resident()] == [("c", "v1"), ("a", "v1")]
+    assert registry.stats()["evictions"] == 1
@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from nlu.search import SearchIndexStore, SimilarityIndex
+
+QUERIES = ["book a flight to Paris", "cancel my reservation", "weather in Tokyo tomorrow", "table for 4"]
+
+
+def results(index):
+    return [[(hit["text"], hit["intent"], round(hit["similarity"], 6)) for hit in index.search(query, k=5)]
+            for query in QUERIES]
+
+
+def manifest(root):
+    with open(os.path.join(root, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_commit_advances_the_generation(tmp_path, examples):
+    index = SimilarityIndex(str(tmp_path))
+    assert index.generation == 0 and not index.search("cancel my reservation")
+    index.add(examples[:100])
+    index.add(examples[100:200])
+    assert index.generation == 2 == manifest(tmp_path)["generation"]
+    assert len(index) == 200
+
+
+def test_reader_follows_the_latest_writer(tmp_path, examples):
+    first, second = SimilarityIndex(str(tmp_path)), SimilarityIndex(str(tmp_path))
+    reader = SimilarityIndex(str(tmp_path))
+    first.add(examples[:100])
+    # Both writers start from the same base, so neither may reuse the other's generation
+    second.add(examples[100:300])
+    assert second.generation > first.generation
+    assert reader.reload()
+    assert reader.generation == second.generation and len(reader) == 300
+    assert not reader.reload()
+    # The stats directory the first writer published was replaced, not shared
+    assert manifest(tmp_path)["stats"] != first._stats_dir
+
+
+def test_uncommitted_additions_are_private_until_commit(tmp_path, examples):
+    writer, reader = SimilarityIndex(str(tmp_path)), SimilarityIndex(str(tmp_path))
+    writer.add(examples[:100])
+    reader.reload()
+    writer.add(examples[100:200], commit=False)
+    assert not reader.reload() and len(reader) == 100
+    writer.discard()
+    assert len(writer) == 100
+    writer.add(examples[100:200])
+    assert reader.reload() and len(reader) == 200
+
+
+@pytest.mark.parametrize("block", [7, 1 << 20])
+def test_merge_matches_a_fresh_build(tmp_path, examples, block):
+    incremental = SimilarityIndex(str(tmp_path / "incremental"), max_segments=2)
+    for start in range(0, 500, 100):
+        incremental.add(examples[start:start + 100])
+    merged = incremental._merge(incremental.segments, block=block)
+    incremental._retired.extend(segment.name for segment in incremental.segments)
+    incremental.segments = [merged]
+    incremental.commit()
+
+    fresh = SimilarityIndex(str(tmp_path / "fresh"))
+    fresh.rebuild(examples[:500])
+    assert results(incremental) == results(fresh)
+    assert sorted(os.listdir(tmp_path / "incremental")) == sorted(
+        ["manifest.json", incremental._stats_dir, merged.name])
+
+
+def test_store_rejects_paths_outside_its_root(tmp_path):
+    store = SearchIndexStore(str(tmp_path / "indexes"))
+    for workspace in ["../escape", "/etc", "a/b", ""]:
+        with pytest.raises(ValueError):
+            store.get("rasa", workspace)
+    with pytest.raises(ValueError):
+        store.get("../rasa")
+    os.makedirs(tmp_path / "indexes")
+    os.symlink(tmp_path, tmp_path / "indexes" / "linked")
+    with pytest.raises(ValueError):
+        store.get("rasa", "linked")
+
+
+def test_store_get_never_writes(tmp_path):
+    store = SearchIndexStore(str(tmp_path / "indexes"))
+    index = store.get("rasa", "team")
+    assert len(index) == 0
+    assert not os.path.exists(tmp_path / "indexes")
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from nlu.artifact import ModelStore
+from nlu.registry import ModelRegistry
+from server import HTTPError, InferenceServer
+
+
+@pytest.fixture
+def server(tmp_path, engine):
+    store = ModelStore(str(tmp_path))
+    store.save(engine)
+    server = InferenceServer(ModelRegistry(store))
+    yield server
+    server.executor.shutdown(wait=False)
+
+
+def call(server, *requests):
+    """``(status, payload)`` for each ``(method, path, body)`` request, served on one event loop"""
+
+    async def run():
+        responses = []
+        for method, path, body in requests:
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode("utf-8")
+            try:
+                status, _, payload = await server.dispatch(method, path, body)
+            except HTTPError as exc:
+                status, payload = exc.status, str(exc).encode("utf-8")
+            responses.append((status, payload))
+        for batcher in server.batchers.values():
+            await batcher.close()
+        return responses
+
+    return asyncio.run(run())
+
+
+def test_predict_and_predict_batch(server):
+    (status, payload), (batch_status, batch_payload) = call(
+        server,
+        ("POST", "/predict", {"text": "cancel my reservation", "backend": "rasa"}),
+        ("POST", "/predict_batch", {"texts": ["weather in Paris", "book a table"], "backend": "rasa", "top_k": 2}),
+    )
+    assert status == 200 and json.loads(payload)["intent"] == "cancel_booking"
+    batch = json.loads(batch_payload)
+    assert batch_status == 200 and batch["count"] == 2
+    assert all(len(prediction["alternatives"]) == 1 for prediction in batch["predictions"])
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    b"[1, 2]",
+    {"text": 5, "backend": "rasa"},
+    {"text": "hi", "backend": 5},
+    {"text": "hi", "backend": "../rasa"},
+    {"text": "hi", "backend": "unknown"},
+    {"text": "hi", "backend": "rasa", "workspace": "/etc"},
+    {"text": "hi", "backend": "rasa", "workspace": "../default"},
+    {"text": "hi", "backend": "rasa", "workspace": ["default"]},
+])
+def test_malformed_requests_are_400(server, body):
+    [(status, _)] = call(server, ("POST", "/predict", body))
+    assert status == 400
+    assert not server.batchers
+
+
+@pytest.mark.parametrize("body", [
+    {"text": "hi", "backend": "spacy"},
+    {"text": "hi", "backend": "rasa-int8"},
+    {"text": "hi", "backend": "rasa", "workspace": "elsewhere"},
+])
+def test_models_never_saved_are_404_and_not_trained(server, body):
+    [(status, _)] = call(server, ("POST", "/predict", body))
+    assert status == 404
+    assert not server.batchers and not server.registry.resident()
+    assert not server.registry.store.versions(body["backend"], body.get("workspace", "default"))
+
+
+@pytest.mark.parametrize("body", [
+    {"texts": "hi", "backend": "rasa"},
+    {"texts": ["hi", 1], "backend": "rasa"},
+    {"texts": ["hi"], "backend": "rasa", "top_k": 0},
+    {"texts": ["hi"], "backend": "rasa", "top_k": "3"},
+])
+def test_malformed_batches_are_400(server, body):
+    [(status, _)] = call(server, ("POST", "/predict_batch", body))
+    assert status == 400
+
+
+def test_routing(server):
+    responses = call(server, ("GET", "/predict", b""), ("GET", "/nowhere", b""), ("GET", "/health", b""))
+    assert [status for status, _ in responses] == [405, 404, 200]
+
+
+def test_serves_a_version_saved_after_startup(server, engine):
+    server.registry.refresh_seconds = 0
+    server.registry.store.save(engine)
+    call(server, ("POST", "/predict", {"text": "hi", "backend": "rasa"}))
+    assert [model["version"] for model in server.registry.resident()] == ["v2"]
+
+
+def raw_request(server, head):
+    async def run():
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(head)
+            response = await reader.read()
+            writer.close()
+        return response
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length", ["-1", "abc", "1.5", ""])
+def test_bad_content_length_is_400(server, length):
+    response = raw_request(server, f"POST /predict HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Connection: close" in response
+
+
+def test_http_round_trip(server):
+    body = json.dumps({"text": "cancel my reservation", "backend": "rasa"}).encode()
+    response = raw_request(server, b"POST /predict HTTP/1.1\r\nConnection: close\r\nContent-Length: "
+                           + str(len(body)).encode() + b"\r\n\r\n" + body)
+    assert response.startswith(b"HTTP/1.1 200 ")
+    assert json.loads(response.split(b"\r\n\r\n", 1)[1])["intent"] == "cancel_booking"
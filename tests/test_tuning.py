@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from nlu.dataset import NLUDataset
+from nlu.tuning import SharedCorpus, attach_corpus, leaderboard, param_grid, run_sweep, stratified_folds
+
+
+def test_folds_are_balanced_within_every_intent():
+    codes = np.repeat(np.arange(4), [50, 31, 7, 12])
+    folds = stratified_folds(codes, 5, seed=3)
+    for code in range(4):
+        sizes = np.bincount(folds[codes == code], minlength=5)
+        assert sizes.max() - sizes.min() <= 1
+    np.testing.assert_array_equal(folds, stratified_folds(codes, 5, seed=3))
+
+
+def test_more_than_127_folds_do_not_overflow():
+    folds = stratified_folds(np.zeros(600, dtype=np.int32), 300)
+    assert folds.min() == 0 and folds.max() == 299
+    assert np.bincount(folds).tolist() == [2] * 300
+
+
+def test_shared_corpus_round_trips(examples):
+    dataset = NLUDataset.from_examples(examples[:100])
+    folds = stratified_folds(dataset.intent_codes, 3)
+    with SharedCorpus(dataset, folds) as corpus:
+        shm, attached, attached_folds = attach_corpus(corpus.spec)
+        try:
+            assert attached.to_records() == dataset.to_records()
+            np.testing.assert_array_equal(attached_folds, folds)
+        finally:
+            del attached, attached_folds
+            shm.close()
+
+
+def test_sweep_ranks_configs(examples):
+    dataset = NLUDataset.from_examples(examples[:300])
+    configs = param_grid({"backend": ["rasa"], "max_iter": [1, 50]})
+    results = list(run_sweep(dataset, configs, folds=2, max_workers=2, feature_cache_root=None))
+    assert sorted((result["config_id"], result["fold"]) for result in results) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    rows = leaderboard(results)
+    assert [row["rank"] for row in rows] == [1, 2]
+    assert rows[0]["folds"] == rows[1]["folds"] == 2
+    assert rows[0]["mean_macro_f1"] >= rows[1]["mean_macro_f1"]
+
+
+def test_sweep_needs_two_folds(examples):
+    with pytest.raises(ValueError):
+        next(run_sweep(NLUDataset.from_examples(examples[:10]), [{}], folds=1))